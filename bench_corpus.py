@@ -0,0 +1,304 @@
+"""
+合成语料与提取准确率基准：生成带标准答案的txt/docx/pdf文档，统计各提取方式的速度和精确率/召回率
+由 mytest2.py bench accuracy/segmentation 和 tests/test_extraction.py 使用
+"""
+import json
+import os
+import random
+import time
+from typing import Dict, List
+
+from mytest2 import FIELD_EXTRACTOR, FIELD_SPECS, FieldSpec, FileProcessor, extract_segmented
+
+# 合成数据的取值范围：(最小值, 最大值, 小数位数)，未列出的字段按类型和单位取默认范围
+SYNTHETIC_RANGES = {
+    "SiO2_content": (64.5, 85.0, 1),  # 需通过validate_data的高硅型检查
+    "water_binder_ratio": (0.28, 0.65, 2),
+    "curing_temp": (20, 95, 0),
+    "calcination_temp": (500, 950, 0),
+    "mixing_time": (3, 30, 0),
+}
+SYNTHETIC_WORDS = {
+    "mineral_1": ["石英", "长石", "赤铁矿", "磁铁矿", "云母", "角闪石"],
+    "alkali_activator": ["氢氧化钠", "水玻璃", "碳酸钠", "硅酸钠", "氢氧化钾"],
+    "curing_method": ["标准养护法", "蒸汽养护", "蒸压养护", "自然养护"],
+}
+# 干扰正文（不含字段标签+冒号的组合，不应被提取）
+SYNTHETIC_FILLER = [
+    "本研究以高硅铁尾矿为主要原料制备复合胶凝材料", "试样成型后在规定条件下养护至相应龄期",
+    "结果表明适量掺入粉煤灰有利于后期强度发展", "尾矿颗粒表面的活性位点在碱性环境中逐步溶出",
+    "微观形貌显示水化产物填充了颗粒间的孔隙", "不同配比试样的强度差异主要来自胶凝组分的含量",
+    "实验过程中严格控制原料含水率和搅拌工艺", "相关数据取三个平行试样的平均值",
+]
+
+
+def synthetic_record(rng: random.Random) -> Dict[str, object]:
+    """生成一组覆盖全部字段的合成取值（数值已按输出格式取整，可直接作为标准答案）"""
+    record = {}
+    for spec in FIELD_SPECS:
+        if spec.type is str:
+            record[spec.column] = rng.choice(SYNTHETIC_WORDS.get(spec.column, ["样品"]))
+            continue
+        low, high, digits = SYNTHETIC_RANGES.get(
+            spec.column, (0.5, 60.0, 1) if spec.unit == "%" else (0.01, 80.0, 2))
+        if spec.type is int:
+            record[spec.column] = rng.randint(int(low), int(high))
+        else:
+            record[spec.column] = round(rng.uniform(low, high), digits)
+    return record
+
+
+def _synthetic_line(spec: FieldSpec, value, rng: random.Random, drift: str) -> str:
+    """按随机格式输出一个字段：冒号全/半角、冒号后是否空格、是否带括号注释；extended时还会在单位前加空格"""
+    text = str(value)
+    space = " " if drift == "extended" and spec.unit and rng.random() < 0.2 else ""
+    note = rng.choice(["", f" ({spec.label})", f"（{spec.label}）"])
+    return f"{spec.label}{rng.choice([':', '：'])}{rng.choice(['', ' '])}{text}{space}{spec.unit}{note}"
+
+
+def synthetic_document(rng: random.Random, missing_rate: float = 0.1, filler: int = 20,
+                       drift: str = "basic") -> tuple:
+    """
+    生成一篇合成文档，返回(分段列表, 标准答案)
+    分段为[(标题, [字段行...], [(标签, 带单位的取值)...])]，同时给出行文本和表格单元格两种形式，
+    由各格式的写入函数选择；缺失的字段在标准答案中为None
+    """
+    record = synthetic_record(rng)
+    truth = {}
+    sections, current = [], None
+    for index, spec in enumerate(FIELD_SPECS):
+        if index % 6 == 0:
+            current = (f"第{len(sections) + 1}部分 实验参数", [], [])
+            sections.append(current)
+        if rng.random() < missing_rate:
+            truth[spec.column] = None
+            continue
+        truth[spec.column] = record[spec.column]
+        current[1].append(_synthetic_line(spec, record[spec.column], rng, drift))
+        current[2].append((spec.label, f"{record[spec.column]}{spec.unit}"))
+    paragraphs = ["".join(rng.choice(SYNTHETIC_FILLER) + "。" for _ in range(rng.randint(2, 5)))
+                  for _ in range(filler)]
+    # 干扰正文分散插入各部分之间
+    body = []
+    for section in sections:
+        body.append(("text", paragraphs[:filler // len(sections) + 1]))
+        paragraphs = paragraphs[filler // len(sections) + 1:]
+        body.append(("section", section))
+    return body, truth
+
+
+def _write_txt(path: str, body: list, rng: random.Random):
+    lines = ["高硅铁尾矿胶凝材料实验记录（合成）"]
+    for kind, content in body:
+        if kind == "text":
+            lines.extend(content)
+        else:
+            lines.append(content[0])
+            lines.extend(content[1])
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def _write_docx(path: str, body: list, rng: random.Random):
+    """约一半的参数部分写成两列表格，其余写成段落"""
+    import docx
+    document = docx.Document()
+    document.add_heading("高硅铁尾矿胶凝材料实验记录（合成）", level=1)
+    for kind, content in body:
+        if kind == "text":
+            for paragraph in content:
+                document.add_paragraph(paragraph)
+            continue
+        title, lines, cells = content
+        document.add_paragraph(title)
+        if cells and rng.random() < 0.5:
+            table = document.add_table(rows=len(cells), cols=2)
+            for row, (label, value) in zip(table.rows, cells):
+                row.cells[0].text, row.cells[1].text = label, value
+        else:
+            for line in lines:
+                document.add_paragraph(line)
+    document.save(path)
+
+
+def _write_pdf(path: str, body: list, rng: random.Random, line_chars: int = 40):
+    """用PyMuPDF内置的中文字体逐行写入（长段落按line_chars折行，页面写满后换页）"""
+    import fitz
+    lines = ["高硅铁尾矿胶凝材料实验记录（合成）"]
+    for kind, content in body:
+        if kind == "text":
+            for paragraph in content:
+                lines.extend(paragraph[i:i + line_chars] for i in range(0, len(paragraph), line_chars))
+        else:
+            lines.append(content[0])
+            lines.extend(content[1])
+    with fitz.open() as document:
+        page, y = None, 0
+        for line in lines:
+            if page is None or y > 800:
+                page, y = document.new_page(), 50
+            page.insert_text((40, y), line, fontname="china-s", fontsize=10)
+            y += 14
+        document.save(path)
+
+
+SYNTHETIC_WRITERS = {"txt": _write_txt, "docx": _write_docx, "pdf": _write_pdf}
+
+
+def generate_corpus(directory: str, count: int = 100, formats=("txt", "docx", "pdf"), seed: int = 0,
+                    missing_rate: float = 0.1, filler: int = 20, drift: str = "basic") -> List[Dict]:
+    """
+    在directory中生成count篇合成文档（按formats轮流选择格式），标准答案写入ground_truth.jsonl
+    drift："basic"只有冒号/空格/注释的格式变化，"extended"另加单位前空格等提取器尚不支持的写法
+    返回[{"file": 文件名, "format": 格式, "truth": {列名: 取值}}]
+    """
+    os.makedirs(directory, exist_ok=True)
+    rng = random.Random(seed)
+    manifest = []
+    for index in range(count):
+        fmt = formats[index % len(formats)]
+        body, truth = synthetic_document(rng, missing_rate, filler, drift)
+        filename = f"synthetic_{index:06d}.{fmt}"
+        SYNTHETIC_WRITERS[fmt](os.path.join(directory, filename), body, rng)
+        manifest.append({"file": filename, "format": fmt, "truth": truth})
+    with open(os.path.join(directory, "ground_truth.jsonl"), 'w', encoding='utf-8') as f:
+        for entry in manifest:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    return manifest
+
+
+# 准确率基准中的提取方式：名称 -> 由文件路径得到字段字典的函数
+EXTRACTION_MODES = {
+    "stream": lambda path: FIELD_EXTRACTOR.extract_stream(FileProcessor.iter_file(path)),
+    "full": lambda path: FIELD_EXTRACTOR.extract(FileProcessor.read_file(path)),
+    "per_field": lambda path: FIELD_EXTRACTOR.extract_per_field(FileProcessor.read_file(path)),
+    # 单实验文档按实验切分后应只得到一条记录
+    "segmented": lambda path: next(extract_segmented(FileProcessor.iter_file(path), "off"), {}),
+}
+
+
+def _same_value(expected, actual) -> bool:
+    if isinstance(expected, float) and isinstance(actual, (int, float)):
+        return abs(expected - actual) <= 1e-9 * max(1.0, abs(expected))
+    return expected == actual
+
+
+def benchmark_accuracy(directory: str = None, count: int = 60, formats=("txt", "docx", "pdf"),
+                       modes=("stream", "full", "per_field", "segmented"), drift: str = "basic",
+                       min_score: float = 1.0) -> Dict[str, object]:
+    """
+    按读取格式×提取方式统计速度（文档/秒、MB/秒）、单篇内存峰值和各字段的精确率/召回率
+    directory为空时在临时目录中生成count篇合成文档；已有ground_truth.jsonl的目录直接使用
+    任一字段的精确率或召回率低于min_score时，结果中的"regressions"列出这些字段
+    """
+    import tempfile
+    import shutil
+    import tracemalloc
+    cleanup = None
+    if directory is None:
+        directory = cleanup = tempfile.mkdtemp()
+    try:
+        truth_path = os.path.join(directory, "ground_truth.jsonl")
+        if not os.path.exists(truth_path):
+            generate_corpus(directory, count, formats, drift=drift)
+        with open(truth_path, 'r', encoding='utf-8') as f:
+            manifest = [json.loads(line) for line in f if line.strip()]
+
+        results, regressions = {}, []
+        for fmt in formats:
+            entries = [entry for entry in manifest if entry["format"] == fmt]
+            if not entries:
+                continue
+            paths = [os.path.join(directory, entry["file"]) for entry in entries]
+            size = sum(os.path.getsize(path) for path in paths)
+            for mode in modes:
+                extract = EXTRACTION_MODES[mode]
+                start = time.perf_counter()
+                outputs = [extract(path) for path in paths]
+                elapsed = time.perf_counter() - start
+                # 内存单独测量（tracemalloc会显著拖慢速度）
+                peak = 0
+                tracemalloc.start()
+                for path in paths[:20]:
+                    tracemalloc.reset_peak()
+                    extract(path)
+                    peak = max(peak, tracemalloc.get_traced_memory()[1])
+                tracemalloc.stop()
+
+                fields = {}
+                for spec in FIELD_SPECS:
+                    tp = fp = fn = 0
+                    for entry, output in zip(entries, outputs):
+                        expected, actual = entry["truth"].get(spec.column), output.get(spec.column)
+                        if actual is not None and expected is not None and _same_value(expected, actual):
+                            tp += 1
+                            continue
+                        fp += actual is not None
+                        fn += expected is not None
+                    precision = tp / (tp + fp) if tp + fp else 1.0
+                    recall = tp / (tp + fn) if tp + fn else 1.0
+                    fields[spec.column] = {"precision": precision, "recall": recall}
+                    if min(precision, recall) < min_score:
+                        regressions.append(f"{fmt}/{mode}/{spec.column}")
+                key = f"{fmt}/{mode}"
+                results[key] = {
+                    "docs_per_sec": len(paths) / elapsed, "mb_per_sec": size / 1e6 / elapsed,
+                    "peak_mb": peak / 1e6, "fields": fields,
+                    "precision": sum(v["precision"] for v in fields.values()) / len(fields),
+                    "recall": sum(v["recall"] for v in fields.values()) / len(fields),
+                }
+                print(f"{key:16s} {len(paths) / elapsed:8.1f}篇/s {size / 1e6 / elapsed:7.2f}MB/s "
+                      f"内存峰值{peak / 1e6:6.2f}MB  精确率{results[key]['precision']:.3f} "
+                      f"召回率{results[key]['recall']:.3f}")
+        if regressions:
+            shown = ", ".join(regressions[:8]) + ("…" if len(regressions) > 8 else "")
+            print(f"共{len(regressions)}项（格式/提取方式/字段）低于{min_score}：{shown}")
+        else:
+            print("全部字段的精确率和召回率均达标")
+        return {"results": results, "regressions": regressions}
+    finally:
+        if cleanup:
+            shutil.rmtree(cleanup, ignore_errors=True)
+
+
+def benchmark_segmentation(docs: int = 20, experiments: int = 40, seed: int = 0) -> Dict[str, float]:
+    """
+    多实验文档的切分基准：每篇文档开头写一次原料成分（公共段），之后是experiments组"实验N"，
+    统计切分出的记录数是否正确、各字段取值的准确率以及吞吐量
+    """
+    rng = random.Random(seed)
+    shared = FIELD_SPECS[:7]  # 原料化学成分，全篇只写一次
+    texts, truths = [], []
+    for _ in range(docs):
+        base = synthetic_record(rng)
+        lines = ["高硅铁尾矿胶凝材料配合比研究（合成）", "原料化学成分"]
+        lines += [_synthetic_line(spec, base[spec.column], rng, "basic") for spec in shared]
+        expected = []
+        for number in range(1, experiments + 1):
+            record = synthetic_record(rng)
+            record.update({spec.column: base[spec.column] for spec in shared})
+            lines.append(f"实验{number}")
+            lines += [_synthetic_line(spec, record[spec.column], rng, "basic") for spec in FIELD_SPECS[7:]]
+            lines.append("".join(rng.choice(SYNTHETIC_FILLER) + "。" for _ in range(3)))
+            expected.append(record)
+        texts.append("\n".join(lines))
+        truths.append(expected)
+
+    size = sum(len(text.encode('utf-8')) for text in texts)
+    start = time.perf_counter()
+    outputs = [list(extract_segmented([text[i:i + 65536] for i in range(0, len(text), 65536)], "off"))
+               for text in texts]
+    elapsed = time.perf_counter() - start
+    count_ok = sum(len(output) == len(expected) for output, expected in zip(outputs, truths))
+    total = correct = 0
+    for output, expected in zip(outputs, truths):
+        for record, truth in zip(output, expected):
+            for column, value in truth.items():
+                total += 1
+                correct += record.get(column) is not None and _same_value(value, record[column])
+    results = {"docs_per_sec": docs / elapsed, "records_per_sec": docs * experiments / elapsed,
+               "mb_per_sec": size / 1e6 / elapsed, "record_count_ok": count_ok / docs,
+               "field_accuracy": correct / total if total else 0.0}
+    print(f"{docs}篇文档×{experiments}组实验：{results['records_per_sec']:.0f}条/s，{results['mb_per_sec']:.2f}MB/s")
+    print(f"记录数正确的文档占比：{results['record_count_ok']:.3f}，字段准确率：{results['field_accuracy']:.4f}")
+    return results
@@ -12,10 +12,36 @@
 # 第一部分：基础配置区
 # ----------------------
 DATABASE_NAME = "material_data.db"
+CONFIG_PATH = "config.ini"  # 配置文件，其中的设置覆盖本区同名默认值（见CONFIG_KEYS）
 SUPPORTED_EXT = ['.pdf', '.docx', '.txt']  # 支持文件夹批量处理的文件类型
 CRAWL_SEED_URL = "http://example.com/materials"  # 爬虫种子URL
+SPACY_MODEL = "en_core_web_sm"  # NLP模型，仅在注册了NLP规则时才会加载
+NLP_BATCH_SIZE = 16  # 流水线中NLP阶段每批处理的文档数（交给nlp.pipe）
+INGEST_WORKERS = 0  # 批量处理的进程数，0表示使用全部CPU核心，1表示在主进程中逐个处理
+DB_BATCH_SIZE = 500  # 批量写入时每个事务包含的记录数
+DB_FLUSH_INTERVAL = 2.0  # 批量写入的最长缓冲时间（秒）
+DB_BUSY_TIMEOUT = 30.0  # 其他进程正在写入时，写事务最多等待的时间（秒）
+DB_READ_POOL_SIZE = 4  # 只读连接池的连接数上限
+DB_SYNCHRONOUS = "NORMAL"  # 写连接的synchronous设置（OFF/NORMAL/FULL/EXTRA）；WAL模式下NORMAL不会损坏数据库，只是断电时可能丢失最后几个事务
+EXPORT_CHUNK_ROWS = 50_000  # 列式导出/导入时每批处理的行数（parquet中即每个行组的行数）
+CRAWL_CONCURRENCY = 8  # 爬虫最大并发请求数
+CRAWL_RATE_PER_HOST = 5.0  # 同一主机每秒最多请求次数，0表示不限速
+CRAWL_CACHE_DIR = ".crawl_cache"  # 爬虫响应缓存目录
+CRAWL_CACHE_MAX_MB = 200  # 爬虫响应缓存上限（MB），超出后按最近最少使用淘汰
+CRAWL_FRONTIER_DB = ".crawl_frontier.db"  # 链接爬取的待爬队列检查点，中断后可从此恢复
+CRAWL_MAX_DEPTH = 2  # 链接爬取的最大深度（种子页面为0）
+CRAWL_MAX_PAGES = 100  # 单次链接爬取最多请求的页面数
+CRAWL_MAX_ATTEMPTS = 3  # 链接爬取中请求失败的页面最多尝试的次数（跨多次运行累计）
+STARTUP_BUDGET_MS = 150  # 导入本模块的耗时预算（毫秒），用于启动性能回归检查
+PIPELINE_QUEUE_SIZE = 64  # 流水线相邻阶段之间的队列容量，队列满时上游阶段等待（背压）
+PIPELINE_READ_THREADS = 4  # 流水线读取阶段的线程数
+METRICS_PATH = "ingest_metrics.json"  # 菜单中"性能分析"导出的指标文件（.prom后缀导出Prometheus文本格式）
+SPLIT_RECORDS = False  # True时一篇文档含多组实验时按实验拆分为多条记录（见RecordSegmenter），默认整篇文档只取一条
+SEGMENT_WORKERS = 1  # 单篇文档内各实验段并行提取的进程数（流水线中各文件已经并行，默认不再嵌套进程池）
+PDF_TABLE_MODE = "auto"  # PDF表格识别："auto"仅在页面出现表格标题时识别，"always"每页识别，"never"不识别
 #爬虫种子URL为示例，需根据实际网站修改，种子设定好后，可在crawl方法中修改解析规则
 #爬虫的爬取逻辑是从当前种子地址开始，爬取页面所包含的所有连接，然后逐一访问这些连接，提取数据
+#（见crawl_links，待爬队列按深度、域名限制并遵守robots.txt；crawl方法只按?page=N翻页）
 #提取数据的逻辑在_parse_page方法中，需要根据实际网站结构修改
 #删除mytest1.py文件中提取的数据必须包含数据库中所有字段的限制
 # ----------------------
@@ -24,28 +50,144 @@ CRAWL_SEED_URL = "http://example.com/materials"  # 爬虫种子URL
 # 模块一：文件处理器
 # ----------------------
 import os
-import docx
-import fitz  # PyMuPDF
+import re
+import hashlib
+import zipfile
+import xml.etree.ElementTree as ET
+# 第三方依赖（PyMuPDF、python-docx、requests、BeautifulSoup、matplotlib、reportlab、
+# google-auth、spaCy等）都在首次使用时才导入，启动菜单不会加载它们
+
+# 页面中出现"表1"、"Table 2"之类的表格标题时才做表格识别（find_tables开销很大）
+_TABLE_HINT = re.compile(r"表\s*\d|Table\s*\d", re.IGNORECASE)
+
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+
+def _iter_docx_lines(xml):
+    """
+    增量解析document.xml，按文档顺序产出段落文本和表格行文本
+    已处理的元素立即清空，内存占用与文档长度无关
+    """
+    paragraphs = []  # 段落栈（文本框中的段落会嵌套在段落内）
+    tables = []      # 表格栈：每层为[当前行的单元格列表, 当前单元格的段落列表]
+    parents = []
+    for event, elem in ET.iterparse(xml, events=("start", "end")):
+        tag = elem.tag
+        if event == "start":
+            if tag == _W + "p":
+                paragraphs.append([])
+            elif tag == _W + "tbl":
+                tables.append([[], []])
+            parents.append(elem)
+            continue
+
+        parents.pop()
+        if tag == _W + "t":
+            if paragraphs and elem.text:
+                paragraphs[-1].append(elem.text)
+        elif tag == _W + "tab":
+            if paragraphs:
+                paragraphs[-1].append("\t")
+        elif tag in (_W + "br", _W + "cr"):
+            if paragraphs:
+                paragraphs[-1].append("\n")
+        elif tag == _W + "p":
+            text = "".join(paragraphs.pop())
+            if tables and not paragraphs:
+                tables[-1][1].append(text)
+            elif text:
+                yield text
+        elif tag == _W + "tc":
+            if tables:
+                row, cell = tables[-1]
+                row.append(" ".join(part for part in cell if part))
+                tables[-1][1] = []
+        elif tag == _W + "tr":
+            if tables:
+                row = tables[-1][0]
+                tables[-1][0] = []
+                line = f"{row[0]}：{row[1]}" if len(row) == 2 and row[0] and row[1] else "\t".join(row)
+                if len(tables) > 1:
+                    tables[-2][1].append(line)  # 嵌套表格的行并入外层单元格
+                elif line.strip():
+                    yield line
+        elif tag == _W + "tbl":
+            tables.pop()
+        else:
+            continue
+        if tag in (_W + "p", _W + "tbl"):
+            elem.clear()
+            if parents:
+                parents[-1].remove(elem)
+
 
 class FileProcessor:
     @staticmethod
-    def read_pdf(filepath: str) -> str:
-        """读取PDF文件（包含表格解析）"""
-        text = ""
+    def iter_pdf(filepath: str, tables: str = None):
+        """
+        逐页读取PDF文件，每次产出一页文本（包含表格解析）
+        tables：表格识别模式，默认取PDF_TABLE_MODE
+        """
+        import fitz  # PyMuPDF
+        tables = tables or PDF_TABLE_MODE
         try:
-            with fitz.open(filepath) as doc:
+            with metric_timer("pdf_open"):
+                doc = fitz.open(filepath)
+            with doc:
                 for page in doc:
-                    text += page.get_text()
-                    # 提取表格（示例）
-                    for table in page.find_tables():
-                        text += "\n表格数据：" + str(table.extract())
+                    with metric_timer("pdf_text"):
+                        text = page.get_text()
+                    add_metric("pages")
+                    if tables == "always" or (tables == "auto" and _TABLE_HINT.search(text)):
+                        with metric_timer("find_tables"):
+                            parts = [text]
+                            for table in page.find_tables():
+                                parts.append("\n表格数据：" + str(table.extract()))
+                        text = "".join(parts)
+                    yield text
         except Exception as e:
             print(f"PDF读取错误：{str(e)}")
-        return text
+
+    @staticmethod
+    def read_pdf(filepath: str, tables: str = None) -> str:
+        """读取PDF文件（包含表格解析）"""
+        return "".join(FileProcessor.iter_pdf(filepath, tables))
+
+    @staticmethod
+    def iter_docx(filepath: str, block_size: int = 1 << 16):
+        """
+        流式读取DOCX文件：直接从压缩包中增量解析word/document.xml，
+        按文档顺序产出段落和表格文本（每块约block_size个字符）
+        表格每行输出一行，单元格之间用制表符分隔；两列的行按"键：值"输出，便于提取参数
+        """
+        try:
+            with zipfile.ZipFile(filepath) as archive, archive.open('word/document.xml') as xml:
+                lines, size = [], 0
+                start = time.perf_counter()
+                for line in _iter_docx_lines(xml):
+                    lines.append(line)
+                    size += len(line) + 1
+                    if size >= block_size:
+                        add_metric_time("docx_parse", time.perf_counter() - start)
+                        yield "\n".join(lines) + "\n"
+                        lines, size = [], 0
+                        start = time.perf_counter()
+                add_metric_time("docx_parse", time.perf_counter() - start)
+                if lines:
+                    yield "\n".join(lines)
+        except Exception as e:
+            print(f"DOCX读取错误：{str(e)}")
 
     @staticmethod
     def read_docx(filepath: str) -> str:
-        """读取DOCX文件"""
+        """读取DOCX文件（包含表格）"""
+        return "".join(FileProcessor.iter_docx(filepath))
+
+    @staticmethod
+    def read_docx_object(filepath: str) -> str:
+        """用python-docx对象树读取DOCX文件（只含段落，保留作对照）"""
+        import docx
         try:
             doc = docx.Document(filepath)
             return "\n".join([para.text for para in doc.paragraphs])
@@ -63,23 +205,425 @@ class FileProcessor:
             print(f"TXT读取错误：{str(e)}")
             return ""
 
+    @staticmethod
+    def file_hash(filepath: str) -> str:
+        """计算文件内容哈希（分块读取，用于增量处理）"""
+        digest = hashlib.blake2b(digest_size=20)
+        with open(filepath, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    @staticmethod
+    def iter_txt(filepath: str, block_size: int = 1 << 20):
+        """分块读取TXT文件"""
+        try:
+            with open(filepath, 'r', encoding='utf-8') as f:
+                for block in iter(lambda: f.read(block_size), ''):
+                    yield block
+        except Exception as e:
+            print(f"TXT读取错误：{str(e)}")
+
+    @staticmethod
+    def iter_file(filepath: str):
+        """根据扩展名选择流式读取方式，逐块产出文本"""
+        ext = os.path.splitext(filepath)[1].lower()
+        if ext == '.pdf':
+            return FileProcessor.iter_pdf(filepath)
+        elif ext == '.docx':
+            return FileProcessor.iter_docx(filepath)
+        else:
+            return FileProcessor.iter_txt(filepath)
+
+    @staticmethod
+    def read_file(filepath: str) -> str:
+        """根据扩展名选择读取方式"""
+        ext = os.path.splitext(filepath)[1].lower()
+        if ext == '.pdf':
+            return FileProcessor.read_pdf(filepath)
+        elif ext == '.docx':
+            return FileProcessor.read_docx(filepath)
+        else:
+            return FileProcessor.read_txt(filepath)
+
 # ----------------------
 # 模块二：网络爬虫
 # ----------------------
-import requests
-from bs4 import BeautifulSoup
+import asyncio
+import random
+import sqlite3
+import threading
+import time
+import zlib
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional
+import heapq
+import math
+from urllib.parse import urljoin, urldefrag, urlsplit
+
+class ResponseCache:
+    """
+    爬虫响应磁盘缓存：保存ETag/Last-Modified用于条件请求，
+    页面正文压缩后存放在缓存目录，总大小超过上限时淘汰最久未访问的页面
+    """
+
+    def __init__(self, directory: str = CRAWL_CACHE_DIR, max_bytes: int = CRAWL_CACHE_MAX_MB * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(os.path.join(directory, 'index.db'), check_same_thread=False)
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,       -- 页面URL
+                etag TEXT,                  -- ETag响应头
+                last_modified TEXT,         -- Last-Modified响应头
+                body_hash TEXT,             -- 正文哈希
+                size INTEGER,               -- 压缩后大小（字节）
+                last_access REAL,           -- 最近访问时间
+                links TEXT                  -- 页面中的链接（换行分隔，NULL表示尚未解析）
+            )
+        ''')
+        # 旧版缓存没有links列，自动补上
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(responses)")}
+        if "links" not in columns:
+            self.conn.execute("ALTER TABLE responses ADD COLUMN links TEXT")
+        self.conn.commit()
+
+    def _body_path(self, url: str) -> str:
+        return os.path.join(self.directory, hashlib.sha1(url.encode('utf-8')).hexdigest() + '.z')
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """生成条件请求头（If-None-Match / If-Modified-Since）"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT etag, last_modified FROM responses WHERE url = ?", (url,)).fetchone()
+        headers = {}
+        if row and row[0]:
+            headers['If-None-Match'] = row[0]
+        if row and row[1]:
+            headers['If-Modified-Since'] = row[1]
+        return headers
+
+    def touch(self, url: str):
+        """更新最近访问时间"""
+        with self._lock, self.conn:
+            self.conn.execute("UPDATE responses SET last_access = ? WHERE url = ?", (time.time(), url))
+
+    def store(self, url: str, headers, body: bytes) -> bool:
+        """保存响应，返回正文是否有变化"""
+        body_hash = hashlib.blake2b(body, digest_size=20).hexdigest()
+        with self._lock:
+            row = self.conn.execute("SELECT body_hash FROM responses WHERE url = ?", (url,)).fetchone()
+            changed = not row or row[0] != body_hash
+            size = None
+            if changed:
+                data = zlib.compress(body, 6)
+                with open(self._body_path(url), 'wb') as f:
+                    f.write(data)
+                size = len(data)
+            with self.conn:
+                self.conn.execute('''
+                    INSERT INTO responses (url, etag, last_modified, body_hash, size, last_access)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(url) DO UPDATE SET
+                        etag = excluded.etag, last_modified = excluded.last_modified,
+                        body_hash = excluded.body_hash, size = COALESCE(excluded.size, size),
+                        last_access = excluded.last_access,
+                        links = CASE WHEN body_hash = excluded.body_hash THEN links END
+                ''', (url, headers.get('ETag'), headers.get('Last-Modified'), body_hash, size, time.time()))
+            if changed:
+                self._evict()
+        return changed
+
+    def get_links(self, url: str) -> Optional[List[str]]:
+        """页面上次解析出的链接（正文变化后或从未解析过时为None）"""
+        with self._lock:
+            row = self.conn.execute("SELECT links FROM responses WHERE url = ?", (url,)).fetchone()
+        if not row or row[0] is None:
+            return None
+        return row[0].split("\n") if row[0] else []
+
+    def set_links(self, url: str, links: List[str]):
+        """保存页面解析出的链接，页面未变化时直接复用，不必重新解析"""
+        with self._lock, self.conn:
+            self.conn.execute("UPDATE responses SET links = ? WHERE url = ?", ("\n".join(links), url))
+
+    def get_body(self, url: str) -> Optional[str]:
+        """读取缓存的页面正文"""
+        try:
+            with open(self._body_path(url), 'rb') as f:
+                return zlib.decompress(f.read()).decode('utf-8', errors='replace')
+        except (OSError, zlib.error):
+            return None
+
+    def _evict(self):
+        """总大小超过上限时，按最近最少使用淘汰（调用方持有锁）"""
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        removed = []
+        for url, size in self.conn.execute("SELECT url, size FROM responses ORDER BY last_access"):
+            if total <= self.max_bytes:
+                break
+            removed.append((url,))
+            total -= size or 0
+        for (url,) in removed:
+            try:
+                os.remove(self._body_path(url))
+            except OSError:
+                pass
+        with self.conn:
+            self.conn.executemany("DELETE FROM responses WHERE url = ?", removed)
+
+    def close(self):
+        self.conn.close()
+
+
+class BloomFilter:
+    """布隆过滤器：用很少的内存判断URL是否"可能见过"（不存在漏判，存在少量误判）"""
+
+    def __init__(self, capacity: int = 1_000_000, error_rate: float = 0.01, bits: bytes = None):
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray(bits) if bits else bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[p >> 3] & (1 << (p & 7)) for p in self._positions(key))
+
+    def add(self, key: str):
+        for p in self._positions(key):
+            self.bits[p >> 3] |= 1 << (p & 7)
+
+
+class CrawlFrontier:
+    """
+    链接爬取的待爬队列：
+    - 内存中用小顶堆保存优先级最高的一部分URL，其余溢出到sqlite，内存占用有上限
+    - 去重先查布隆过滤器，可能重复时再到sqlite确认，百万级URL下依然很快
+    - 按深度、域名过滤，定期把队列和过滤器写入检查点，中断后可恢复
+    - 请求成功的页面先标记为已请求，其数据存储成功后才标记为已完成；请求失败的页面重新排队
+      （下次运行时再请求，请求本身已按指数退避重试过），累计失败max_attempts次后标记为失败
+    状态：0=在磁盘中等待，1=已载入内存堆，2=已完成，3=已请求（数据尚未存储），4=失败
+    """
+
+    def __init__(self, path: str = CRAWL_FRONTIER_DB, max_depth: int = CRAWL_MAX_DEPTH,
+                 allowed_domains=None, memory_limit: int = 10000, checkpoint_every: int = 200,
+                 capacity: int = 1_000_000, max_attempts: int = CRAWL_MAX_ATTEMPTS):
+        self.max_depth = max_depth
+        self.allowed_domains = [d.lower() for d in (allowed_domains or []) if d]
+        self.memory_limit = memory_limit
+        self.checkpoint_every = checkpoint_every
+        self.max_attempts = max(1, max_attempts)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS frontier (
+                url TEXT PRIMARY KEY,   -- 页面URL
+                depth INTEGER,          -- 距种子页面的深度
+                priority REAL,          -- 优先级（越小越先爬）
+                state INTEGER,          -- 0=等待，1=已载入内存，2=已完成，3=已请求，4=失败
+                attempts INTEGER DEFAULT 0,  -- 请求失败次数
+                reparse INTEGER DEFAULT 0    -- 为1时即使页面未变化也重新解析（上次的数据没有存储成功）
+            )
+        ''')
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(frontier)")}
+        for column in ("attempts", "reparse"):
+            if column not in columns:  # 旧版本的检查点
+                self.conn.execute(f"ALTER TABLE frontier ADD COLUMN {column} INTEGER DEFAULT 0")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_frontier_state ON frontier(state, priority)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS frontier_meta (key TEXT PRIMARY KEY, value BLOB)")
+        # 恢复：上次载入内存但未完成的URL重新排队；已请求但数据未存储的页面重新请求并解析
+        self.conn.execute("UPDATE frontier SET reparse = 1 WHERE state = 3")
+        self.conn.execute("UPDATE frontier SET state = 0 WHERE state IN (1, 3)")
+        self.reparse = {url for (url,) in self.conn.execute("SELECT url FROM frontier WHERE reparse = 1")}
+        row = self.conn.execute("SELECT value FROM frontier_meta WHERE key = 'bloom'").fetchone()
+        self.capacity = capacity
+        self.seen = BloomFilter(capacity)
+        if row is not None and len(row[0]) == len(self.seen.bits):
+            self.seen = BloomFilter(capacity, bits=row[0])
+        else:
+            # 没有保存过滤器（或容量参数已改变）时从sqlite重建
+            for (url,) in self.conn.execute("SELECT url FROM frontier"):
+                self.seen.add(url)
+        self.conn.commit()
+        self._heap = []
+        self._seq = 0
+        self._pending_ops = 0
+        self._deferred = set()  # 本次运行中请求失败、留到下次运行再请求的URL
+
+    def _priority(self, url: str, depth: int) -> float:
+        """计算优先级（默认广度优先，可按需要重写，例如优先爬取含关键词的链接）"""
+        return depth
+
+    def _domain_allowed(self, url: str) -> bool:
+        if not self.allowed_domains:
+            return True
+        host = (urlsplit(url).hostname or '').lower()
+        return any(host == d or host.endswith('.' + d) for d in self.allowed_domains)
+
+    def add(self, url: str, depth: int) -> bool:
+        """加入待爬队列，超出深度、域名不符或已见过时返回False"""
+        if depth > self.max_depth or not self._domain_allowed(url):
+            return False
+        if url in self.seen and self.conn.execute(
+                "SELECT 1 FROM frontier WHERE url = ?", (url,)).fetchone():
+            return False
+        self.seen.add(url)
+        priority = self._priority(url, depth)
+        in_memory = len(self._heap) < self.memory_limit
+        self.conn.execute("INSERT OR IGNORE INTO frontier (url, depth, priority, state) VALUES (?, ?, ?, ?)",
+                          (url, depth, priority, 1 if in_memory else 0))
+        if in_memory:
+            self._push(priority, url, depth)
+        self._tick()
+        return True
+
+    def _push(self, priority: float, url: str, depth: int):
+        self._seq += 1
+        heapq.heappush(self._heap, (priority, self._seq, url, depth))
+
+    def _refill(self):
+        """内存堆为空时，从sqlite中载入一批优先级最高的URL"""
+        rows = self.conn.execute(
+            "SELECT url, depth, priority FROM frontier WHERE state = 0 ORDER BY priority LIMIT ?",
+            (self.memory_limit + len(self._deferred),)).fetchall()
+        rows = [row for row in rows if row[0] not in self._deferred][:self.memory_limit]
+        self.conn.executemany("UPDATE frontier SET state = 1 WHERE url = ?", [(r[0],) for r in rows])
+        for url, depth, priority in rows:
+            self._push(priority, url, depth)
+
+    def pop(self) -> Optional[tuple]:
+        """取出优先级最高的URL，返回(url, 深度)，队列为空时返回None"""
+        if not self._heap:
+            self._refill()
+        if not self._heap:
+            return None
+        _, _, url, depth = heapq.heappop(self._heap)
+        return url, depth
+
+    def fetched(self, url: str):
+        """标记页面已请求、数据等待存储（中断后恢复时重新请求并解析）"""
+        self.conn.execute("UPDATE frontier SET state = 3 WHERE url = ?", (url,))
+        self._tick()
+
+    def done(self, url: str):
+        """标记页面已完成（页面的数据已存储）"""
+        self.conn.execute("UPDATE frontier SET state = 2, reparse = 0 WHERE url = ?", (url,))
+        self.reparse.discard(url)
+        self._tick()
+
+    def failed(self, url: str) -> bool:
+        """记录一次请求失败：未达到max_attempts次时重新排队（下次运行时再请求）并返回True，否则标记为失败"""
+        attempts = self.conn.execute("SELECT attempts FROM frontier WHERE url = ?", (url,)).fetchone()
+        attempts = (attempts[0] or 0) + 1 if attempts else self.max_attempts
+        retry = attempts < self.max_attempts
+        self.conn.execute("UPDATE frontier SET state = ?, attempts = ? WHERE url = ?",
+                          (0 if retry else 4, attempts, url))
+        if retry:
+            self._deferred.add(url)
+        self._tick()
+        return retry
+
+    @staticmethod
+    def mark_done(path: str, urls: List[str]):
+        """爬取结束（检查点已关闭）之后，把数据已存储的页面标记为已完成"""
+        conn = sqlite3.connect(path)
+        try:
+            with conn:
+                conn.executemany("UPDATE frontier SET state = 2, reparse = 0 WHERE url = ?",
+                                 [(url,) for url in urls])
+        finally:
+            conn.close()
+
+    def _tick(self):
+        self._pending_ops += 1
+        if self._pending_ops >= self.checkpoint_every:
+            self.checkpoint()
+
+    def checkpoint(self):
+        """提交队列变更并保存布隆过滤器"""
+        self.conn.execute("INSERT OR REPLACE INTO frontier_meta (key, value) VALUES ('bloom', ?)",
+                          (bytes(self.seen.bits),))
+        self.conn.commit()
+        self._pending_ops = 0
+
+    def finished(self) -> bool:
+        """队列中有记录且全部已完成（或已失败）"""
+        row = self.conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(state NOT IN (2, 4)), 0) FROM frontier").fetchone()
+        return row[0] > 0 and row[1] == 0
+
+    def reset(self):
+        """清空队列和去重记录，重新开始"""
+        self.conn.execute("DELETE FROM frontier")
+        self.conn.execute("DELETE FROM frontier_meta")
+        self.conn.commit()
+        self.seen = BloomFilter(self.capacity)
+        self._heap = []
+        self.reparse = set()
+
+    def close(self):
+        self.checkpoint()
+        self.conn.close()
+
 
 class MaterialCrawler:
-    def __init__(self, base_url: str):
+    """
+    基于asyncio的并发爬虫：
+    并发数由concurrency限制，同一主机按rate_per_host限速，失败请求按指数退避重试，
+    HTTP连接通过requests连接池复用（阻塞请求放在线程池中执行，不占用事件循环）
+    指定cache后发送条件请求，返回304或正文哈希未变的页面默认不再解析（skip_unchanged）
+    """
+    RETRY_STATUS = {429, 500, 502, 503, 504}  # 需要重试的状态码
+
+    def __init__(self, base_url: str, concurrency: int = CRAWL_CONCURRENCY,
+                 rate_per_host: float = CRAWL_RATE_PER_HOST, retries: int = 3,
+                 backoff: float = 0.5, timeout: float = 10,
+                 cache: ResponseCache = None, skip_unchanged: bool = True):
         self.base_url = base_url
+        self.cache = cache
+        self.skip_unchanged = skip_unchanged
+        self.unchanged_pages = 0  # 未变化而跳过的页面数
+        self.fetched_pages = 0    # 请求成功的页面数（含未变化的页面）
+        self.failed_pages = 0     # 重试后仍请求失败的页面数
+        self.concurrency = max(1, concurrency)
+        self.rate_per_host = rate_per_host
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        import requests
+        from requests.adapters import HTTPAdapter
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         })
+        # 连接池大小与并发数一致，避免连接被反复创建
+        adapter = HTTPAdapter(pool_connections=self.concurrency, pool_maxsize=self.concurrency)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._host_locks = {}
+        self._host_next = {}
+        self._host_delay = {}  # robots.txt中的Crawl-delay
+        self._robots = {}      # 主机 -> RobotFileParser（None表示不限制）
+        self._ack_lock = threading.Lock()
+        self._unacked = {}     # 页面URL -> 尚未确认存储的数据条数
+        self._acked = []       # 数据已全部确认存储、等待在待爬队列中标记完成的页面
+        self._checkpoint_path = None
+
+    @staticmethod
+    def _soup(html: str):
+        """解析HTML（每个页面只解析一次，数据提取和链接提取共用）"""
+        from bs4 import BeautifulSoup
+        return BeautifulSoup(html, 'html.parser')
 
-    def _parse_page(self, html: str) -> list:
-        """解析网页内容（需根据实际网站结构修改）"""
-        soup = BeautifulSoup(html, 'html.parser')
+    def _parse_page(self, soup) -> list:
+        """从解析好的网页（BeautifulSoup对象）中提取数据（需根据实际网站结构修改）"""
         results = []
         for item in soup.select('.material-item'):
             data = {
@@ -89,60 +633,311 @@ class MaterialCrawler:
             results.append(data)
         return results
 
+    def _extract_links(self, soup, page_url: str) -> list:
+        """提取页面中的http(s)链接（转为绝对地址并去掉#锚点）"""
+        links = []
+        for anchor in soup.find_all('a', href=True):
+            url = urldefrag(urljoin(page_url, anchor['href'].strip()))[0]
+            if url.startswith(('http://', 'https://')):
+                links.append(url)
+        return links
+
+    async def _throttle(self, host: str):
+        """按主机限速：同一主机两次请求之间至少间隔1/rate_per_host秒（robots.txt的Crawl-delay优先）"""
+        interval = max(1 / self.rate_per_host if self.rate_per_host else 0, self._host_delay.get(host, 0))
+        if not interval:
+            return
+        lock = self._host_locks.setdefault(host, asyncio.Lock())
+        async with lock:
+            loop = asyncio.get_running_loop()
+            wait = self._host_next.get(host, 0) - loop.time()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self._host_next[host] = loop.time() + interval
+
+    def _get(self, url: str) -> tuple:
+        """
+        在线程池中执行的阻塞请求（含缓存读写），返回(状态码, 页面内容)
+        页面未变化（304或正文哈希相同）时状态码统一为304，内容取自缓存
+        """
+        headers = self.cache.conditional_headers(url) if self.cache else {}
+        response = self.session.get(url, timeout=self.timeout, headers=headers)
+        if self.cache and response.status_code == 304:
+            self.cache.touch(url)
+            return 304, self.cache.get_body(url)
+        if self.cache and response.status_code == 200:
+            if not self.cache.store(url, response.headers, response.content):
+                return 304, response.text
+        return response.status_code, response.text
+
+    async def _fetch(self, url: str, executor) -> tuple:
+        """
+        请求页面，网络错误及429/5xx按指数退避重试
+        返回(页面内容, 是否有变化)，请求失败时页面内容为None
+        """
+        import requests
+        loop = asyncio.get_running_loop()
+        host = urlsplit(url).netloc
+        for attempt in range(self.retries + 1):
+            await self._throttle(host)
+            try:
+                status, text = await loop.run_in_executor(executor, self._get, url)
+                if status == 200:
+                    self.fetched_pages += 1
+                    return text, True
+                if status == 304:
+                    self.fetched_pages += 1
+                    self.unchanged_pages += 1
+                    return text, False
+                if status not in self.RETRY_STATUS or attempt == self.retries:
+                    print(f"请求失败：{url}")
+                    break
+            except requests.RequestException as e:
+                if attempt == self.retries:
+                    print(f"爬虫错误：{str(e)}")
+                    break
+            await asyncio.sleep(self.backoff * (2 ** attempt) * (1 + random.random()))
+        self.failed_pages += 1
+        return None, False
+
+    def _safe_parse(self, html: Optional[str], changed: bool, soup=None) -> list:
+        """解析页面数据，未变化的页面在skip_unchanged时直接跳过；soup为已解析好的页面"""
+        if html is None or (not changed and self.skip_unchanged):
+            return []
+        try:
+            return self._parse_page(soup if soup is not None else self._soup(html))
+        except Exception as e:
+            print(f"爬虫错误：{str(e)}")
+            return []
+
+    async def _crawl_url(self, url: str, semaphore, executor) -> list:
+        """在并发限制内请求并解析一个页面"""
+        async with semaphore:
+            html, changed = await self._fetch(url, executor)
+        return self._safe_parse(html, changed)
+
+    async def acrawl(self, max_pages=3):
+        """异步执行爬虫任务，按页面完成顺序逐条产出结果"""
+        semaphore = asyncio.Semaphore(self.concurrency)
+        urls = [f"{self.base_url}?page={page}" for page in range(1, max_pages+1)]
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            tasks = [asyncio.ensure_future(self._crawl_url(url, semaphore, executor)) for url in urls]
+            try:
+                for future in asyncio.as_completed(tasks):
+                    for item in await future:
+                        yield item
+            finally:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+
     def crawl(self, max_pages=3):
-        """执行爬虫任务"""
-        for page in range(1, max_pages+1):
-            url = f"{self.base_url}?page={page}"
+        """执行爬虫任务（同步生成器，内部驱动异步爬虫）"""
+        return self._run_async_gen(self.acrawl(max_pages))
+
+    async def _allowed(self, url: str, executor) -> bool:
+        """检查robots.txt是否允许抓取（每个主机只请求一次robots.txt）"""
+        import requests
+        from urllib.robotparser import RobotFileParser
+        parts = urlsplit(url)
+        host = parts.netloc
+        if host not in self._robots:
+            robots_url = f"{parts.scheme}://{host}/robots.txt"
+            parser = None
             try:
-                response = self.session.get(url, timeout=10)
+                await self._throttle(host)
+                response = await asyncio.get_running_loop().run_in_executor(
+                    executor, lambda: self.session.get(robots_url, timeout=self.timeout))
                 if response.status_code == 200:
-                    yield from self._parse_page(response.text)
-                else:
-                    print(f"请求失败：{url}")
-            except Exception as e:
-                print(f"爬虫错误：{str(e)}")
+                    parser = RobotFileParser(robots_url)
+                    parser.parse(response.text.splitlines())
+                    delay = parser.crawl_delay(self.session.headers['User-Agent'])
+                    if delay:
+                        self._host_delay[host] = float(delay)
+            except requests.RequestException:
+                parser = None  # robots.txt无法获取时视为不限制
+            self._robots[host] = parser
+        parser = self._robots[host]
+        return parser is None or parser.can_fetch(self.session.headers['User-Agent'], url)
+
+    async def _crawl_node(self, url: str, depth: int, executor, reparse: bool = False) -> tuple:
+        """
+        请求一个待爬页面，返回(url, 深度, 数据列表, 链接列表)，请求失败时数据列表为None
+        页面只解析一次；未变化的页面直接使用缓存中保存的链接，不再解析（reparse为True时照常解析）
+        """
+        html, changed = await self._fetch(url, executor)
+        if html is None:
+            return url, depth, None, []
+        changed = changed or reparse
+        if not changed and self.skip_unchanged and self.cache:
+            links = self.cache.get_links(url)
+            if links is not None:
+                return url, depth, [], links
+        try:
+            soup = self._soup(html)
+            links = self._extract_links(soup, url)
+        except Exception as e:
+            print(f"爬虫错误：{str(e)}")
+            return url, depth, [], []
+        if self.cache:
+            self.cache.set_links(url, links)
+        return url, depth, self._safe_parse(html, changed, soup), links
+
+    def ack(self, url: str):
+        """
+        确认页面的一条数据已存储（acknowledge模式下由调用方在写入数据库之后调用，可在其他线程中调用）
+        页面的数据全部确认后才会在待爬队列中标记为已完成
+        """
+        with self._ack_lock:
+            remaining = self._unacked.get(url)
+            if remaining is None:
+                return
+            if remaining > 1:
+                self._unacked[url] = remaining - 1
+                return
+            del self._unacked[url]
+            self._acked.append(url)
+
+    def _drain_acks(self, frontier: "CrawlFrontier"):
+        with self._ack_lock:
+            urls, self._acked = self._acked, []
+        for url in urls:
+            frontier.done(url)
+
+    def flush_acks(self):
+        """爬取结束后，把之后才确认存储的页面写入待爬队列检查点"""
+        with self._ack_lock:
+            urls, self._acked = self._acked, []
+        if urls and self._checkpoint_path:
+            CrawlFrontier.mark_done(self._checkpoint_path, urls)
+
+    async def acrawl_links(self, frontier: "CrawlFrontier", max_pages: int = CRAWL_MAX_PAGES,
+                           acknowledge: bool = False):
+        """
+        从待爬队列出发异步爬取：每个页面提取数据并把页面内链接加入队列，产出的数据带有页面地址"url"
+        队列中的深度、域名限制和去重由CrawlFrontier负责
+        有数据的页面先标记为已请求：acknowledge为True时等调用方对每条数据调用ack(url)后才标记为已完成，
+        否则在调用方取走该页面全部数据之后标记；请求失败的页面重新排队
+        """
+        in_flight = set()
+        requested = 0
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            try:
+                while True:
+                    self._drain_acks(frontier)
+                    while len(in_flight) < self.concurrency and requested < max_pages:
+                        entry = frontier.pop()
+                        if entry is None:
+                            break
+                        url, depth = entry
+                        if not await self._allowed(url, executor):
+                            frontier.done(url)
+                            continue
+                        in_flight.add(asyncio.ensure_future(
+                            self._crawl_node(url, depth, executor, url in frontier.reparse)))
+                        requested += 1
+                    if not in_flight:
+                        break
+                    finished, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                    for task in finished:
+                        url, depth, items, links = task.result()
+                        if items is None:
+                            frontier.failed(url)
+                            continue
+                        for link in links:
+                            frontier.add(link, depth + 1)
+                        if not items:
+                            frontier.done(url)
+                            continue
+                        frontier.fetched(url)
+                        if acknowledge:
+                            with self._ack_lock:
+                                self._unacked[url] = len(items)
+                        for item in items:
+                            item.setdefault("url", url)
+                            yield item
+                        if not acknowledge:
+                            frontier.done(url)
+            finally:
+                for task in in_flight:
+                    task.cancel()
+                await asyncio.gather(*in_flight, return_exceptions=True)
+                self._drain_acks(frontier)
+                frontier.checkpoint()
+
+    def crawl_links(self, max_depth: int = CRAWL_MAX_DEPTH, max_pages: int = CRAWL_MAX_PAGES,
+                    checkpoint_path: str = CRAWL_FRONTIER_DB, allowed_domains=None,
+                    acknowledge: bool = False):
+        """
+        从种子地址开始跟随链接爬取（同步生成器）
+        checkpoint_path中保存待爬队列，中断后再次调用会从断点继续，已完成的页面不会重新请求；
+        上一次爬取已全部完成时重新开始
+        acknowledge为True时由调用方在数据存储之后调用ack(url)确认，结束后再调用flush_acks()，
+        数据未确认的页面在下次运行时重新请求
+        """
+        frontier = CrawlFrontier(checkpoint_path, max_depth=max_depth,
+                                 allowed_domains=allowed_domains or [urlsplit(self.base_url).hostname])
+        if frontier.finished():
+            frontier.reset()
+        frontier.add(self.base_url, 0)
+        self._checkpoint_path = checkpoint_path
+        try:
+            yield from self._run_async_gen(self.acrawl_links(frontier, max_pages, acknowledge))
+        finally:
+            frontier.close()
+
+    @staticmethod
+    def _run_async_gen(agen):
+        """在独立事件循环中逐条驱动异步生成器，对外表现为同步生成器"""
+        loop = asyncio.new_event_loop()
+        try:
+            while True:
+                try:
+                    item = loop.run_until_complete(agen.__anext__())
+                except StopAsyncIteration:
+                    break
+                yield item
+        finally:
+            loop.run_until_complete(agen.aclose())
+            loop.close()
+
 
 # ----------------------
 # 模块三：数据库
 # ----------------------
-import sqlite3
-import re
-import spacy
-from typing import Dict, Optional
-from tqdm import tqdm
-import matplotlib.pyplot as plt
-from reportlab.pdfgen import canvas
-import smtplib
+import functools
+import collections
+import contextlib
+import queue
+from concurrent.futures.process import BrokenProcessPool
 import os.path
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
-from email.mime.text import MIMEText
-
-
-def show_strength_analysis():
-    # 从数据库读取强度数据并绘制图表
-    conn = sqlite3.connect(DATABASE_NAME)
-    cursor = conn.cursor()
-    cursor.execute("SELECT compressive_strength_28d FROM materials")
-    data = cursor.fetchall()
-    conn.close()
+
+
+def show_strength_analysis(output_dir: str = None):
+    # 从数据库读取强度数据并绘制图表（分块统计，不把整列读入内存）
+    # 指定output_dir时不弹出窗口，把直方图、相关性图和分组统计写入该目录
+    with MaterialStore() as store, store.reader() as conn:
+        analyzer = StrengthAnalyzer(conn)
+        if output_dir:
+            analyzer.render_all(output_dir)
+            return
+        counts, edges = analyzer.histogram("compressive_strength_28d", bins=20)
     
-    strengths = [row[0] for row in data if row[0] is not None]
-    plt.hist(strengths, bins=20)
+    import matplotlib.pyplot as plt
+    plt.stairs(counts, edges, fill=True)
     plt.title("28天抗压强度分布")
     plt.xlabel("抗压强度（MPa）")
     plt.ylabel("频数")
     plt.show()
 
-def generate_report():
-    # 生成PDF格式的实验报告
-    c = canvas.Canvas("report.pdf")
-    c.drawString(100, 750, "实验报告")
-    c.save()
+def generate_report(path: str = "report.pdf") -> str:
+    # 生成PDF格式的实验报告（汇总表、图表、全部数据明细，见ReportGenerator）
+    with MaterialStore() as store, store.reader() as conn:
+        return ReportGenerator(conn).generate(path)
 
 def send_alert(email):
     # 发送处理完成通知
+    import smtplib
     server = smtplib.SMTP('smtp.example.com', 587)
     server.starttls()
     server.login("your_email@example.com", "your_password")
@@ -150,176 +945,472 @@ def send_alert(email):
     server.sendmail("your_email@example.com", email, message)
     server.quit()
 
-class MaterialDataProcessor:
-    def __init__(self):
-        int_1 = False  #当发生错误1时,改为Ture;当错误1解决后,改回False
-        
-        # 初始化数据库连接
-        self.conn = sqlite3.connect(DATABASE_NAME)
-        
-        # 检查是否需要更新数据库表结构
-        if int_1:
-            self._update_table()         
-        
-        self._create_table()
-        
-        # 加载NLP模型（首次使用需先运行：python -m spacy download en_core_web_sm）
-        #已运行过，不需要再次运行
-        self.nlp = spacy.load("en_core_web_sm")
 
-    # ----------------------
-    # 第二部分：网络爬虫
-    # ----------------------
-    def _create_table(self):
-        """创建数据库表结构（字段需要时扩展）"""
-        cursor = self.conn.cursor()
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS materials (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,      -- 主键ID，自动递增
-                author TEXT,                               -- 作者
-                title TEXT,                                -- 标题
-                year INTEGER,                              -- 发表年份 
-                -- 高硅铁尾矿原料特性（可添加更多字段）
-                SiO2_content REAL,        -- SiO2含量（%）
-                Al2O3_content REAL,       -- Al2O3含量（%）
-                CaO_content REAL,         -- CaO含量（%）
-                Fe2O3_content REAL,       -- Fe2O3含量（%）
-                MgO_content REAL,         -- MgO含量（%）
-                MnO_content REAL,         -- MnO含量（%）
-                TiO2_content REAL,        -- TiO2含量（%）
-                -- 高硅铁尾矿物化性质（可添加更多字段）
-                slurry_concentration REAL,  -- 泥浆浓度（%）
-                moisture_content REAL,      -- 水分含量（%）
-                psd_0_50 REAL,              -- 0-50μm颗粒分布（%）
-                psd_50_100 REAL,            -- 50-100μm颗粒分布（%）
-                psd_100_200 REAL,           -- 100-200μm颗粒分布（%）
-                psd_200_plus REAL,          -- >200μm颗粒分布（%）
-                -- 高硅铁尾矿矿物组成（可添加更多字段）
-                mineral_1 TEXT,             -- 矿物1
-                -- 高硅铁尾矿碱活化剂种类（可添加更多字段）
-                alkali_activator TEXT,      -- 碱活化剂
-                -- 高硅铁尾矿胶凝材料配比（可添加更多字段）
-                cement_content REAL,        -- 水泥掺量（%）
-                fly_ash_content REAL,       -- 粉煤灰掺量（%）
-                water_binder_ratio REAL,    -- 水灰比
-                superplasticizer_content REAL,  -- 减水剂掺量（%）
-                alkali_activator_content REAL,  -- 碱活化剂掺量（%）
-                -- 高硅铁尾矿胶凝材料制备工艺参数
-                curing_temp INTEGER,        -- 养护温度（℃）
-                curing_time REAL,           -- 养护时间（h）
-                curing_humidity REAL,       -- 养护湿度（%）
-                curing_method TEXT,         -- 养护方法
-                curing_pressure REAL,       -- 养护压力（MPa）
-                calcination_temp INTEGER,   -- 煅烧温度（℃）
-                mixing_time INTEGER,        -- 混合时间（分钟）
-                -- 高硅铁尾矿胶凝材料性能
-                compressive_strength_28d REAL,  -- 28天抗压强度（MPa）
-                flexural_strength_28d REAL,     -- 28天抗折强度（MPa）
-                modulus_of_elaontent_28d REAL,  -- 28天氯离子含量（%）
-                alkali_content_28d REAL,        -- 28天碱含量（%）
-                -- 高硅铁尾矿胶凝材料耐久性能
-                carbonation_depth REAL,         -- 碳化深度（mm）
-                chloride_ion_content_depth REAL,  -- 氯离子渗透深度（mm）
-                water_absorption_28d REAL,      -- 吸水率（%）
-                sticity_28d REAL,               -- 28天弹性模量（GPa）
-                drying_shrinkage_28d REAL,      -- 28天干缩率（%）
-                chloride_ion_c REAL             -- 氯离子渗透系数（mm/s）
-            )
-        ''')
-        self.conn.commit()
+# 表结构迁移：按顺序执行，已执行到第几步记录在PRAGMA user_version中，
+# 每一步在写事务中执行，多个进程同时打开数据库时只有一个进程会执行迁移。
+# 旧版数据库（user_version为0）的表可能已经存在，所以每一步都要能重复执行
+def _add_missing_columns(conn: sqlite3.Connection, table: str, columns: List[str]):
+    """为表补上缺少的列，columns为["列名 类型", ...]"""
+    existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+    for column in columns:
+        if column.split()[0] not in existing:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {column}")
 
-    def _update_table(self):
-        """更新数据库表结构，扩充字段"""
-        cursor = self.conn.cursor()
-        # 若需要新增字段，可在new_columns中添加新字段的SQL语句
-        # new_columns = ["字段名 数据类型", ...]
-        # 若字段已存在，会抛出 OperationalError 异常，可忽略
-        # 完成数据库表结构更新后，可随时删除new_columns中的字段
-        new_columns = [
-            "author TEXT",
-            "title TEXT",
-            "year INTEGER"  # 以上为示例，使用后请删除
-        ]
-        for column in new_columns:
+
+def _migration_create_materials(conn: sqlite3.Connection):
+    """创建materials表（字段需要时扩展）"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS materials (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,      -- 主键ID，自动递增
+            author TEXT,                               -- 作者
+            title TEXT,                                -- 标题
+            year INTEGER,                              -- 发表年份 
+            -- 高硅铁尾矿原料特性（可添加更多字段）
+            SiO2_content REAL,        -- SiO2含量（%）
+            Al2O3_content REAL,       -- Al2O3含量（%）
+            CaO_content REAL,         -- CaO含量（%）
+            Fe2O3_content REAL,       -- Fe2O3含量（%）
+            MgO_content REAL,         -- MgO含量（%）
+            MnO_content REAL,         -- MnO含量（%）
+            TiO2_content REAL,        -- TiO2含量（%）
+            -- 高硅铁尾矿物化性质（可添加更多字段）
+            slurry_concentration REAL,  -- 泥浆浓度（%）
+            moisture_content REAL,      -- 水分含量（%）
+            psd_0_50 REAL,              -- 0-50μm颗粒分布（%）
+            psd_50_100 REAL,            -- 50-100μm颗粒分布（%）
+            psd_100_200 REAL,           -- 100-200μm颗粒分布（%）
+            psd_200_plus REAL,          -- >200μm颗粒分布（%）
+            -- 高硅铁尾矿矿物组成（可添加更多字段）
+            mineral_1 TEXT,             -- 矿物1
+            -- 高硅铁尾矿碱活化剂种类（可添加更多字段）
+            alkali_activator TEXT,      -- 碱活化剂
+            -- 高硅铁尾矿胶凝材料配比（可添加更多字段）
+            cement_content REAL,        -- 水泥掺量（%）
+            fly_ash_content REAL,       -- 粉煤灰掺量（%）
+            water_binder_ratio REAL,    -- 水灰比
+            superplasticizer_content REAL,  -- 减水剂掺量（%）
+            alkali_activator_content REAL,  -- 碱活化剂掺量（%）
+            -- 高硅铁尾矿胶凝材料制备工艺参数
+            curing_temp INTEGER,        -- 养护温度（℃）
+            curing_time REAL,           -- 养护时间（h）
+            curing_humidity REAL,       -- 养护湿度（%）
+            curing_method TEXT,         -- 养护方法
+            curing_pressure REAL,       -- 养护压力（MPa）
+            calcination_temp INTEGER,   -- 煅烧温度（℃）
+            mixing_time INTEGER,        -- 混合时间（分钟）
+            -- 高硅铁尾矿胶凝材料性能
+            compressive_strength_28d REAL,  -- 28天抗压强度（MPa）
+            flexural_strength_28d REAL,     -- 28天抗折强度（MPa）
+            modulus_of_elaontent_28d REAL,  -- 28天氯离子含量（%）
+            alkali_content_28d REAL,        -- 28天碱含量（%）
+            -- 高硅铁尾矿胶凝材料耐久性能
+            carbonation_depth REAL,         -- 碳化深度（mm）
+            chloride_ion_content_depth REAL,  -- 氯离子渗透深度（mm）
+            water_absorption_28d REAL,      -- 吸水率（%）
+            sticity_28d REAL,               -- 28天弹性模量（GPa）
+            drying_shrinkage_28d REAL,      -- 28天干缩率（%）
+            chloride_ion_c REAL,            -- 氯离子渗透系数（mm/s）
+            source_path TEXT                -- 来源文件路径（增量处理时用于替换旧记录）
+        )
+    ''')
+
+
+def _migration_add_bibliography(conn: sqlite3.Connection):
+    """早期版本的materials表没有作者、标题、年份列"""
+    _add_missing_columns(conn, "materials", ["author TEXT", "title TEXT", "year INTEGER"])
+
+
+def _migration_add_source_path(conn: sqlite3.Connection):
+    """来源文件路径列及索引（增量处理时用于替换旧记录）"""
+    _add_missing_columns(conn, "materials", ["source_path TEXT"])
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_materials_source ON materials(source_path)")
+
+
+def _migration_create_manifest(conn: sqlite3.Connection):
+    """增量处理清单：记录已处理文件的大小、修改时间和内容哈希"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS ingest_manifest (
+            path TEXT PRIMARY KEY,      -- 文件绝对路径
+            size INTEGER,               -- 文件大小（字节）
+            mtime_ns INTEGER,           -- 修改时间（纳秒）
+            content_hash TEXT,          -- 内容哈希（blake2b）
+            record_count INTEGER,       -- 入库记录数
+            ingested_at REAL            -- 处理时间戳
+        )
+    ''')
+
+
+def _migration_create_export_state(conn: sqlite3.Connection):
+    """增量导出进度：每个导出目录上次导出到的最大id"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS export_state (
+            target TEXT PRIMARY KEY,    -- 导出目录绝对路径
+            format TEXT,                -- 导出格式
+            last_id INTEGER,            -- 已导出的最大id
+            rows INTEGER,               -- 累计导出行数
+            exported_at REAL            -- 最近一次导出的时间戳
+        )
+    ''')
+
+
+def _migration_create_import_state(conn: sqlite3.Connection):
+    """已导入的导出文件：按内容哈希记录，同一文件（包括复制、改名后的）不会重复导入"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS import_state (
+            content_hash TEXT PRIMARY KEY,  -- 文件内容哈希（blake2b）
+            path TEXT,                  -- 导入时的文件绝对路径
+            rows INTEGER,               -- 导入行数
+            imported_at REAL            -- 导入时间戳
+        )
+    ''')
+
+
+SCHEMA_MIGRATIONS = [
+    _migration_create_materials,
+    _migration_add_bibliography,
+    _migration_add_source_path,
+    _migration_create_manifest,
+    _migration_create_export_state,
+    _migration_create_import_state,
+]
+
+_SQL_TYPES = {float: "REAL", int: "INTEGER", str: "TEXT"}
+
+
+def _schema_drift(conn: sqlite3.Connection):
+    """
+    迁移之后与注册表的差异：FIELD_SPECS和NLP_RULES中新增但表中还没有的列、QUERY_INDEXES中还没有创建的索引
+    （新增字段或索引时不必再写迁移，下次打开数据库时自动补上；NLP规则的列不声明类型，按原值保存）
+    """
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(materials)")}
+    columns = [f"{spec.column} {_SQL_TYPES.get(spec.type, 'TEXT')}"
+               for spec in FIELD_SPECS if spec.column not in existing]
+    columns += list(dict.fromkeys(rule.column for rule in NLP_RULES if rule.column not in existing))
+    indexes = {row[0] for row in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'materials'")}
+    return columns, {name: cols for name, cols in QUERY_INDEXES.items() if name not in indexes}
+
+
+def _is_busy(error: Exception) -> bool:
+    return isinstance(error, sqlite3.OperationalError) and (
+        "locked" in str(error) or "busy" in str(error))
+
+
+class MaterialStore:
+    """
+    material_data.db的存储层，可以多个进程同时使用（例如一边爬取一边批量处理文件夹）：
+    - WAL日志模式，读操作不阻塞写操作，写操作也不阻塞读操作
+    - 读：reader()从只读连接池中取连接
+    - 写：submit()/write()把写操作交给唯一的写入线程串行执行，每个操作一个BEGIN IMMEDIATE事务；
+      其他进程正在写入时等待，超过busy_timeout秒仍拿不到写锁才报错
+    - 打开时执行SCHEMA_MIGRATIONS中尚未执行的迁移，并补上FIELD_SPECS/QUERY_INDEXES中新增的列和索引
+    """
+
+    def __init__(self, path: str = None, readers: int = DB_READ_POOL_SIZE, busy_timeout: float = None,
+                 synchronous: str = None):
+        self.path = path or DATABASE_NAME
+        self.busy_timeout = DB_BUSY_TIMEOUT if busy_timeout is None else busy_timeout
+        synchronous = (synchronous or DB_SYNCHRONOUS).upper()
+        if synchronous not in ("OFF", "NORMAL", "FULL", "EXTRA"):
+            raise ValueError(f"无效的synchronous设置：{synchronous}（可用：OFF/NORMAL/FULL/EXTRA）")
+        self.lock_waits = 0  # 因其他进程持有写锁而重试的次数
+        self._conn = self._connect()  # 写连接，迁移完成后只在写入线程中使用
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(f"PRAGMA synchronous={synchronous}")  # 默认取DB_SYNCHRONOUS
+        self.migrate()
+        self._readers = queue.LifoQueue()
+        self._reader_slots = threading.BoundedSemaphore(max(1, readers))
+        self._tasks = queue.Queue()
+        self._thread = None
+        self._thread_lock = threading.Lock()
+
+    def _connect(self, readonly: bool = False) -> sqlite3.Connection:
+        if readonly:
+            from urllib.request import pathname2url  # urllib.request导入较慢，用到时才导入
+            uri = f"file:{pathname2url(os.path.abspath(self.path))}?mode=ro"
+            return sqlite3.connect(uri, uri=True, timeout=self.busy_timeout, check_same_thread=False)
+        # isolation_level=None：事务由_transaction显式控制
+        return sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None,
+                               check_same_thread=False)
+
+    def _transaction(self, func: Callable[[sqlite3.Connection], object]):
+        """
+        在写连接上以BEGIN IMMEDIATE开始事务执行func(conn)，成功则提交，异常则回滚
+        （开始时就拿写锁，避免读事务中途升级为写事务时与其他进程死锁）
+        """
+        deadline = time.monotonic() + self.busy_timeout
+        delay = 0.05
+        while True:
             try:
-                cursor.execute(f"ALTER TABLE materials ADD COLUMN {column}")
+                self._conn.execute("BEGIN IMMEDIATE")
+                break
             except sqlite3.OperationalError as e:
-                print(f"跳过已存在的列：{column}")
-        print("数据库表结构已更新,将int_1设置为False!")
-        self.conn.commit()
+                if not _is_busy(e) or time.monotonic() >= deadline:
+                    raise
+                self.lock_waits += 1
+                time.sleep(delay * (1 + random.random()))
+                delay = min(delay * 2, 1.0)
+        try:
+            result = func(self._conn)
+            self._conn.execute("COMMIT")
+            return result
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    def migrate(self) -> int:
+        """执行尚未执行的迁移，返回迁移后的版本号"""
+        version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        if version < len(SCHEMA_MIGRATIONS):
+            def apply(conn):
+                current = conn.execute("PRAGMA user_version").fetchone()[0]  # 可能已被其他进程迁移
+                for number in range(current, len(SCHEMA_MIGRATIONS)):
+                    SCHEMA_MIGRATIONS[number](conn)
+                    conn.execute(f"PRAGMA user_version = {number + 1}")
+                return max(current, len(SCHEMA_MIGRATIONS))
+            version = self._transaction(apply)
+        if any(_schema_drift(self._conn)):
+            def sync(conn):
+                columns, indexes = _schema_drift(conn)
+                _add_missing_columns(conn, "materials", columns)
+                for name, cols in indexes.items():
+                    conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON materials({', '.join(cols)})")
+                if indexes:
+                    conn.execute("ANALYZE materials")
+            self._transaction(sync)
+        return version
+
+    @contextlib.contextmanager
+    def reader(self) -> Iterator[sqlite3.Connection]:
+        """从只读连接池取一个连接（池中连接都在使用时等待）"""
+        if not self._reader_slots.acquire(timeout=self.busy_timeout):
+            raise sqlite3.OperationalError("等待只读连接超时")
+        try:
+            conn = self._readers.get_nowait()
+        except queue.Empty:
+            conn = self._connect(readonly=True)
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            self._readers.put(conn)
+            self._reader_slots.release()
+
+    def submit(self, func: Callable[[sqlite3.Connection], object]) -> Future:
+        """把写操作func(conn)放入写入队列，返回Future（结果为func的返回值）"""
+        with self._thread_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._write_loop, name="material-store-writer",
+                                                daemon=True)
+                self._thread.start()
+        future = Future()
+        self._tasks.put((func, future))
+        return future
+
+    def write(self, func: Callable[[sqlite3.Connection], object]):
+        """执行写操作并等待完成"""
+        return self.submit(func).result()
+
+    def _write_loop(self):
+        while True:
+            task = self._tasks.get()
+            if task is None:
+                return
+            func, future = task
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(self._transaction(func))
+            except BaseException as e:
+                future.set_exception(e)
+
+    def close(self):
+        """等待写入队列中的操作完成后关闭所有连接"""
+        if self._thread is not None:
+            self._tasks.put(None)
+            self._thread.join()
+            self._thread = None
+        while not self._readers.empty():
+            self._readers.get_nowait().close()
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+class BatchWriter:
+    """
+    缓冲批量写入器：记录先放入缓冲区，攒满batch_size条或距上次写入超过
+    flush_interval秒时，在一个事务中用executemany写入，避免每条记录提交一次
+    conn为MaterialStore时交给其写入线程执行，也可以直接传入sqlite3连接
+    columns：写入的列，默认为FIELD_SPECS中的字段、NLP_RULES的目标列加source_path
+    """
+
+    def __init__(self, conn, batch_size: int = DB_BATCH_SIZE,
+                 flush_interval: float = DB_FLUSH_INTERVAL, columns: List[str] = None):
+        self.conn = conn
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        if not columns:
+            columns = [spec.column for spec in FIELD_SPECS]
+            columns += list(dict.fromkeys(rule.column for rule in NLP_RULES if rule.column not in columns))
+            columns.append("source_path")
+        self.columns = list(columns)
+        self._source_index = self.columns.index("source_path") if "source_path" in self.columns else None
+        self.sql = (f"INSERT INTO materials ({', '.join(self.columns)}) "
+                    f"VALUES ({', '.join('?' * len(self.columns))})")
+        self.written = 0  # 已成功写入的记录数
+        self.failed = 0   # 写入失败而丢弃的记录数（调用方需检查）
+        self._buffer = []
+        self._replace = []    # 待删除旧记录的来源文件
+        self._replaced = set()  # 本次已删除过旧记录的来源文件
+        self._manifest = []   # 待更新的清单条目
+        self._on_commit = []  # 当前缓冲区提交后要调用的回调
+        self._last_flush = time.monotonic()
+
+    def add(self, data: Dict, source: str = None):
+        """
+        添加一条记录（source为来源文件路径），必要时自动写入
+        带source的记录要等mark_ingested后才会自动写入，保证一个文件的记录和清单条目在同一事务中提交，
+        中途崩溃时不会出现记录已入库而清单未更新（重跑时重复入库）的情况
+        """
+        row = [data.get(column) for column in self.columns]
+        if source is not None:
+            row[self._source_index] = source
+        self._buffer.append(tuple(row))
+        if source is None:
+            self._maybe_flush()
+
+    def add_rows(self, rows):
+        """添加多行已按self.columns排列的元组（批量导入时使用，不必逐条构造字典），必要时自动写入"""
+        self._buffer.extend(rows)
+        self._maybe_flush()
+
+    def _maybe_flush(self):
+        """缓冲达到batch_size条或距上次写入超过flush_interval秒时写入"""
+        if (len(self._buffer) >= self.batch_size
+                or time.monotonic() - self._last_flush >= self.flush_interval):
+            self.flush()
+
+    def replace_source(self, source: str):
+        """删除该来源文件之前入库的记录（在下一次写入时、插入新记录之前执行）"""
+        if source not in self._replaced:
+            self._replaced.add(source)
+            self._replace.append((source,))
+
+    def mark_ingested(self, path: str, size: int, mtime_ns: int, content_hash: str, record_count: int):
+        """更新增量处理清单（与记录在同一事务中写入）"""
+        self._manifest.append((path, size, mtime_ns, content_hash, record_count, time.time()))
+        self._maybe_flush()
+
+    def on_commit(self, callback):
+        """已添加的记录提交之后调用callback()（缓冲区为空时立即调用）；写入失败时不调用"""
+        if self._buffer or self._replace or self._manifest:
+            self._on_commit.append(callback)
+        else:
+            callback()
+
+    def flush(self) -> int:
+        """将缓冲区中的记录在一个事务中写入，返回写入条数"""
+        rows, self._buffer = self._buffer, []
+        replace, self._replace = self._replace, []
+        manifest, self._manifest = self._manifest, []
+        callbacks, self._on_commit = self._on_commit, []
+        self._last_flush = time.monotonic()
+        if not (rows or replace or manifest):
+            return 0
+
+        def write(conn: sqlite3.Connection):
+            if replace:
+                conn.executemany("DELETE FROM materials WHERE source_path = ?", replace)
+            if rows:
+                conn.executemany(self.sql, rows)
+            if manifest:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO ingest_manifest "
+                    "(path, size, mtime_ns, content_hash, record_count, ingested_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)", manifest)
+
+        try:
+            with metric_timer("db_commit"):
+                if isinstance(self.conn, MaterialStore):
+                    self.conn.write(write)
+                else:
+                    with self.conn:  # 事务：成功则提交，异常则回滚
+                        write(self.conn)
+        except sqlite3.OperationalError as e:
+            self.failed += len(rows)
+            if _is_busy(e):
+                # 拿不到写锁时中止：本批记录和清单条目都没有提交，重新运行时会再次处理这些文件
+                if isinstance(self.conn, MaterialStore):
+                    print(f"数据库错误：其他进程占用写锁超过{self.conn.busy_timeout}秒（{str(e)}）")
+                raise
+            if "no column named" in str(e):
+                print("错误1:数据库表结构未更新!")
+                print("方法:重新运行程序，打开数据库时会自动补上FIELD_SPECS中新增的列（见SCHEMA_MIGRATIONS）")
+            else:
+                print(f"数据库错误：{str(e)}")
+            return 0
+        self.written += len(rows)
+        for callback in callbacks:
+            callback()
+        return len(rows)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.flush()
+        return False
+
+
+class MaterialDataProcessor:
+    def __init__(self, nlp_mode: str = "auto"):
+        # 初始化存储层（打开时自动执行表结构迁移，见SCHEMA_MIGRATIONS）
+        self.store = MaterialStore(DATABASE_NAME)
+
+        # NLP模式："auto"仅在NLP规则需要时才加载spaCy，"off"完全不使用spaCy
+        # 加载NLP模型（首次使用需先运行：python -m spacy download en_core_web_sm）
+        self.nlp_mode = nlp_mode
+        self.last_metrics = None  # 最近一次批量处理的性能指标（IngestMetrics）
+
+    @property
+    def nlp(self):
+        """完整的spaCy管线（首次访问时才加载）"""
+        return load_nlp(SPACY_PIPES)
+
+    def close(self):
+        """写完队列中的数据后关闭数据库"""
+        self.store.close()
 
  # ----------------------
     # 第三部分：数据提取模块（需要根据实际数据格式修改）
     # ----------------------  
     def extract_from_text(self, text: str) -> Dict[str, float]:
         """从给定的文本中提取关键参数。"""
-        # 使用Spacy进行文本处理（分句、分词等）
-        doc = self.nlp(text)
-        
-        # 示例提取规则（需要根据实际文献格式修改正则表达式）
-        return {
-            "SiO2_content": self._find_float(text, r"SiO2[:：]\s*([\d.]+)%"),
-            "Al2O3_content": self._find_float(text, r"Al2O3[:：]\s*([\d.]+)%"),
-            "CaO_content": self._find_float(text, r"CaO[:：]\s*([\d.]+)%"),
-            "Fe2O3_content": self._find_float(text, r"Fe2O3[:：]\s*([\d.]+)%"),
-            "MgO_content": self._find_float(text, r"MgO[:：]\s*([\d.]+)%"),
-            "MnO_content": self._find_float(text, r"MnO[:：]\s*([\d.]+)%"),
-            "TiO2_content": self._find_float(text, r"TiO2[:：]\s*([\d.]+)%"),
-            "slurry_concentration": self._find_float(text, r"泥浆浓度[:：]\s*([\d.]+)%"),
-            "moisture_content": self._find_float(text, r"水分含量[:：]\s*([\d.]+)%"),
-            "psd_0_50": self._find_float(text, r"0-50μm颗粒分布[:：]\s*([\d.]+)%"),
-            "psd_50_100": self._find_float(text, r"50-100μm颗粒分布[:：]\s*([\d.]+)%"),
-            "psd_100_200": self._find_float(text, r"100-200μm颗粒分布[:：]\s*([\d.]+)%"),
-            "psd_200_plus": self._find_float(text, r">200μm颗粒分布[:：]\s*([\d.]+)%"),
-            "mineral_1": self._find_text(text, r"矿物1[:：]\s*(\w+)"),
-            "alkali_activator": self._find_text(text, r"碱活化剂[:：]\s*(\w+)"),
-            "cement_content": self._find_float(text, r"水泥掺量[:：]\s*([\d.]+)%"),
-            "fly_ash_content": self._find_float(text, r"粉煤灰掺量[:：]\s*([\d.]+)%"),
-            "water_binder_ratio": self._find_float(text, r"水灰比[:：]\s*([\d.]+)"),
-            "superplasticizer_content": self._find_float(text, r"减水剂掺量[:：]\s*([\d.]+)%"),
-            "alkali_activator_content": self._find_float(text, r"碱活化剂掺量[:：]\s*([\d.]+)%"),
-            "curing_temp": self._find_int(text, r"养护温度[:：]\s*(\d+)℃"),
-            "curing_time": self._find_float(text, r"养护时间[:：]\s*([\d.]+)h"),
-            "curing_humidity": self._find_float(text, r"养护湿度[:：]\s*([\d.]+)%"),
-            "curing_method": self._find_text(text, r"养护方法[:：]\s*(\w+)"),
-            "curing_pressure": self._find_float(text, r"养护压力[:：]\s*([\d.]+)MPa"),
-            "calcination_temp": self._find_int(text, r"煅烧温度[:：]\s*(\d+)℃"),
-            "mixing_time": self._find_int(text, r"混合时间[:：]\s*(\d+)分钟"),
-            "compressive_strength_28d": self._find_float(text, r"28天抗压强度[:：]\s*([\d.]+)MPa"),
-            "flexural_strength_28d": self._find_float(text, r"28天抗折强度[:：]\s*([\d.]+)MPa"),
-            "modulus_of_elaontent_28d": self._find_float(text, r"28天氯离子含量[:：]\s*([\d.]+)%"),
-            "alkali_content_28d": self._find_float(text, r"28天碱含量[:：]\s*([\d.]+)%"),
-            "carbonation_depth": self._find_float(text, r"碳化深度[:：]\s*([\d.]+)mm"),
-            "chloride_ion_content_depth": self._find_float(text, r"氯离子渗透深度[:：]\s*([\d.]+)mm"),
-            "water_absorption_28d": self._find_float(text, r"吸水率[:：]\s*([\d.]+)%"),
-            "sticity_28d": self._find_float(text, r"28天弹性模量[:：]\s*([\d.]+)GPa"),
-            "drying_shrinkage_28d": self._find_float(text, r"28天干缩率[:：]\s*([\d.]+)%"),
-            "chloride_ion_c": self._find_float(text, r"氯离子渗透系数[:：]\s*([\d.]+)mm/s")
-        }
+        # 提取规则见FIELD_SPECS字段注册表（需要根据实际文献格式修改）
+        # 仅当NLP_RULES中的规则有字段未被正则命中时，才会调用spaCy
+        return extract_records([text], self.nlp_mode)[0]
 
-    # ----------------------
-    # 正则表达式提取函数
-    # ----------------------
-    def _find_float(self, text: str, pattern: str) -> Optional[float]:
-        """使用正则表达式查找浮点数"""
-        match = re.search(pattern, text)
-        return float(match.group(1)) if match else None
+    def extract_experiments(self, text: str) -> List[Dict]:
+        """按实验拆分提取，文档中每组实验（或参数表的每一行）返回一条记录"""
+        return list(extract_segmented([text], self.nlp_mode))
 
-    def _find_int(self, text: str, pattern: str) -> Optional[int]:
-        """使用正则表达式查找整数"""
-        match = re.search(pattern, text)
-        return int(match.group(1)) if match else None
-
-    def _find_text(self, text: str, pattern: str) -> Optional[str]:
-        """使用正则表达式查找文本"""
-        match = re.search(pattern, text)
-        return match.group(1) if match else None
+    def extract_many(self, texts: List[str], batch_size: int = 16) -> List[Dict]:
+        """批量提取，需要NLP时通过nlp.pipe分批处理"""
+        return extract_records(texts, self.nlp_mode, batch_size)
 
     # ----------------------
     # 第四部分：数据检查模块（需要根据业务规则修改）
     # ----------------------
-    def validate_data(self, data: Dict) -> bool:
-        """验证数据有效性（添加你的验证规则）"""
+    @staticmethod
+    def validate_data(data: Dict) -> bool:
+        """验证数据有效性（添加你的验证规则，工作进程中也会调用）"""
         # 相比mytest1.py，删除了检查必填字段
         
         # 数值范围检查（示例）
@@ -333,145 +1424,183 @@ class MaterialDataProcessor:
     # 第五部分：数据存储模块（通常无需修改）
     # ----------------------
     def save_to_db(self, data: Dict):
-        """将数据存入数据库，当数据库表结构拓展时，更新下面的SQL语句"""
-        try:
-            cursor = self.conn.cursor()
-            cursor.execute('''
-                INSERT INTO materials (
-                    SiO2_content,
-                    Al2O3_content,
-                    CaO_content,
-                    Fe2O3_content,
-                    MgO_content,
-                    MnO_content,
-                    TiO2_content,
-                    slurry_concentration,
-                    moisture_content,
-                    psd_0_50,
-                    psd_50_100,
-                    psd_100_200,
-                    psd_200_plus,
-                    mineral_1,
-                    alkali_activator,
-                    cement_content,
-                    fly_ash_content,
-                    water_binder_ratio,
-                    superplasticizer_content,
-                    alkali_activator_content,
-                    curing_temp,
-                    curing_time,
-                    curing_humidity,
-                    curing_method,
-                    curing_pressure,
-                    calcination_temp,
-                    mixing_time,
-                    compressive_strength_28d,
-                    flexural_strength_28d,
-                    modulus_of_elaontent_28d,
-                    alkali_content_28d,
-                    carbonation_depth,
-                    chloride_ion_content_depth,
-                    water_absorption_28d,
-                    sticity_28d,
-                    drying_shrinkage_28d,
-                    chloride_ion_c
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                data.get("SiO2_content"),
-                data.get("Al2O3_content"),
-                data.get("CaO_content"),
-                data.get("Fe2O3_content"),
-                data.get("MgO_content"),
-                data.get("MnO_content"),
-                data.get("TiO2_content"),
-                data.get("slurry_concentration"),
-                data.get("moisture_content"),
-                data.get("psd_0_50"),
-                data.get("psd_50_100"),
-                data.get("psd_100_200"),
-                data.get("psd_200_plus"),
-                data.get("mineral_1"),
-                data.get("alkali_activator"),
-                data.get("cement_content"),
-                data.get("fly_ash_content"),
-                data.get("water_binder_ratio"),
-                data.get("superplasticizer_content"),
-                data.get("alkali_activator_content"),
-                data.get("curing_temp"),
-                data.get("curing_time"),
-                data.get("curing_humidity"),
-                data.get("curing_method"),
-                data.get("curing_pressure"),
-                data.get("calcination_temp"),
-                data.get("mixing_time"),
-                data.get("compressive_strength_28d"),
-                data.get("flexural_strength_28d"),
-                data.get("modulus_of_elaontent_28d"),
-                data.get("alkali_content_28d"),
-                data.get("carbonation_depth"),
-                data.get("chloride_ion_content_depth"),
-                data.get("water_absorption_28d"),
-                data.get("sticity_28d"),
-                data.get("drying_shrinkage_28d"),
-                data.get("chloride_ion_c")
-            ))
-            self.conn.commit()
+        """将单条数据存入数据库（BatchWriter的简单封装，字段列表见FIELD_SPECS）"""
+        with BatchWriter(self.store, batch_size=1) as writer:
+            writer.add(data)
+        if writer.written:
             print("成功存入1条数据")
-        except sqlite3.OperationalError as e:
-            if "no column named" in str(e):
-                print("错误1:数据库表结构未更新!")
-                print("方法1:将int_1设置为True,同时将新增字段名填入new_columns,并运行程序!")
-                print("方法2:手动删除数据库文件material_data.db,并运行程序!")
-            else:
-                print(f"数据库错误：{str(e)}")
 
-    def process_folder(self, folder_path: str):
-        """批量处理文件夹"""
+    def batch_writer(self, batch_size: int = DB_BATCH_SIZE, flush_interval: float = DB_FLUSH_INTERVAL) -> "BatchWriter":
+        """获取批量写入器（建议配合with使用，退出时保证写入剩余数据；写入经过self.store的写入线程）"""
+        return BatchWriter(self.store, batch_size, flush_interval)
+
+    def build_pipeline(self, workers: int = None) -> "Pipeline":
+        """
+        默认的处理流水线：读取（线程，哈希判断是否变化）-> 提取（进程，解析文件并提取字段）
+        -> NLP（线程，分批，仅在注册了NLP规则时）-> 验证（线程）；
+        存储由调用方在主线程中完成，保证只有一个写入者
+        workers：提取阶段的进程数（默认取INGEST_WORKERS），为1时在线程中逐个处理
+        """
+        if workers is None:
+            workers = INGEST_WORKERS or os.cpu_count() or 1
+        nlp = self.nlp_mode != "off" and bool(NLP_RULES)
+        # 设置通过partial传给工作进程：spawn/forkserver启动的进程重新导入模块，
+        # 看不到load_config()覆盖的设置和运行时注册的规则
+        stages = [
+            Stage("read", _read_stage, workers=PIPELINE_READ_THREADS),
+            Stage("extract", functools.partial(_extract_stage, nlp=nlp, split_records=SPLIT_RECORDS),
+                  workers=workers, mode="process"),
+            Stage("validate", _validate_stage),
+        ]
+        if nlp:
+            # spaCy模型只在主进程中加载一次，多篇文档一起交给nlp.pipe
+            stages.insert(2, Stage("nlp", functools.partial(_nlp_stage, nlp_mode=self.nlp_mode),
+                                   batch_size=NLP_BATCH_SIZE))
+        return Pipeline(stages)
+
+    def process_folder(self, folder_path: str, workers: int = None, ordered: bool = False,
+                       profile: str = None, metrics_path: str = None, progress=None,
+                       show_progress: bool = True) -> Optional["IngestMetrics"]:
+        """
+        批量处理文件夹
+        workers：提取阶段的进程数（默认取INGEST_WORKERS），为1时在线程中逐个处理
+        ordered：是否按文件顺序交付结果，False时先完成的先入库
+        profile："cprofile"或"tracemalloc"时开启对应的性能分析，此时各阶段在主线程中逐条执行
+        metrics_path：性能指标导出路径（.prom为Prometheus文本格式，其他为JSON）
+        progress：每个文件处理完后调用progress(item, 已完成数, 总数)；show_progress：是否显示进度条
+        读取、提取、验证由流水线各阶段并行完成，数据库只由存储层的写入线程写入；
+        返回本次的性能指标（同时保存在self.last_metrics）
+        """
         if not os.path.exists(folder_path):
             print("文件夹路径不存在！")
-            return
+            return None
 
-        files = [f for f in os.listdir(folder_path) 
-                if os.path.splitext(f)[1].lower() in SUPPORTED_EXT]
-        
-        with tqdm(total=len(files), desc="批量处理") as pbar:
-            for filename in files:
-                filepath = os.path.join(folder_path, filename)
-                ext = os.path.splitext(filename)[1].lower()
-                
-                # 选择读取方式
-                if ext == '.pdf':
-                    text = FileProcessor.read_pdf(filepath)
-                elif ext == '.docx':
-                    text = FileProcessor.read_docx(filepath)
-                else:
-                    text = FileProcessor.read_txt(filepath)
-                
-                if text:
-                    self._process_text(text)
+        # 增量处理：大小和修改时间都未变化的文件直接跳过，不打开文件
+        with self.store.reader() as conn:
+            manifest = {row[0]: row[1:] for row in conn.execute(
+                "SELECT path, size, mtime_ns, content_hash, record_count FROM ingest_manifest")}
+        source = FolderSource(folder_path, manifest)
+        pipeline = self.build_pipeline(max(1, min(workers or INGEST_WORKERS or os.cpu_count() or 1,
+                                                  len(source.files))))
+        from tqdm import tqdm
+        counts = {"failed": 0, "new": 0, "updated": 0, "skipped": source.skipped}
+        metrics = IngestMetrics()
+
+        with profiling(profile), recording(metrics), self.batch_writer() as writer, \
+                tqdm(total=len(source.files), desc="批量处理", disable=not show_progress) as pbar:
+            def store(item: PipelineItem):
                 pbar.update(1)
+                metrics.observe_item(item)
+                size, mtime_ns, known = item.meta["size"], item.meta["mtime_ns"], item.meta["known"]
+                if item.error:
+                    counts["failed"] += 1
+                    tqdm.write(f"文件处理失败：{item.key}：{item.error}")
+                    return
+                if item.status == "unchanged":
+                    # 只有修改时间变化、内容未变：更新清单即可
+                    counts["skipped"] += 1
+                    writer.mark_ingested(item.key, size, mtime_ns, item.digest, known[3])
+                    return
+                if known:
+                    counts["updated"] += 1
+                else:
+                    counts["new"] += 1
+                # 新文件也先删除同一来源的记录：其他进程可能同时处理了这个文件
+                writer.replace_source(item.key)
+                for record in item.records:
+                    writer.add(record, source=item.key)
+                writer.mark_ingested(item.key, size, mtime_ns, item.digest, len(item.records))
 
-    def _process_text(self, text: str):
-        """统一处理文本内容"""
-        extracted_data = self.extract_from_text(text)
-        if self.validate_data(extracted_data):
-            self.save_to_db(extracted_data)
-
-    def run_crawler(self):
-        """启动爬虫任务"""
-        crawler = MaterialCrawler(CRAWL_SEED_URL)
-        for data in crawler.crawl():
-            # 将爬取内容转为标准格式
-            processed = self._adapt_crawled_data(data)
-            self._process_text(processed)
+            done = [0]
 
-    def _adapt_crawled_data(self, data: dict) -> str:
+            def deliver(item: PipelineItem):
+                store(item)
+                done[0] += 1
+                if progress:
+                    progress(item, done[0], len(source.files))
+
+            pipeline.run(source, deliver, ordered=ordered, inline=bool(profile))
+        metrics.finish(pipeline)
+        metrics.write_failed = writer.failed
+        self.last_metrics = metrics
+        print(f"新增{counts['new']}个文件，更新{counts['updated']}个文件，"
+              f"跳过{counts['skipped']}个未变化文件，成功存入{writer.written}条数据")
+        if counts["failed"]:
+            print(f"共有{counts['failed']}个文件处理失败")
+        if writer.failed:
+            print(f"共有{writer.failed}条数据写入数据库失败")
+        if metrics_path:
+            metrics.export(metrics_path)
+        return metrics
+
+    def _process_text(self, text: str):
+        """统一处理文本内容（单条文本直接依次调用流水线的提取、验证阶段）"""
+        item = _extract_stage(PipelineItem(text=text), nlp=self.nlp_mode != "off" and bool(NLP_RULES),
+                              split_records=SPLIT_RECORDS)
+        if not item.error:
+            item = _validate_stage(_nlp_stage([item], self.nlp_mode)[0])
+        if item.error:
+            print(f"数据处理错误：{item.error}")
+            return
+        for record in item.records:
+            self.save_to_db(record)
+
+    def run_crawler(self, max_pages: int = None, max_depth: int = None, progress=None) -> Dict[str, int]:
+        """
+        启动爬虫任务（未变化的页面不会重复解析和入库；中断后再次运行从待爬队列检查点继续）
+        max_pages/max_depth默认取CRAWL_MAX_PAGES/CRAWL_MAX_DEPTH；progress：每条数据处理完后调用progress(item, 已完成数)
+        返回{"stored": 存入条数, "failed": 处理失败条数, "write_failed": 写入数据库失败条数,
+             "fetched_pages": 请求成功的页面数, "failed_pages": 请求失败的页面数, "unchanged_pages": 未变化的页面数}
+        """
+        cache = ResponseCache(CRAWL_CACHE_DIR, max_bytes=CRAWL_CACHE_MAX_MB * 1024 * 1024)
+        crawler = MaterialCrawler(CRAWL_SEED_URL, concurrency=CRAWL_CONCURRENCY,
+                                  rate_per_host=CRAWL_RATE_PER_HOST, cache=cache)
+        # 数据写入数据库之后才确认页面已完成，中途崩溃时未存储的页面下次重新请求
+        source = CrawlerSource(crawler, self._adapt_crawled_data, checkpoint_path=CRAWL_FRONTIER_DB,
+                               max_pages=max_pages or CRAWL_MAX_PAGES, max_depth=max_depth or CRAWL_MAX_DEPTH,
+                               acknowledge=True)
+        # 页面解析已在爬虫中完成，提取阶段只处理短文本，用线程即可
+        pipeline = self.build_pipeline(workers=1)
+        counts = {"failed": 0, "done": 0}
+        try:
+            with self.batch_writer() as writer:
+                def store(item: PipelineItem):
+                    counts["done"] += 1
+                    if item.error:
+                        counts["failed"] += 1
+                        print(f"数据处理错误：{item.error}")
+                    else:
+                        for record in item.records:
+                            writer.add(record)
+                    writer.on_commit(functools.partial(crawler.ack, item.meta.get("url")))
+                    if progress:
+                        progress(item, counts["done"])
+
+                pipeline.run(source, store)
+            crawler.flush_acks()
+        finally:
+            cache.close()
+        print(f"成功存入{writer.written}条数据")
+        if writer.failed:
+            print(f"共有{writer.failed}条数据写入数据库失败")
+        if crawler.failed_pages:
+            print(f"共有{crawler.failed_pages}个页面请求失败（下次运行时重试）")
+        if crawler.unchanged_pages:
+            print(f"跳过{crawler.unchanged_pages}个未变化的页面")
+        return {"stored": writer.written, "failed": counts["failed"], "write_failed": writer.failed,
+                "fetched_pages": crawler.fetched_pages, "failed_pages": crawler.failed_pages,
+                "unchanged_pages": crawler.unchanged_pages}
+
+    def _adapt_crawled_data(self, data: dict) -> str:
         """将爬取数据转换为标准文本格式（需根据实际结构修改）"""
         return f"""
         标题：{data.get('title', '')}
         内容：{data.get('content', '')}
         """
     def get_credentials():
+        from google.oauth2.credentials import Credentials
+        from google_auth_oauthlib.flow import InstalledAppFlow
+        from google.auth.transport.requests import Request
         SCOPES = ['https://www.googleapis.com/auth/gmail.send']
         creds = None
         # The file token.json stores the user's access and refresh tokens, and is
@@ -492,6 +1621,8 @@ class MaterialDataProcessor:
         return creds
 
     def send_alert(email):
+        import smtplib
+        from email.mime.text import MIMEText
         creds = get_credentials()
         
         # 创建MIME多部分消息
@@ -512,6 +1643,2478 @@ class MaterialDataProcessor:
         finally:
             service.quit()
 
+# ----------------------
+# 模块四：字段注册表与单遍提取引擎
+# ----------------------
+
+
+class FieldSpec(NamedTuple):
+    """字段声明：数据库列名、标签正则、单位、数据类型"""
+    column: str
+    label: str
+    unit: str = ""
+    type: type = float
+
+
+# 提取字段注册表（新增字段时只需在此追加一行，数据库中缺少的列在下次打开时自动补上）
+FIELD_SPECS: List[FieldSpec] = [
+    FieldSpec("SiO2_content", r"SiO2", "%"),
+    FieldSpec("Al2O3_content", r"Al2O3", "%"),
+    FieldSpec("CaO_content", r"CaO", "%"),
+    FieldSpec("Fe2O3_content", r"Fe2O3", "%"),
+    FieldSpec("MgO_content", r"MgO", "%"),
+    FieldSpec("MnO_content", r"MnO", "%"),
+    FieldSpec("TiO2_content", r"TiO2", "%"),
+    FieldSpec("slurry_concentration", r"泥浆浓度", "%"),
+    FieldSpec("moisture_content", r"水分含量", "%"),
+    FieldSpec("psd_0_50", r"0-50μm颗粒分布", "%"),
+    FieldSpec("psd_50_100", r"50-100μm颗粒分布", "%"),
+    FieldSpec("psd_100_200", r"100-200μm颗粒分布", "%"),
+    FieldSpec("psd_200_plus", r">200μm颗粒分布", "%"),
+    FieldSpec("mineral_1", r"矿物1", "", str),
+    FieldSpec("alkali_activator", r"碱活化剂", "", str),
+    FieldSpec("cement_content", r"水泥掺量", "%"),
+    FieldSpec("fly_ash_content", r"粉煤灰掺量", "%"),
+    FieldSpec("water_binder_ratio", r"水灰比", ""),
+    FieldSpec("superplasticizer_content", r"减水剂掺量", "%"),
+    FieldSpec("alkali_activator_content", r"碱活化剂掺量", "%"),
+    FieldSpec("curing_temp", r"养护温度", "℃", int),
+    FieldSpec("curing_time", r"养护时间", "h"),
+    FieldSpec("curing_humidity", r"养护湿度", "%"),
+    FieldSpec("curing_method", r"养护方法", "", str),
+    FieldSpec("curing_pressure", r"养护压力", "MPa"),
+    FieldSpec("calcination_temp", r"煅烧温度", "℃", int),
+    FieldSpec("mixing_time", r"混合时间", "分钟", int),
+    FieldSpec("compressive_strength_28d", r"28天抗压强度", "MPa"),
+    FieldSpec("flexural_strength_28d", r"28天抗折强度", "MPa"),
+    FieldSpec("modulus_of_elaontent_28d", r"28天氯离子含量", "%"),
+    FieldSpec("alkali_content_28d", r"28天碱含量", "%"),
+    FieldSpec("carbonation_depth", r"碳化深度", "mm"),
+    FieldSpec("chloride_ion_content_depth", r"氯离子渗透深度", "mm"),
+    FieldSpec("water_absorption_28d", r"吸水率", "%"),
+    FieldSpec("sticity_28d", r"28天弹性模量", "GPa"),
+    FieldSpec("drying_shrinkage_28d", r"28天干缩率", "%"),
+    FieldSpec("chloride_ion_c", r"氯离子渗透系数", "mm/s"),
+]
+
+# 各数据类型对应的取值正则
+_VALUE_PATTERNS = {float: r"([\d.]+)", int: r"(\d+)", str: r"(\w+)"}
+
+
+def field_pattern(spec: FieldSpec) -> str:
+    """生成字段的完整正则（标签 + 冒号 + 取值 + 单位）"""
+    return spec.label + r"[:：]\s*" + _VALUE_PATTERNS[spec.type] + re.escape(spec.unit)
+
+
+class FieldExtractor:
+    """
+    关键词锚定的单遍提取器：
+    先用一个合并后的标签正则扫描全文，命中标签后只在该位置匹配取值，
+    每个字段保留第一次命中的结果，所有字段找到后提前结束。
+    """
+
+    def __init__(self, specs: List[FieldSpec] = None):
+        self.specs = list(specs if specs is not None else FIELD_SPECS)
+        self._label_re = None  # 正则在首次提取时才编译，不拖慢启动
+        self._field_res = None
+
+    def _compile(self):
+        """编译合并标签正则及各字段的取值正则"""
+        # 长标签优先，避免"碱活化剂"抢先匹配"碱活化剂掺量"
+        # 注意：合并正则中不能使用命名分组，否则re无法做首字符预筛选，速度会慢两个数量级
+        ordered = sorted(self.specs, key=lambda spec: -len(spec.label))
+        self._label_re = re.compile("|".join(f"(?:{spec.label})" for spec in ordered))
+        self._labels = [(re.compile(spec.label), spec,
+                         re.compile(r"[:：]\s*" + _VALUE_PATTERNS[spec.type] + re.escape(spec.unit)))
+                        for spec in ordered]
+        self._label_cache = {}  # 命中文本 -> [(字段, 取值正则)]
+
+    def extract(self, text: str, result: Dict = None, final: bool = True) -> Dict[str, object]:
+        """
+        单遍扫描提取全部字段
+        result：已有的部分结果，只补充其中为None的字段
+        final：为False时表示文本后面还有内容，紧贴文本末尾的取值可能被截断，暂不采用
+        """
+        with metric_timer("regex"):
+            return self._scan(text, result, final)
+
+    def _scan(self, text: str, result: Dict, final: bool) -> Dict[str, object]:
+        """extract的实现"""
+        if self._label_re is None:
+            self._compile()
+        if result is None:
+            result = {spec.column: None for spec in self.specs}
+        remaining = sum(1 for spec in self.specs if result.get(spec.column) is None)
+        end = len(text)
+        search = self._label_re.search
+        pos = 0
+        while remaining:
+            match = search(text, pos)
+            if match is None:
+                break
+            # 下一次从标签起点后一位继续，保证重叠标签（如"28天吸水率"中的"吸水率"）不被漏掉
+            pos = match.start() + 1
+            for spec, value_re in self._resolve_label(match.group()):
+                if result[spec.column] is not None:
+                    continue
+                value = value_re.match(text, match.end())
+                if value and (final or value.end() < end):
+                    result[spec.column] = spec.type(value.group(1))
+                    remaining -= 1
+        return result
+
+    def extract_stream(self, chunks, overlap: int = 256) -> Dict[str, object]:
+        """
+        流式提取：逐块扫描，块与块之间保留overlap个字符，避免标签或取值跨块时漏掉；
+        所有字段都找到后立即停止读取后续内容，内存占用与文档长度无关
+        """
+        result = {spec.column: None for spec in self.specs}
+        carry = ""
+        for chunk in chunks:
+            window = carry + chunk
+            self.extract(window, result, final=False)
+            if all(value is not None for value in result.values()):
+                return result
+            carry = window[-overlap:]
+        return self.extract(carry, result, final=True)
+
+    def found_columns(self, text: str) -> set:
+        """text中能取到值的字段列名（只判断不转换，供分段使用）"""
+        if self._label_re is None:
+            self._compile()
+        found = set()
+        search = self._label_re.search
+        pos = 0
+        while True:
+            match = search(text, pos)
+            if match is None:
+                return found
+            pos = match.start() + 1
+            for spec, value_re in self._resolve_label(match.group()):
+                if spec.column not in found and value_re.match(text, match.end()):
+                    found.add(spec.column)
+
+    def _resolve_label(self, label_text: str) -> list:
+        """根据命中的标签文本找到对应字段（结果缓存）"""
+        candidates = self._label_cache.get(label_text)
+        if candidates is None:
+            candidates = [(spec, value_re) for label_re, spec, value_re in self._labels
+                          if label_re.fullmatch(label_text)]
+            self._label_cache[label_text] = candidates
+        return candidates
+
+    def extract_per_field(self, text: str) -> Dict[str, object]:
+        """逐字段提取（每个字段扫描一次全文，保留作对照）"""
+        if self._field_res is None:
+            self._field_res = [(spec, re.compile(field_pattern(spec))) for spec in self.specs]
+        result = {}
+        for spec, pattern in self._field_res:
+            match = pattern.search(text)
+            result[spec.column] = spec.type(match.group(1)) if match else None
+        return result
+
+
+FIELD_EXTRACTOR = FieldExtractor()
+
+
+# ----------------------
+# 按需加载的NLP规则
+# ----------------------
+# en_core_web_sm中的管线组件，加载时只保留规则需要的部分
+SPACY_PIPES = ["tok2vec", "tagger", "parser", "attribute_ruler", "lemmatizer", "ner"]
+
+
+class NlpRule(NamedTuple):
+    """NLP提取规则：目标列名、提取函数func(doc)、所需的spaCy管线组件"""
+    column: str
+    func: object
+    pipes: tuple = ("ner",)
+
+
+# 正则无法覆盖的字段可在此注册NLP规则，例如：
+# register_nlp_rule("author", lambda doc: next((ent.text for ent in doc.ents if ent.label_ == "PERSON"), None))
+NLP_RULES: List[NlpRule] = []
+_NLP_CACHE = {}
+
+
+def register_nlp_rule(column: str, func, pipes: tuple = ("ner",)):
+    """注册一条NLP提取规则（只在正则未命中该字段时执行）"""
+    NLP_RULES.append(NlpRule(column, func, tuple(pipes)))
+
+
+def load_nlp(pipes):
+    """按需加载spaCy模型，禁用不需要的管线组件（按组件组合缓存）"""
+    needed = set(pipes)
+    if needed - {"tok2vec"}:
+        needed.add("tok2vec")  # 有训练组件时需要共享的tok2vec
+    key = frozenset(needed)
+    if key not in _NLP_CACHE:
+        import spacy  # 只有真正需要NLP时才导入spaCy
+        exclude = [pipe for pipe in SPACY_PIPES if pipe not in needed]
+        _NLP_CACHE[key] = spacy.load(SPACY_MODEL, exclude=exclude)
+    return _NLP_CACHE[key]
+
+
+def extract_records(texts: List[str], nlp_mode: str = "auto", batch_size: int = 16) -> List[Dict]:
+    """
+    批量提取：先用正则单遍提取，再对仍缺字段的文档分批运行NLP规则
+    nlp_mode："auto"按需使用spaCy，"off"只做正则提取
+    """
+    records = [FIELD_EXTRACTOR.extract(text) for text in texts]
+    apply_nlp_rules([[record] for record in records], texts, nlp_mode, batch_size)
+    return records
+
+
+def apply_nlp_rules(groups: List[List[Dict]], texts: List[str], nlp_mode: str = "auto", batch_size: int = 16):
+    """
+    对每篇文档的全文运行一次NLP规则，结果补入该文档各条记录的空缺字段
+    groups[i]为texts[i]提取出的记录列表（按实验拆分时一篇文档有多条）；只处理仍缺NLP字段的文档
+    """
+    if nlp_mode == "off" or not NLP_RULES:
+        return
+    pending = [index for index, records in enumerate(groups)
+               if any(record.get(rule.column) is None for record in records for rule in NLP_RULES)]
+    if not pending:
+        return
+
+    pipes = set()
+    for rule in NLP_RULES:
+        pipes.update(rule.pipes)
+    with metric_timer("nlp"):
+        nlp = load_nlp(pipes)
+        docs = nlp.pipe((texts[index] for index in pending), batch_size=batch_size)
+        for index, doc in zip(pending, docs):
+            records = groups[index]
+            for rule in NLP_RULES:
+                if all(record.get(rule.column) is not None for record in records):
+                    continue
+                value = rule.func(doc)
+                for record in records:
+                    if record.get(rule.column) is None:
+                        record[rule.column] = value
+
+
+# 实验/配比分段标题，如"实验1"、"试验组A-2"、"配比编号：M3"、"第3组："、"Sample 2"
+# 标题须独占一行，或后面紧跟空白（"试样1 28天抗压强度：40MPa"）；"试样1的强度……"这样的叙述句不算标题
+SEGMENT_HEADING = re.compile(
+    r"^\s*(?:第\s*[0-9一二三四五六七八九十百]+\s*[组次]|"
+    r"(?:实验|试验|配比|配合比|试样|样品|试件|mix|sample|experiment)\s*(?:编号|组|号)?\s*[:：#]?\s*[A-Za-z]*[-_]?\d+)"
+    r"\s*[:：.．、)）]?(?=\s|$)",
+    re.IGNORECASE)
+
+
+class RecordSegmenter:
+    """
+    流式切分多实验文档，逐行扫描，遇到以下情况时开始新的一段：
+    1. 实验/配比标题行（SEGMENT_HEADING）；
+    2. 遇到过实验标题或参数表之后，当前段中已经取到值的字段再次出现（说明进入了下一组实验）；
+    3. 以制表符分隔、表头含两个以上字段标签的参数表，每个数据行单独成段
+    只保留含字段标签的行，内存占用与文档长度无关；
+    第一个标题或参数表之前的内容为公共段（摘要中重复出现的字段不会拆段），其中的字段作为后续各段的默认值
+    （如原料成分只写一次）；全文没有标题或参数表时整篇文档为一条记录
+    segments()产出(类型, 文本)，类型为"context"（公共段）或"record"
+    """
+
+    def __init__(self, extractor: FieldExtractor = None, heading=SEGMENT_HEADING):
+        self.extractor = extractor or FIELD_EXTRACTOR
+        self.heading = heading
+        self._header_cache = {}
+
+    @staticmethod
+    def _lines(chunks) -> Iterator[str]:
+        carry = ""
+        for chunk in chunks:
+            lines = (carry + chunk).split("\n")
+            carry = lines.pop()
+            yield from lines
+        if carry:
+            yield carry
+
+    def _spec_for_header(self, cell: str) -> Optional[FieldSpec]:
+        """表头单元格对应的字段（如"28天抗压强度(MPa)"、"SiO2/%"）"""
+        name = re.split(r"[(（/]", cell.strip(), 1)[0].strip()
+        if name not in self._header_cache:
+            self._header_cache[name] = next(
+                (spec for spec in self.extractor.specs if re.fullmatch(spec.label, name)), None)
+        return self._header_cache[name]
+
+    def _table_header(self, line: str) -> Optional[List[Optional[FieldSpec]]]:
+        """参数表表头中各列对应的字段（非字段列为None），字段列少于两个时不是参数表"""
+        specs = [self._spec_for_header(cell) for cell in line.split("\t")]
+        return specs if sum(spec is not None for spec in specs) >= 2 else None
+
+    @staticmethod
+    def _table_row(specs: List[Optional[FieldSpec]], line: str) -> str:
+        """把参数表的一行转为"标签：取值单位"形式的文本"""
+        lines = []
+        for spec, cell in zip(specs, line.split("\t")):
+            cell = cell.strip()
+            if spec is None or not cell:
+                continue
+            if spec.unit and not cell.endswith(spec.unit):
+                cell += spec.unit
+            lines.append(f"{spec.label}：{cell}")
+        return "\n".join(lines)
+
+    def segments(self, chunks) -> Iterator[tuple]:
+        if self.extractor._label_re is None:
+            self.extractor._compile()
+        label_search = self.extractor._label_re.search
+        found_columns = self.extractor.found_columns
+        lines, columns = [], set()
+        started = False  # 是否已经遇到过实验标题或参数表
+        table = None  # 当前参数表的表头字段
+        keep_next = False  # 上一行以"标签："结尾，取值可能在下一行
+        for line in self._lines(chunks):
+            if table is not None:
+                if line.count("\t") == len(table) - 1:
+                    yield "record", self._table_row(table, line)
+                    continue
+                table = None
+            header = self._table_header(line) if "\t" in line else None
+            heading = header is None and self.heading.match(line) is not None
+            labelled = header is None and (keep_next or label_search(line) is not None)
+            found = found_columns(line) if labelled else set()
+            repeated = started and bool(found & columns)
+            if header or heading or repeated:
+                if columns:
+                    yield ("record" if started else "context"), "\n".join(lines)
+                lines, columns = [], set()
+                started = started or bool(header) or heading
+                if header:
+                    table = header
+                    keep_next = False
+                    continue
+            if labelled or heading:
+                lines.append(line)
+                columns |= found
+            keep_next = labelled and re.search(r"[:：]\s*$", line) is not None
+        if columns:
+            yield "record", "\n".join(lines)
+
+
+def _extract_segment(text: str) -> Dict:
+    """提取一个实验段（可在工作进程中执行；段中只保留了含字段标签的行，只做正则提取）"""
+    return FIELD_EXTRACTOR.extract(text)
+
+
+def process_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    创建进程池，工作进程由forkserver启动（不支持时用spawn），不直接从主进程fork：
+    主进程中往往已有流水线工作线程和存储层写入线程，在多线程进程中fork可能复制到被其他线程持有的锁
+    """
+    import multiprocessing
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context(method))
+
+
+def extract_segmented(chunks, nlp_mode: str = "auto", workers: int = None, window: int = None) -> Iterator[Dict]:
+    """
+    按实验切分后逐段提取，每组实验产出一条记录（公共段的字段补入各条记录的空缺字段；
+    文档只有公共段时，公共段本身作为一条记录）
+    workers>1时各段交给进程池并行提取，最多同时有window段在途，内存占用不随文档长度增长
+    有NLP规则时需要全文：先读入全文切分提取，再对全文运行一次NLP规则（见apply_nlp_rules）
+    """
+    if nlp_mode != "off" and NLP_RULES:
+        text = "".join(chunks)
+        records = list(extract_segmented([text], "off", workers, window))
+        apply_nlp_rules([records], [text], nlp_mode)
+        yield from records
+        return
+    workers = SEGMENT_WORKERS if workers is None else workers
+    window = window or workers * 4
+    executor = process_pool(workers) if workers > 1 else None
+    pending = collections.deque()
+    context, produced = None, 0
+
+    def merge(record: Dict) -> Dict:
+        if context:
+            for column, value in context.items():
+                if record.get(column) is None:
+                    record[column] = value
+        return record
+
+    try:
+        for kind, text in RecordSegmenter().segments(chunks):
+            add_metric("segments")
+            if kind == "context":
+                context = _extract_segment(text)
+                continue
+            produced += 1
+            if executor is None:
+                yield merge(_extract_segment(text))
+                continue
+            pending.append(executor.submit(_extract_segment, text))
+            if len(pending) >= window:
+                yield merge(pending.popleft().result())
+        while pending:
+            yield merge(pending.popleft().result())
+        if context and not produced:
+            yield context
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+
+def benchmark_extraction(path: str = "sample.txt", copies: int = 2000, repeat: int = 5) -> Dict[str, float]:
+    """
+    对比单遍提取与逐字段提取的速度及结果一致性
+    copies：在样本前填充的无关正文段数，用于模拟长文档
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        sample = f.read()
+    filler = "本段为与实验数据无关的正文内容，用于模拟长篇论文中的叙述部分。\n" * copies
+    documents = [sample, filler + sample, sample + filler]
+
+    timings = {}
+    for name, func in (("per_field", FIELD_EXTRACTOR.extract_per_field),
+                       ("single_pass", FIELD_EXTRACTOR.extract)):
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for doc in documents:
+                func(doc)
+            best = min(best, time.perf_counter() - start)
+        timings[name] = best
+
+    mismatches = [doc_index for doc_index, doc in enumerate(documents)
+                  if FIELD_EXTRACTOR.extract(doc) != FIELD_EXTRACTOR.extract_per_field(doc)]
+    total_mb = sum(len(doc.encode('utf-8')) for doc in documents) / 1e6
+    print(f"文档数：{len(documents)}，总大小：{total_mb:.2f}MB")
+    print(f"逐字段提取：{timings['per_field'] * 1000:.2f}ms")
+    print(f"单遍提取：{timings['single_pass'] * 1000:.2f}ms")
+    print(f"加速比：{timings['per_field'] / timings['single_pass']:.1f}x")
+    print("结果一致" if not mismatches else f"结果不一致的文档：{mismatches}")
+    timings["speedup"] = timings['per_field'] / timings['single_pass']
+    timings["mismatches"] = len(mismatches)
+    return timings
+
+
+def benchmark_docx(path: str = None, paragraphs: int = 20000, tables: int = 200) -> Dict[str, float]:
+    """
+    对比流式DOCX读取与python-docx对象树读取的速度和内存峰值
+    未指定path时生成一个包含paragraphs个段落、tables个表格的大文档（需要python-docx）
+    内存峰值用tracemalloc单独测量；lxml在C层分配的内存不计入，python-docx的实际占用更高
+    """
+    import tempfile
+    import tracemalloc
+    cleanup = None
+    if path is None:
+        import docx
+        document = docx.Document()
+        sample_rows = [("SiO2", "64.9%"), ("CaO", "5.3%"), ("28天抗压强度", "45.0MPa")]
+        for index in range(paragraphs):
+            document.add_paragraph(f"第{index}段：高硅铁尾矿胶凝材料的制备与性能研究正文内容。")
+            if tables and index % max(1, paragraphs // tables) == 0:
+                table = document.add_table(rows=len(sample_rows), cols=2)
+                for row, (key, value) in zip(table.rows, sample_rows):
+                    row.cells[0].text, row.cells[1].text = key, value
+        handle, path = tempfile.mkstemp(suffix=".docx")
+        os.close(handle)
+        document.save(path)
+        cleanup = path
+
+    results = {}
+    try:
+        for name, reader in (("python_docx", FileProcessor.read_docx_object),
+                             ("streaming", FileProcessor.read_docx)):
+            start = time.perf_counter()
+            text = reader(path)
+            elapsed = time.perf_counter() - start
+            tracemalloc.start()
+            reader(path)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            results[name] = {"seconds": elapsed, "peak_mb": peak / 1e6, "chars": len(text)}
+            print(f"{name}：{elapsed * 1000:.1f}ms，内存峰值{peak / 1e6:.1f}MB，文本{len(text)}字符")
+        fields = FIELD_EXTRACTOR.extract(FileProcessor.read_docx(path))
+        found = sum(value is not None for value in fields.values())
+        print(f"文件大小：{os.path.getsize(path) / 1e6:.2f}MB，流式读取可提取字段数：{found}")
+        print(f"加速比：{results['python_docx']['seconds'] / results['streaming']['seconds']:.1f}x")
+    finally:
+        if cleanup:
+            os.remove(cleanup)
+    return results
+
+# ----------------------
+# 模块五：启动性能检查
+# ----------------------
+import subprocess
+import sys
+
+# 启动时不应被导入的重量级依赖（都应在对应子系统首次使用时才导入）
+HEAVY_MODULES = ("fitz", "pymupdf", "docx", "requests", "bs4", "tqdm", "matplotlib",
+                 "reportlab", "spacy", "google", "google_auth_oauthlib", "numpy", "pyarrow")
+
+
+def _parse_importtime(stderr: str, module: str) -> tuple:
+    """解析-X importtime输出，返回(模块累计耗时μs, [(自身耗时μs, 被导入模块)])"""
+    block, children, cumulative = [], [], None
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        name = name[1:]
+        entry = (int(self_us), name.strip())
+        if name.startswith(" "):  # 缩进表示被上一层模块导入
+            block.append(entry)
+        elif name.strip() == module:
+            cumulative, children = int(cumulative_us), block + [entry]
+        else:
+            block = []
+    return cumulative, children
+
+
+def check_startup_budget(budget_ms: float = STARTUP_BUDGET_MS, repeat: int = 3) -> int:
+    """
+    启动性能回归检查：在子进程中用-X importtime导入本模块（取repeat次中的最好成绩），
+    导入耗时超出budget_ms或提前导入了重量级依赖时返回1，否则返回0
+    """
+    module = os.path.splitext(os.path.basename(__file__))[0]
+    directory = os.path.dirname(os.path.abspath(__file__))
+    code = f"import sys, {module}; print(' '.join(sorted(sys.modules)))"
+    # 允许写入字节码缓存，第一次导入后的测量不再包含编译源码的时间
+    env = dict(os.environ)
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    best, children, loaded = None, [], set()
+    for _ in range(max(2, repeat)):
+        proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                              cwd=directory, capture_output=True, text=True, env=env)
+        if proc.returncode != 0:
+            print(f"导入失败：{proc.stderr.strip().splitlines()[-1]}")
+            return 1
+        cumulative, entries = _parse_importtime(proc.stderr, module)
+        if cumulative is not None and (best is None or cumulative < best):
+            best, children = cumulative, entries
+        loaded = set(proc.stdout.split())
+
+    heavy = sorted(name for name in HEAVY_MODULES if name in loaded)
+    elapsed_ms = (best or 0) / 1000
+    print(f"导入{module}耗时：{elapsed_ms:.1f}ms（预算{budget_ms:.0f}ms）")
+    for self_us, name in sorted(children, reverse=True)[:5]:
+        print(f"  {self_us / 1000:6.1f}ms  {name}")
+    if heavy:
+        print(f"启动时提前导入了重量级依赖：{', '.join(heavy)}")
+    if best is None or elapsed_ms > budget_ms or heavy:
+        print("启动性能检查未通过")
+        return 1
+    print("启动性能检查通过")
+    return 0
+
+
+# ----------------------
+# 模块六：数据查询
+# ----------------------
+# 常用筛选列的覆盖索引：筛选列在前，强度列在后，范围查询强度时无需回表
+QUERY_INDEXES = {
+    "idx_materials_sio2": ("SiO2_content", "compressive_strength_28d"),
+    "idx_materials_cao": ("CaO_content", "compressive_strength_28d"),
+    "idx_materials_activator_content": ("alkali_activator_content", "compressive_strength_28d"),
+    "idx_materials_curing_temp": ("curing_temp", "compressive_strength_28d"),
+    "idx_materials_water_binder": ("water_binder_ratio", "compressive_strength_28d"),
+    "idx_materials_activator": ("alkali_activator", "curing_method", "compressive_strength_28d"),
+    "idx_materials_strength": ("compressive_strength_28d",),
+}
+# 可查询的列（列名会拼入SQL，只允许白名单中的列）
+QUERY_COLUMNS = {"id", "author", "title", "year", "source_path"} | {spec.column for spec in FIELD_SPECS}
+_AGGREGATES = {"count": "COUNT", "avg": "AVG", "min": "MIN", "max": "MAX", "sum": "SUM",
+               "var": None}  # var：总体方差，两遍计算（先求组均值，再累加离差平方），见MaterialQuery.aggregate
+
+
+class MaterialQuery:
+    """
+    materials表的查询接口：筛选、排序、聚合都在SQL中完成，结果按列返回
+    （as_numpy=True时数值列为float64数组，NULL为nan；文本列为object数组）
+    where条件写法：{"SiO2_content": (64, 70)} 闭区间，None表示不限；
+    {"compressive_strength_28d": (None, None)} 表示非空；{"alkali_activator": "氢氧化钠"} 等值；
+    {"curing_method": ["标准养护法", "蒸汽养护"]} 表示IN
+    """
+
+    def __init__(self, conn: sqlite3.Connection, create_indexes: bool = True):
+        self.conn = conn
+        if create_indexes:
+            self.ensure_indexes()
+
+    def ensure_indexes(self):
+        """创建常用筛选列的覆盖索引（已存在时跳过），新建后更新查询规划统计信息"""
+        existing = {row[0] for row in self.conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'materials'")}
+        missing = {name: cols for name, cols in QUERY_INDEXES.items() if name not in existing}
+        if not missing:
+            return
+        with self.conn:
+            for name, columns in missing.items():
+                self.conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON materials({', '.join(columns)})")
+            self.conn.execute("ANALYZE materials")
+
+    @staticmethod
+    def _check_columns(columns):
+        unknown = [column for column in columns if column not in QUERY_COLUMNS]
+        if unknown:
+            raise ValueError(f"未知的列：{', '.join(unknown)}")
+
+    def _where_clause(self, where: Dict) -> tuple:
+        """把where条件转换为SQL片段和参数"""
+        if not where:
+            return "", []
+        self._check_columns(where)
+        clauses, params = [], []
+        for column, condition in where.items():
+            if isinstance(condition, tuple):
+                low, high = condition
+                if low is None and high is None:
+                    clauses.append(f"{column} IS NOT NULL")
+                if low is not None:
+                    clauses.append(f"{column} >= ?")
+                    params.append(low)
+                if high is not None:
+                    clauses.append(f"{column} <= ?")
+                    params.append(high)
+            elif isinstance(condition, (list, set)):
+                values = list(condition)
+                clauses.append(f"{column} IN ({', '.join('?' * len(values))})")
+                params.extend(values)
+            elif condition is None:
+                clauses.append(f"{column} IS NULL")
+            else:
+                clauses.append(f"{column} = ?")
+                params.append(condition)
+        return " WHERE " + " AND ".join(clauses), params
+
+    @staticmethod
+    def _to_columns(names: List[str], rows: list, as_numpy: bool) -> Dict[str, object]:
+        """行结果转为按列存放的结构"""
+        columns = list(zip(*rows)) if rows else [()] * len(names)
+        if not as_numpy:
+            return {name: list(values) for name, values in zip(names, columns)}
+        import numpy as np
+        result = {}
+        for name, values in zip(names, columns):
+            try:
+                result[name] = np.array(values, dtype=np.float64)
+            except (TypeError, ValueError):
+                result[name] = np.array(values, dtype=object)
+        return result
+
+    def select(self, columns: List[str], where: Dict = None, order_by: str = None,
+               descending: bool = False, limit: int = None, as_numpy: bool = True) -> Dict[str, object]:
+        """按条件查询指定列"""
+        self._check_columns(columns)
+        clause, params = self._where_clause(where)
+        sql = f"SELECT {', '.join(columns)} FROM materials{clause}"
+        if order_by:
+            self._check_columns([order_by])
+            sql += f" ORDER BY {order_by}{' DESC' if descending else ''}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        return self._to_columns(columns, self.conn.execute(sql, params).fetchall(), as_numpy)
+
+    def iter_select(self, columns: List[str], where: Dict = None,
+                    chunk_rows: int = 100_000) -> "Iterator[Dict[str, object]]":
+        """
+        分块查询：每次取chunk_rows行并转为NumPy列数组产出，
+        不会把整张表一次性变成Python对象
+        """
+        import numpy as np
+        self._check_columns(columns)
+        clause, params = self._where_clause(where)
+        cursor = self.conn.execute(f"SELECT {', '.join(columns)} FROM materials{clause}", params)
+        while True:
+            rows = cursor.fetchmany(chunk_rows)
+            if not rows:
+                break
+            try:
+                block = np.array(rows, dtype=np.float64).reshape(len(rows), len(columns))
+                yield {name: block[:, index] for index, name in enumerate(columns)}
+            except (TypeError, ValueError):
+                yield self._to_columns(columns, rows, True)
+
+    def count(self, where: Dict = None) -> int:
+        """统计满足条件的记录数"""
+        clause, params = self._where_clause(where)
+        return self.conn.execute(f"SELECT COUNT(*) FROM materials{clause}", params).fetchone()[0]
+
+    def aggregate(self, column: str, group_by: List[str] = None, where: Dict = None,
+                  funcs=("count", "avg", "min", "max"), as_numpy: bool = True) -> Dict[str, object]:
+        """
+        分组聚合（在SQL中完成），返回分组列及"函数_列名"形式的结果列
+        例如aggregate("compressive_strength_28d", ["alkali_activator"])
+        "var"为总体方差：先在子查询中求各组均值，再按组累加离差平方（不用E[x²]−均值²，避免大数相消损失精度）
+        """
+        group_by = list(group_by or [])
+        self._check_columns([column] + group_by)
+        unknown = [func for func in funcs if func not in _AGGREGATES]
+        if unknown:
+            raise ValueError(f"不支持的聚合函数：{', '.join(unknown)}")
+        clause, params = self._where_clause(where)
+        names = group_by + [f"{func}_{column}" for func in funcs]
+        variance = f"TOTAL(({column} - _mean) * ({column} - _mean)) / COUNT({column})"
+        select = group_by + [variance if func == "var" else f"{_AGGREGATES[func]}({column})" for func in funcs]
+        sql = f"SELECT {', '.join(select)} FROM materials"
+        if "var" in funcs:
+            keys = [f"_key{index}" for index in range(len(group_by))]
+            means = ", ".join([f"{name} AS {key}" for name, key in zip(group_by, keys)] + [f"AVG({column}) AS _mean"])
+            sql = f"WITH _means AS (SELECT {means} FROM materials{clause}" + (
+                f" GROUP BY {', '.join(group_by)}" if group_by else "") + ") " + sql
+            sql += " JOIN _means" + (" ON " + " AND ".join(
+                f"materials.{name} IS _means.{key}" for name, key in zip(group_by, keys)) if group_by else "")
+            params = params * 2
+        sql += clause
+        if group_by:
+            sql += f" GROUP BY {', '.join(group_by)} ORDER BY {', '.join(group_by)}"
+        return self._to_columns(names, self.conn.execute(sql, params).fetchall(), as_numpy)
+
+
+def benchmark_query(rows: int = 1_000_000, repeat: int = 5) -> Dict[str, float]:
+    """在临时数据库中生成rows条随机记录，对比有无索引时范围查询的耗时"""
+    import tempfile
+    directory = tempfile.mkdtemp()
+    conn = sqlite3.connect(os.path.join(directory, "bench.db"))
+    try:
+        conn.execute(f"CREATE TABLE materials (id INTEGER PRIMARY KEY, source_path TEXT, "
+                     f"{', '.join(spec.column for spec in FIELD_SPECS)})")
+        rng = random.Random(0)
+        writer = BatchWriter(conn, batch_size=50000)
+        for _ in range(rows):
+            writer.add({
+                "SiO2_content": rng.uniform(55, 80),
+                "CaO_content": rng.uniform(1, 20),
+                "curing_temp": rng.randint(20, 90),
+                "water_binder_ratio": rng.uniform(0.3, 0.6),
+                "alkali_activator": rng.choice(["氢氧化钠", "水玻璃", "碳酸钠"]),
+                "compressive_strength_28d": rng.uniform(10, 80),
+            })
+        writer.flush()
+        where = {"SiO2_content": (70.0, 70.5)}
+        columns = ["SiO2_content", "compressive_strength_28d"]
+
+        def best_time(query):
+            best = float("inf")
+            for _ in range(repeat):
+                start = time.perf_counter()
+                result = query.select(columns, where=where)
+                best = min(best, time.perf_counter() - start)
+            return best, len(result["SiO2_content"])
+
+        scan, matched = best_time(MaterialQuery(conn, create_indexes=False))
+        start = time.perf_counter()
+        indexed_query = MaterialQuery(conn)
+        build = time.perf_counter() - start
+        indexed, _ = best_time(indexed_query)
+        print(f"记录数：{rows}，命中：{matched}条")
+        print(f"全表扫描：{scan * 1000:.1f}ms，建索引：{build:.1f}s，索引查询：{indexed * 1000:.2f}ms")
+        return {"scan": scan, "indexed": indexed, "index_build": build, "matched": matched}
+    finally:
+        conn.close()
+        import shutil
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+# ----------------------
+# 模块七：统计分析
+# ----------------------
+# 默认分析的相关性组合：(x列, y列)
+ANALYSIS_PAIRS = [
+    ("SiO2_content", "compressive_strength_28d"),
+    ("water_binder_ratio", "compressive_strength_28d"),
+    ("CaO_content", "compressive_strength_28d"),
+    ("curing_temp", "compressive_strength_28d"),
+]
+# 默认的分组统计：分组列
+ANALYSIS_GROUPS = ["alkali_activator", "curing_method"]
+REPORT_CHART_CACHE = ".report_cache"  # 报告图表缓存目录（按数据指纹命名，数据不变时不重绘）
+# 报告明细表的列：(列名, 表头, 列宽)
+REPORT_COLUMNS = [
+    ("id", "ID", 40),
+    ("SiO2_content", "SiO2(%)", 55),
+    ("Al2O3_content", "Al2O3(%)", 55),
+    ("CaO_content", "CaO(%)", 50),
+    ("alkali_activator", "碱活化剂", 70),
+    ("water_binder_ratio", "水灰比", 45),
+    ("curing_temp", "养护温度", 50),
+    ("curing_method", "养护方法", 70),
+    ("compressive_strength_28d", "28天强度", 55),
+    ("flexural_strength_28d", "28天抗折", 55),
+]
+# 图表中文标签
+COLUMN_LABELS = {
+    "compressive_strength_28d": "28天抗压强度（MPa）",
+    "SiO2_content": "SiO2含量（%）",
+    "CaO_content": "CaO含量（%）",
+    "water_binder_ratio": "水灰比",
+    "curing_temp": "养护温度（℃）",
+}
+
+
+class StrengthAnalyzer:
+    """
+    向量化统计分析：从sqlite分块读取列到NumPy中累计统计量，
+    直方图、相关性、分组统计的内存占用只与分块大小有关，与表的行数无关；
+    图表用Agg画布直接写文件，不依赖图形界面
+    """
+
+    def __init__(self, conn: sqlite3.Connection, chunk_rows: int = 200_000):
+        self.query = MaterialQuery(conn)
+        self.chunk_rows = chunk_rows
+
+    def _range(self, column: str, where: Dict = None) -> tuple:
+        """用SQL求列的最小值和最大值"""
+        stats = self.query.aggregate(column, where=where, funcs=("min", "max"), as_numpy=False)
+        return stats[f"min_{column}"][0], stats[f"max_{column}"][0]
+
+    def histogram(self, column: str, bins: int = 20) -> tuple:
+        """分块累计直方图，返回(频数数组, 分箱边界数组)"""
+        import numpy as np
+        where = {column: (None, None)}
+        low, high = self._range(column, where)
+        if low is None:
+            return np.zeros(bins, dtype=np.int64), np.linspace(0, 1, bins + 1)
+        if low == high:
+            low, high = low - 0.5, high + 0.5
+        edges = np.linspace(low, high, bins + 1)
+        counts = np.zeros(bins, dtype=np.int64)
+        for chunk in self.query.iter_select([column], where, self.chunk_rows):
+            counts += np.histogram(chunk[column], bins=edges)[0]
+        return counts, edges
+
+    def correlation(self, x: str, y: str, bins: int = 60) -> Dict[str, object]:
+        """
+        分块计算皮尔逊相关系数和最小二乘拟合（按块合并均值与协方差，数值稳定），
+        同时累计二维直方图用于绘制密度图
+        """
+        import numpy as np
+        where = {x: (None, None), y: (None, None)}
+        x_range, y_range = self._range(x, where), self._range(y, where)
+        n, mean_x, mean_y, m2_x, m2_y, c_xy = 0, 0.0, 0.0, 0.0, 0.0, 0.0
+        density = None
+        if x_range[0] is not None:
+            x_edges = np.linspace(x_range[0], x_range[1] if x_range[1] > x_range[0] else x_range[0] + 1, bins + 1)
+            y_edges = np.linspace(y_range[0], y_range[1] if y_range[1] > y_range[0] else y_range[0] + 1, bins + 1)
+            density = np.zeros((bins, bins), dtype=np.int64)
+            for chunk in self.query.iter_select([x, y], where, self.chunk_rows):
+                xs, ys = chunk[x], chunk[y]
+                k = len(xs)
+                cx, cy = xs.mean(), ys.mean()
+                dx, dy = xs - cx, ys - cy
+                total = n + k
+                delta_x, delta_y = cx - mean_x, cy - mean_y
+                m2_x += (dx * dx).sum() + delta_x * delta_x * n * k / total
+                m2_y += (dy * dy).sum() + delta_y * delta_y * n * k / total
+                c_xy += (dx * dy).sum() + delta_x * delta_y * n * k / total
+                mean_x += delta_x * k / total
+                mean_y += delta_y * k / total
+                n = total
+                density += np.histogram2d(xs, ys, bins=(x_edges, y_edges))[0].astype(np.int64)
+        result = {"x": x, "y": y, "n": n, "pearson_r": None, "slope": None, "intercept": None}
+        if n > 1 and m2_x > 0 and m2_y > 0:
+            result["pearson_r"] = float(c_xy / math.sqrt(m2_x * m2_y))
+            result["slope"] = float(c_xy / m2_x)
+            result["intercept"] = float(mean_y - result["slope"] * mean_x)
+        if density is not None:
+            result["density"], result["x_edges"], result["y_edges"] = density, x_edges, y_edges
+        return result
+
+    def grouped_summary(self, group: str, value: str = "compressive_strength_28d") -> Dict[str, object]:
+        """分组统计（分组和聚合都在SQL中完成）：各组的数量、均值、标准差、最小值、最大值，分组值为空的归入"未知"组"""
+        import numpy as np
+        funcs = ("count", "avg", "var", "min", "max")
+        stats = self.query.aggregate(value, [group], {value: (None, None)}, funcs=funcs, as_numpy=False)
+        count, mean, variance, low, high = (np.array(stats[f"{func}_{value}"], dtype=np.float64) for func in funcs)
+        labels = ["未知" if label is None else str(label) for label in stats[group]]
+        return {group: np.array(labels, dtype=object), "count": count.astype(np.int64), "mean": mean,
+                "std": np.sqrt(np.maximum(variance, 0)), "min": low, "max": high}
+
+    @staticmethod
+    def _figure():
+        """创建不依赖图形界面的Agg画布"""
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        figure = Figure(figsize=(7, 5), dpi=100)
+        FigureCanvasAgg(figure)
+        return figure, figure.add_subplot(1, 1, 1)
+
+    def render_histogram(self, column: str, path: str, bins: int = 20) -> Dict[str, object]:
+        counts, edges = self.histogram(column, bins)
+        figure, axes = self._figure()
+        axes.stairs(counts, edges, fill=True)
+        axes.set_title(f"{COLUMN_LABELS.get(column, column)}分布")
+        axes.set_xlabel(COLUMN_LABELS.get(column, column))
+        axes.set_ylabel("频数")
+        figure.savefig(path)
+        return {"column": column, "counts": counts.tolist(), "edges": edges.tolist()}
+
+    def render_correlation(self, x: str, y: str, path: str) -> Dict[str, object]:
+        result = self.correlation(x, y)
+        figure, axes = self._figure()
+        if "density" in result:
+            import numpy as np
+            axes.pcolormesh(result["x_edges"], result["y_edges"], np.ma.masked_equal(result["density"].T, 0),
+                            cmap="viridis")
+            if result["slope"] is not None:
+                xs = np.array([result["x_edges"][0], result["x_edges"][-1]])
+                axes.plot(xs, result["slope"] * xs + result["intercept"], color="red")
+        r = result["pearson_r"]
+        axes.set_title(f"{COLUMN_LABELS.get(x, x)} 与 {COLUMN_LABELS.get(y, y)}"
+                       + (f"（r = {r:.3f}，n = {result['n']}）" if r is not None else ""))
+        axes.set_xlabel(COLUMN_LABELS.get(x, x))
+        axes.set_ylabel(COLUMN_LABELS.get(y, y))
+        figure.savefig(path)
+        return {key: result[key] for key in ("x", "y", "n", "pearson_r", "slope", "intercept")}
+
+    def render_all(self, output_dir: str = "analysis") -> Dict[str, object]:
+        """生成全部默认分析：强度直方图、相关性图、分组统计（summary.json）"""
+        os.makedirs(output_dir, exist_ok=True)
+        summary = {"histogram": self.render_histogram(
+            "compressive_strength_28d", os.path.join(output_dir, "strength_hist.png"))}
+        summary["correlations"] = [
+            self.render_correlation(x, y, os.path.join(output_dir, f"corr_{x}_{y}.png"))
+            for x, y in ANALYSIS_PAIRS
+        ]
+        summary["groups"] = {}
+        for group in ANALYSIS_GROUPS:
+            stats = self.grouped_summary(group)
+            summary["groups"][group] = [
+                {"group": str(stats[group][i]), "count": int(stats["count"][i]),
+                 "mean": float(stats["mean"][i]), "std": float(stats["std"][i]),
+                 "min": float(stats["min"][i]), "max": float(stats["max"][i])}
+                for i in range(len(stats[group]))
+            ]
+        with open(os.path.join(output_dir, "summary.json"), 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        print(f"分析结果已保存到：{output_dir}")
+        return summary
+
+
+# ----------------------
+# 模块八：报告生成
+# ----------------------
+class ReportGenerator:
+    """
+    PDF报告：汇总统计用SQL聚合，明细表通过游标分批读取逐页绘制，不会把整张表读入内存；
+    注意reportlab会在内存中保留各页压缩后的内容直到save()，内存占用随页数（即PDF大小）增长，
+    并非恒定（5千行约90MB，4万行约110MB峰值RSS）；
+    图表按数据指纹缓存，数据没有变化的图表在重新生成报告时直接复用
+    """
+    PAGE_WIDTH, PAGE_HEIGHT = 595, 842  # A4（pt）
+    MARGIN = 40
+    ROW_HEIGHT = 14
+    FONT = "STSong-Light"  # reportlab内置的中文CID字体，无需额外字体文件
+
+    def __init__(self, conn: sqlite3.Connection, chart_cache: str = REPORT_CHART_CACHE,
+                 fetch_rows: int = 2000):
+        self.conn = conn
+        self.chart_cache = chart_cache
+        self.fetch_rows = fetch_rows
+        self.analyzer = StrengthAnalyzer(conn)
+        self.charts_drawn = 0   # 本次重新绘制的图表数
+        self.charts_cached = 0  # 本次复用缓存的图表数
+
+    # ---------- 页面基础 ----------
+    def _new_page(self, title: str = None):
+        """结束当前页并开始新页，返回新页可用的最高y坐标"""
+        if self._page_started:
+            self.canvas.showPage()
+        self._page_started = True
+        self._page_number += 1
+        self.canvas.setFont(self.FONT, 8)
+        self.canvas.drawRightString(self.PAGE_WIDTH - self.MARGIN, 20, f"第 {self._page_number} 页")
+        y = self.PAGE_HEIGHT - self.MARGIN
+        if title:
+            self.canvas.setFont(self.FONT, 14)
+            self.canvas.drawString(self.MARGIN, y - 14, title)
+            y -= 30
+        return y
+
+    def _draw_table(self, y: float, headers: List[tuple], rows, title: str = None) -> float:
+        """
+        绘制表格，行可以是任意可迭代对象（逐行消费），放不下时自动换页并重复表头；
+        只缓存一页的行，每列用一个文本对象逐行输出（比逐格drawString快一倍左右）
+        """
+        def draw_header(y):
+            self.canvas.setFont(self.FONT, 8)
+            x = self.MARGIN
+            for header, width in headers:
+                self.canvas.drawString(x + 2, y - 10, header)
+                x += width
+            self.canvas.line(self.MARGIN, y - 13, x, y - 13)
+            return y - self.ROW_HEIGHT
+
+        def flush(y, page_rows):
+            x = self.MARGIN
+            for index, (_, width) in enumerate(headers):
+                text = self.canvas.beginText(x + 2, y - 10)
+                text.setFont(self.FONT, 8, leading=self.ROW_HEIGHT)
+                for row in page_rows:
+                    text.textLine(_format_cell(row[index], width))
+                self.canvas.drawText(text)
+                x += width
+            return y - self.ROW_HEIGHT * len(page_rows)
+
+        y = draw_header(y)
+        capacity = int((y - self.MARGIN) // self.ROW_HEIGHT)
+        page_rows = []
+        for row in rows:
+            if len(page_rows) >= capacity:
+                flush(y, page_rows)
+                y = draw_header(self._new_page(title))
+                capacity = int((y - self.MARGIN) // self.ROW_HEIGHT)
+                page_rows = []
+            page_rows.append(row)
+        y = flush(y, page_rows) if page_rows else y
+        return y - self.ROW_HEIGHT
+
+    # ---------- 图表缓存 ----------
+    def _fingerprint(self, columns: List[str]) -> str:
+        """数据指纹：用SQL聚合出行数、最大ID和各列的和与平方和，数据变化时指纹随之变化"""
+        parts = ["COUNT(*)", "MAX(id)"]
+        for column in columns:
+            parts += [f"COUNT({column})", f"TOTAL({column})", f"TOTAL({column} * {column})"]
+        row = self.conn.execute(f"SELECT {', '.join(parts)} FROM materials").fetchone()
+        return hashlib.blake2b(repr((columns, row)).encode('utf-8'), digest_size=10).hexdigest()
+
+    def _chart(self, name: str, columns: List[str], render) -> str:
+        """返回图表文件路径，数据指纹未变时复用缓存"""
+        os.makedirs(self.chart_cache, exist_ok=True)
+        path = os.path.join(self.chart_cache, f"{name}_{self._fingerprint(columns)}.png")
+        if os.path.exists(path):
+            self.charts_cached += 1
+        else:
+            render(path)
+            self.charts_drawn += 1
+        return path
+
+    # ---------- 报告各部分 ----------
+    def _summary_rows(self):
+        """各数值列的统计（一次SQL聚合完成）"""
+        columns = [spec.column for spec in FIELD_SPECS if spec.type is not str]
+        parts = []
+        for column in columns:
+            parts += [f"COUNT({column})", f"AVG({column})", f"MIN({column})", f"MAX({column})"]
+        row = self.conn.execute(f"SELECT {', '.join(parts)} FROM materials").fetchone()
+        for index, column in enumerate(columns):
+            count, mean, low, high = row[index * 4: index * 4 + 4]
+            if count:
+                yield column, count, mean, low, high
+
+    def _detail_rows(self):
+        """明细数据：游标分批读取"""
+        columns = [column for column, _, _ in REPORT_COLUMNS]
+        cursor = self.conn.execute(f"SELECT {', '.join(columns)} FROM materials ORDER BY id")
+        while True:
+            rows = cursor.fetchmany(self.fetch_rows)
+            if not rows:
+                break
+            yield from rows
+
+    def generate(self, path: str = "report.pdf") -> str:
+        """生成报告，返回文件路径"""
+        from reportlab.pdfgen import canvas
+        from reportlab.pdfbase import pdfmetrics
+        from reportlab.pdfbase.cidfonts import UnicodeCIDFont
+        pdfmetrics.registerFont(UnicodeCIDFont(self.FONT))
+
+        self.canvas = canvas.Canvas(path, pagesize=(self.PAGE_WIDTH, self.PAGE_HEIGHT), pageCompression=1)
+        self._page_started = False
+        self._page_number = 0
+        self.charts_drawn = self.charts_cached = 0
+        total = self.conn.execute("SELECT COUNT(*) FROM materials").fetchone()[0]
+
+        # 封面与汇总统计
+        y = self._new_page()
+        self.canvas.setFont(self.FONT, 20)
+        self.canvas.drawString(self.MARGIN, y - 20, "实验报告")
+        self.canvas.setFont(self.FONT, 10)
+        self.canvas.drawString(self.MARGIN, y - 45, f"高硅铁尾矿复合胶凝材料数据，共{total}条记录")
+        self.canvas.drawString(self.MARGIN, y - 60, f"生成时间：{time.strftime('%Y-%m-%d %H:%M:%S')}")
+        y -= 90
+        self.canvas.setFont(self.FONT, 12)
+        self.canvas.drawString(self.MARGIN, y, "数值字段统计")
+        y = self._draw_table(y - 6, [("字段", 180), ("有效记录", 70), ("平均值", 80), ("最小值", 80), ("最大值", 80)],
+                             self._summary_rows(), "数值字段统计（续）")
+
+        # 分组统计
+        for group in ANALYSIS_GROUPS:
+            stats = self.analyzer.grouped_summary(group)
+            rows = zip(stats[group], stats["count"], stats["mean"], stats["std"], stats["min"], stats["max"])
+            if y < self.MARGIN + 80:
+                y = self._new_page()
+            self.canvas.setFont(self.FONT, 12)
+            self.canvas.drawString(self.MARGIN, y, f"按{group}分组的28天抗压强度")
+            y = self._draw_table(y - 6, [("分组", 120), ("数量", 60), ("平均值", 70), ("标准差", 70),
+                                         ("最小值", 70), ("最大值", 70)], rows, "分组统计（续）")
+
+        # 图表（每页两张）
+        charts = [self._chart("strength_hist", ["compressive_strength_28d"],
+                              lambda p: self.analyzer.render_histogram("compressive_strength_28d", p))]
+        for x, y_column in ANALYSIS_PAIRS:
+            charts.append(self._chart(f"corr_{x}_{y_column}", [x, y_column],
+                                      lambda p, x=x, y_column=y_column: self.analyzer.render_correlation(x, y_column, p)))
+        for index, chart in enumerate(charts):
+            if index % 2 == 0:
+                y = self._new_page("图表")
+            self.canvas.drawImage(chart, self.MARGIN, y - 360, width=self.PAGE_WIDTH - 2 * self.MARGIN,
+                                  height=350, preserveAspectRatio=True)
+            y -= 370
+
+        # 明细数据
+        y = self._new_page("数据明细")
+        headers = [(header, width) for _, header, width in REPORT_COLUMNS]
+        self._draw_table(y, headers, self._detail_rows(), "数据明细（续）")
+
+        self.canvas.save()
+        print(f"报告已生成：{path}（{self._page_number}页，重绘图表{self.charts_drawn}张，"
+              f"复用缓存{self.charts_cached}张）")
+        return path
+
+
+def _format_cell(value, width: float) -> str:
+    """格式化表格单元格，按列宽截断"""
+    if value is None or (isinstance(value, float) and value != value):
+        text = "-"
+    elif isinstance(value, float):
+        text = f"{value:.4g}"
+    else:
+        text = str(value)
+    limit = max(3, int(width / 5))
+    return text if len(text) <= limit else text[:limit - 1] + "…"
+
+
+def benchmark_report(rows: int = 100_000) -> Dict[str, float]:
+    """
+    在临时数据库中生成rows条记录，测量报告生成耗时、进程内存峰值，以及图表缓存命中后的耗时
+    （内存用进程峰值RSS衡量，tracemalloc会让reportlab慢十倍，不适合测耗时）
+    """
+    import tempfile
+    import shutil
+    import resource
+    directory = tempfile.mkdtemp()
+    conn = sqlite3.connect(os.path.join(directory, "bench.db"))
+    try:
+        conn.execute(f"CREATE TABLE materials (id INTEGER PRIMARY KEY, source_path TEXT, "
+                     f"{', '.join(spec.column for spec in FIELD_SPECS)})")
+        rng = random.Random(0)
+        with BatchWriter(conn, batch_size=50000) as writer:
+            for _ in range(rows):
+                silica = rng.uniform(60, 80)
+                writer.add({
+                    "SiO2_content": silica, "Al2O3_content": rng.uniform(5, 20), "CaO_content": rng.uniform(1, 10),
+                    "alkali_activator": rng.choice(["氢氧化钠", "水玻璃", "碳酸钠"]),
+                    "water_binder_ratio": rng.uniform(0.3, 0.6), "curing_temp": rng.randint(20, 90),
+                    "curing_method": rng.choice(["标准养护法", "蒸汽养护"]),
+                    "compressive_strength_28d": silica * 0.6 + rng.gauss(0, 5),
+                    "flexural_strength_28d": rng.uniform(3, 12),
+                })
+        generator = ReportGenerator(conn, chart_cache=os.path.join(directory, "charts"))
+        results = {}
+        for name in ("first", "cached"):
+            start = time.perf_counter()
+            generator.generate(os.path.join(directory, f"{name}.pdf"))
+            results[name] = time.perf_counter() - start
+        # Linux下ru_maxrss单位为KB
+        results["peak_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        size = os.path.getsize(os.path.join(directory, "first.pdf")) / 1e6
+        print(f"记录数：{rows}，报告大小：{size:.1f}MB，进程内存峰值：{results['peak_rss_mb']:.0f}MB")
+        print(f"首次生成：{results['first']:.1f}s，图表缓存命中后：{results['cached']:.1f}s")
+        return results
+    finally:
+        conn.close()
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+# ----------------------
+# 模块九：处理流水线
+# ----------------------
+
+
+class PipelineItem:
+    """流水线中流转的一条数据：文件（path）或已取得的文本（text），各阶段在上面填写结果"""
+    __slots__ = ("seq", "key", "path", "text", "meta", "digest", "records", "status", "error")
+
+    def __init__(self, key: str = None, path: str = None, text: str = None, meta: dict = None):
+        self.seq = 0
+        self.key = key or path
+        self.path = path
+        self.text = text
+        self.meta = meta or {}
+        self.digest = None
+        self.records = []
+        self.status = None  # "unchanged"表示内容未变化，后续阶段直接跳过
+        self.error = None
+
+
+class PipelineSource:
+    """数据源接口：items()逐个产出PipelineItem，文件夹和爬虫都通过它接入流水线"""
+
+    def items(self) -> Iterator[PipelineItem]:
+        raise NotImplementedError
+
+
+class FolderSource(PipelineSource):
+    """文件夹数据源：manifest为{路径: (大小, 修改时间, 内容哈希, 记录数)}，大小和修改时间都未变化的文件直接跳过"""
+
+    def __init__(self, folder_path: str, manifest: Dict[str, tuple] = None):
+        manifest = manifest or {}
+        self.files = []  # [(路径, 大小, 修改时间, 清单中的记录)]
+        self.skipped = 0
+        for filename in os.listdir(folder_path):
+            if os.path.splitext(filename)[1].lower() not in SUPPORTED_EXT:
+                continue
+            filepath = os.path.abspath(os.path.join(folder_path, filename))
+            st = os.stat(filepath)
+            known = manifest.get(filepath)
+            if known and known[0] == st.st_size and known[1] == st.st_mtime_ns:
+                self.skipped += 1
+                continue
+            self.files.append((filepath, st.st_size, st.st_mtime_ns, known))
+
+    def items(self) -> Iterator[PipelineItem]:
+        for filepath, size, mtime_ns, known in self.files:
+            yield PipelineItem(path=filepath, meta={"size": size, "mtime_ns": mtime_ns, "known": known,
+                                                    "known_hash": known[2] if known else None})
+
+
+class CrawlerSource(PipelineSource):
+    """爬虫数据源：adapt把爬取的数据字典转为文本，crawl_kwargs传给MaterialCrawler.crawl_links"""
+
+    def __init__(self, crawler: "MaterialCrawler", adapt, **crawl_kwargs):
+        self.crawler = crawler
+        self.adapt = adapt
+        self.crawl_kwargs = crawl_kwargs
+
+    def items(self) -> Iterator[PipelineItem]:
+        pages = self.crawler.crawl_links(**self.crawl_kwargs)
+        try:
+            for data in pages:
+                yield PipelineItem(key=data.get('title'), text=self.adapt(data), meta=data)
+        finally:
+            pages.close()
+
+
+def _read_stage(item: PipelineItem) -> PipelineItem:
+    """读取阶段：计算文件内容哈希，与清单一致时标记为未变化"""
+    if item.path:
+        item.digest = FileProcessor.file_hash(item.path)
+        if item.digest == item.meta.get("known_hash"):
+            item.status = "unchanged"
+    return item
+
+
+def _extract_stage(item: PipelineItem, nlp: bool = False, split_records: bool = False) -> PipelineItem:
+    """
+    提取阶段：解析文件并用正则提取字段（文本数据源直接提取）；split_records时每组实验一条记录
+    nlp为True（之后有NLP阶段）时读入全文并保留在item.text中，由NLP阶段分批处理
+    （在工作进程中运行，不读取可被配置或运行时修改的全局设置，由调用方传入）
+    """
+    if item.text is None and not nlp:
+        # 纯正则提取时逐块读取；不拆分时字段找齐后不再读取剩余页面
+        chars = [0]
+
+        def chunks():
+            for chunk in FileProcessor.iter_file(item.path):
+                chars[0] += len(chunk)
+                yield chunk
+
+        if split_records:
+            item.records = list(extract_segmented(chunks(), "off"))
+        else:
+            item.records = [FIELD_EXTRACTOR.extract_stream(chunks())]
+        if not chars[0]:
+            item.error = "未读取到文本内容"
+        return item
+    text = item.text if item.text is not None else FileProcessor.read_file(item.path)
+    if not text:
+        item.error = "未读取到文本内容"
+        return item
+    item.records = list(extract_segmented([text], "off")) if split_records else [FIELD_EXTRACTOR.extract(text)]
+    item.text = text
+    return item
+
+
+def _nlp_stage(items: List[PipelineItem], nlp_mode: str = "auto") -> List[PipelineItem]:
+    """NLP阶段（分批）：一批文档的全文一起交给nlp.pipe，规则结果补入各条记录的空缺字段"""
+    apply_nlp_rules([item.records if item.text else [] for item in items],
+                    [item.text or "" for item in items], nlp_mode, batch_size=len(items))
+    for item in items:
+        if item.path is not None:
+            item.text = None  # 文件的全文只在本阶段需要
+    return items
+
+
+def _validate_stage(item: PipelineItem) -> PipelineItem:
+    """验证阶段：只保留通过验证的记录"""
+    with metric_timer("validate"):
+        item.records = [record for record in item.records if MaterialDataProcessor.validate_data(record)]
+    return item
+
+
+class Stage:
+    """
+    流水线阶段：func接收并返回PipelineItem
+    mode为"thread"时在workers个线程中运行（适合I/O），为"process"时交给workers个进程（适合解析），
+    进程模式下func必须是可pickle的模块级函数（或其functools.partial）
+    batch_size>1时（仅限线程模式）func接收并返回PipelineItem列表：工作者每次取出一条后，
+    再取走队列中已经在等待的数据，最多batch_size条（不为凑满一批而等待）
+    """
+
+    def __init__(self, name: str, func, workers: int = 1, mode: str = "thread",
+                 queue_size: int = PIPELINE_QUEUE_SIZE, batch_size: int = 1):
+        if mode not in ("thread", "process"):
+            raise ValueError(f"未知的阶段模式：{mode}")
+        if batch_size > 1 and mode != "thread":
+            raise ValueError("只有线程模式的阶段可以分批处理")
+        self.batch_size = max(1, batch_size)
+        self.name = name
+        self.func = func
+        self.workers = max(1, workers)
+        self.mode = mode
+        self.queue_size = queue_size
+        self.processed = 0  # 已处理条数
+        self.busy = 0.0  # 各工作者累计处理耗时（秒）
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        """记录一条数据的处理耗时（多个工作者线程同时调用）"""
+        with self._lock:
+            self.processed += 1
+            self.busy += seconds
+
+
+_END = object()  # 流结束标记
+
+
+def _close(items):
+    """提前结束时关闭数据源的生成器"""
+    close = getattr(items, "close", None)
+    if close is not None:
+        close()
+
+
+def _run_stage(func, item: PipelineItem) -> PipelineItem:
+    """执行阶段函数，并把期间记录的耗时和计数累加到item.meta["metrics"]（在工作进程中同样有效）"""
+    sample = MetricSample()
+    with recording(sample):
+        item = func(item)
+    item.meta["metrics"] = sample.merge_into(item.meta.get("metrics"))
+    return item
+
+
+class StagePool:
+    """
+    进程模式阶段的进程池。工作进程意外退出（如解析库在某个损坏文件上段错误）时，
+    ProcessPoolExecutor会失效，之后提交的任务全部失败；此时换一个新的进程池，
+    并把受影响的数据放到单独的进程中重试一次，重试仍然崩溃的只有这一条标记为失败
+    """
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self.restarts = 0  # 重建进程池的次数
+        self._lock = threading.Lock()
+        self._executor = self._start()
+
+    def _start(self) -> ProcessPoolExecutor:
+        executor = process_pool(self.workers)  # 在工作线程中重建时也不会在多线程进程中fork
+        executor.submit(int).result()  # 预先创建好工作进程
+        return executor
+
+    def run(self, func, item: PipelineItem) -> PipelineItem:
+        executor = self._executor
+        try:
+            return executor.submit(_run_stage, func, item).result()
+        except BrokenProcessPool:
+            with self._lock:
+                if self._executor is executor:  # 同时失败的其他工作线程不重复重建
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    self._executor = self._start()
+                    self.restarts += 1
+        # 崩溃时同一进程池中正在处理的数据都会失败，分不清是哪一条导致的，所以每条单独重试
+        with process_pool(1) as isolated:
+            try:
+                return isolated.submit(_run_stage, func, item).result()
+            except BrokenProcessPool:
+                raise RuntimeError("工作进程异常退出（单独重试后仍然崩溃）")
+
+    def shutdown(self):
+        self._executor.shutdown(cancel_futures=True)
+
+
+def _apply_batch(stage: Stage, items: List[PipelineItem]) -> List[PipelineItem]:
+    """让一批数据通过分批处理的阶段：出错或未变化的数据不交给func；异常记入这一批每条数据的item.error"""
+    active = [item for item in items if item.error is None and item.status is None]
+    if not active:
+        return items
+    start = time.perf_counter()
+    sample = MetricSample()
+    try:
+        with recording(sample):
+            stage.func(active)
+    except Exception as e:
+        for item in active:
+            item.error = str(e)
+    seconds = time.perf_counter() - start
+    # 整批的操作耗时记在第一条上，汇总时总数不变
+    active[0].meta["metrics"] = sample.merge_into(active[0].meta.get("metrics"))
+    for item in active:
+        stage.record(seconds / len(active))
+        item.meta.setdefault("stage_seconds", {})[stage.name] = seconds / len(active)
+    return items
+
+
+def _apply_stage(stage: Stage, item: PipelineItem, executor: StagePool = None) -> PipelineItem:
+    """让一条数据通过一个阶段：记录阶段耗时，异常记入item.error"""
+    start = time.perf_counter()
+    try:
+        if executor is not None:
+            item = executor.run(stage.func, item)
+        else:
+            item = _run_stage(stage.func, item)
+    except Exception as e:
+        item.error = str(e)
+    seconds = time.perf_counter() - start
+    stage.record(seconds)
+    item.meta.setdefault("stage_seconds", {})[stage.name] = seconds
+    return item
+
+
+class Pipeline:
+    """
+    分阶段处理流水线：数据源 -> 各阶段 -> 主线程中的sink
+    相邻阶段之间是有界队列，下游处理不过来时上游在put处等待，内存占用不随数据量增长；
+    每个阶段的并发数独立设置，慢阶段多开工作者即可，不会拖住其他阶段。
+    出错或标记为未变化的数据跳过后续阶段，但仍会交给sink，便于记录
+    """
+
+    def __init__(self, stages: List[Stage]):
+        self.stages = list(stages)  # 可按需插入自定义阶段
+
+    def run(self, source: PipelineSource, sink, ordered: bool = False, inline: bool = False) -> int:
+        """
+        运行流水线直到数据源耗尽，返回交给sink的数据条数；ordered为True时按数据源顺序交给sink
+        inline为True时所有阶段都在当前线程中逐条执行（用于性能分析，cProfile只能看到当前线程）
+        """
+        if inline:
+            delivered = 0
+            items = source.items()
+            try:
+                for seq, item in enumerate(items):
+                    item.seq = seq
+                    for stage in self.stages:
+                        if stage.batch_size > 1:
+                            item = _apply_batch(stage, [item])[0]
+                        elif item.error is None and item.status is None:
+                            item = _apply_stage(stage, item)
+                    sink(item)
+                    delivered += 1
+            finally:
+                _close(items)
+            return delivered
+
+        stop = threading.Event()
+        errors = []
+        queues = [queue.Queue(stage.queue_size) for stage in self.stages] + [queue.Queue(PIPELINE_QUEUE_SIZE)]
+        threads, executors = [], []
+
+        def put(q, item):
+            while not stop.is_set():
+                try:
+                    q.put(item, timeout=0.1)
+                    return
+                except queue.Full:
+                    pass
+
+        def get(q):
+            while not stop.is_set():
+                try:
+                    return q.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            return _END
+
+        def feed():
+            items = source.items()
+            try:
+                for seq, item in enumerate(items):
+                    if stop.is_set():
+                        break  # sink出错或被中断时不再从数据源取数据（爬虫不再继续请求）
+                    item.seq = seq
+                    put(queues[0], item)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                _close(items)  # 让数据源生成器的finally（如保存爬取检查点）在本线程中执行
+            put(queues[0], _END)
+
+        def work(stage, inq, outq, executor, remaining):
+            while True:
+                item = get(inq)
+                if item is _END:
+                    if not stop.is_set():
+                        put(inq, _END)  # 让同阶段的其他工作者也能结束
+                    with remaining[1]:
+                        remaining[0] -= 1
+                        last = remaining[0] == 0
+                    if last:
+                        put(outq, _END)
+                    return
+                if stage.batch_size > 1:
+                    batch = [item]
+                    while len(batch) < stage.batch_size:
+                        try:
+                            item = inq.get_nowait()
+                        except queue.Empty:
+                            break
+                        if item is _END:
+                            put(inq, _END)  # 处理完这一批后再结束
+                            break
+                        batch.append(item)
+                    for item in _apply_batch(stage, batch):
+                        put(outq, item)
+                    continue
+                if item.error is None and item.status is None:
+                    item = _apply_stage(stage, item, executor)
+                put(outq, item)
+
+        try:
+            for index, stage in enumerate(self.stages):
+                executor = None
+                if stage.mode == "process" and stage.workers > 1:
+                    # 在启动各线程之前创建好工作进程（预热），第一条数据不必等待进程启动
+                    executor = StagePool(stage.workers)
+                    executors.append(executor)
+                remaining = [stage.workers, threading.Lock()]
+                for _ in range(stage.workers):
+                    threads.append(threading.Thread(
+                        target=work, args=(stage, queues[index], queues[index + 1], executor, remaining),
+                        daemon=True))
+            threads.append(threading.Thread(target=feed, daemon=True))
+            for thread in threads:
+                thread.start()
+
+            delivered, pending, next_seq = 0, {}, 0
+            while True:
+                item = get(queues[-1])
+                if item is _END:
+                    break
+                if not ordered:
+                    sink(item)
+                    delivered += 1
+                    continue
+                pending[item.seq] = item
+                while next_seq in pending:
+                    sink(pending.pop(next_seq))
+                    next_seq += 1
+                    delivered += 1
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+            for executor in executors:
+                executor.shutdown()
+        if errors:
+            raise errors[0]
+        return delivered
+
+
+# ----------------------
+# 模块十：性能指标
+# ----------------------
+import json
+
+_METRICS = threading.local()  # 当前线程的指标记录器，未开启记录时为None
+
+
+@contextlib.contextmanager
+def recording(recorder):
+    """在当前线程中把metric_timer/add_metric的数据记到recorder（MetricSample或IngestMetrics）"""
+    previous = getattr(_METRICS, "recorder", None)
+    _METRICS.recorder = recorder
+    try:
+        yield recorder
+    finally:
+        _METRICS.recorder = previous
+
+
+@contextlib.contextmanager
+def metric_timer(name: str):
+    """记录代码块耗时；当前线程没有记录器时几乎没有开销"""
+    recorder = getattr(_METRICS, "recorder", None)
+    if recorder is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        recorder.add_time(name, time.perf_counter() - start)
+
+
+def add_metric_time(name: str, seconds: float):
+    """记录一段已测得的耗时（用于生成器等不便使用metric_timer的地方）"""
+    recorder = getattr(_METRICS, "recorder", None)
+    if recorder is not None:
+        recorder.add_time(name, seconds)
+
+
+def add_metric(name: str, value: float = 1):
+    """累加计数（如页数）"""
+    recorder = getattr(_METRICS, "recorder", None)
+    if recorder is not None:
+        recorder.add_count(name, value)
+
+
+class MetricSample:
+    """单条数据在一个阶段中记录的耗时和计数（可pickle，随PipelineItem从工作进程传回）"""
+    __slots__ = ("timings", "counts")
+
+    def __init__(self):
+        self.timings = {}  # 操作名: [次数, 总耗时]
+        self.counts = {}
+
+    def add_time(self, name: str, seconds: float):
+        entry = self.timings.get(name)
+        if entry is None:
+            self.timings[name] = [1, seconds]
+        else:
+            entry[0] += 1
+            entry[1] += seconds
+
+    def add_count(self, name: str, value: float):
+        self.counts[name] = self.counts.get(name, 0) + value
+
+    def merge_into(self, data: dict = None) -> dict:
+        """合并到以前阶段的结果（{"timings": ..., "counts": ...}）中并返回"""
+        data = data or {"timings": {}, "counts": {}}
+        for name, (calls, seconds) in self.timings.items():
+            entry = data["timings"].setdefault(name, [0, 0.0])
+            entry[0] += calls
+            entry[1] += seconds
+        for name, value in self.counts.items():
+            data["counts"][name] = data["counts"].get(name, 0) + value
+        return data
+
+
+class IngestMetrics:
+    """
+    一次批量处理的汇总指标：各阶段和各操作（PDF解析、表格识别、正则、NLP、验证、数据库提交）的耗时，
+    处理的字节数和页数，各字段命中率，以及最慢的文件
+    """
+
+    def __init__(self, slowest: int = 10):
+        self._lock = threading.Lock()
+        self.timings = {}  # 操作名: [次数, 总耗时, 单次最长耗时]
+        self.counts = {}
+        self.stages = {}  # 阶段名: {"workers", "mode", "processed", "busy_seconds"}
+        self.field_hits = {spec.column: 0 for spec in FIELD_SPECS}
+        self.items = self.failed = self.unchanged = self.records = self.bytes = 0
+        self.write_failed = 0  # 写入数据库失败的记录数
+        self.slowest_limit = slowest
+        self._slowest = []  # 最小堆：(耗时, 路径)
+        self._started = time.perf_counter()
+        self.elapsed = 0.0
+
+    def add_time(self, name: str, seconds: float, calls: int = 1, longest: float = None):
+        with self._lock:
+            entry = self.timings.setdefault(name, [0, 0.0, 0.0])
+            entry[0] += calls
+            entry[1] += seconds
+            entry[2] = max(entry[2], seconds if longest is None else longest)
+
+    def add_count(self, name: str, value: float):
+        with self._lock:
+            self.counts[name] = self.counts.get(name, 0) + value
+
+    def observe_item(self, item: "PipelineItem"):
+        """汇总一条流水线数据（在sink中调用）"""
+        data = item.meta.get("metrics") or {"timings": {}, "counts": {}}
+        for name, (calls, seconds) in data["timings"].items():
+            self.add_time(name, seconds, calls, seconds / calls)
+        for name, value in data["counts"].items():
+            self.add_count(name, value)
+        self.items += 1
+        self.bytes += item.meta.get("size") or len((item.text or "").encode('utf-8'))
+        if item.error:
+            self.failed += 1
+        elif item.status == "unchanged":
+            self.unchanged += 1
+        for record in (item.records if not item.error else []):
+            self.records += 1
+            for column in self.field_hits:
+                if record.get(column) is not None:
+                    self.field_hits[column] += 1
+        seconds = sum(item.meta.get("stage_seconds", {}).values())
+        entry = (seconds, item.key or "")
+        if len(self._slowest) < self.slowest_limit:
+            heapq.heappush(self._slowest, entry)
+        elif entry > self._slowest[0]:
+            heapq.heapreplace(self._slowest, entry)
+
+    def finish(self, pipeline: "Pipeline" = None):
+        """结束计时，并记录流水线各阶段的统计"""
+        self.elapsed = time.perf_counter() - self._started
+        for stage in (pipeline.stages if pipeline else []):
+            self.stages[stage.name] = {"workers": stage.workers, "mode": stage.mode,
+                                       "processed": stage.processed, "busy_seconds": stage.busy}
+
+    @property
+    def slowest_files(self) -> List[tuple]:
+        return sorted(self._slowest, reverse=True)
+
+    def field_hit_rates(self) -> Dict[str, float]:
+        return {column: hits / self.records if self.records else 0.0
+                for column, hits in self.field_hits.items()}
+
+    def to_dict(self) -> dict:
+        return {
+            "elapsed_seconds": self.elapsed,
+            "items": self.items, "failed": self.failed, "unchanged": self.unchanged,
+            "records": self.records, "write_failed": self.write_failed,
+            "bytes": self.bytes, "pages": self.counts.get("pages", 0),
+            "stages": self.stages,
+            "operations": {name: {"calls": calls, "seconds": seconds, "max_seconds": longest}
+                           for name, (calls, seconds, longest) in self.timings.items()},
+            "counts": self.counts,
+            "field_hit_rates": self.field_hit_rates(),
+            "slowest_files": [{"path": path, "seconds": seconds} for seconds, path in self.slowest_files],
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), ensure_ascii=False, indent=2)
+
+    def to_prometheus(self, prefix: str = "ingest") -> str:
+        """Prometheus文本格式（可写入node_exporter的textfile目录）"""
+        def escape(value) -> str:
+            return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+            for labels, value in samples:
+                label_text = ",".join(f'{key}="{escape(val)}"' for key, val in labels.items())
+                lines.append(f"{prefix}_{name}{{{label_text}}} {value}" if label_text else f"{prefix}_{name} {value}")
+
+        metric("duration_seconds", "gauge", "Wall time of the last run", [({}, self.elapsed)])
+        metric("items_total", "counter", "Items delivered to the sink", [({}, self.items)])
+        metric("failed_total", "counter", "Items that failed", [({}, self.failed)])
+        metric("unchanged_total", "counter", "Items skipped because content was unchanged", [({}, self.unchanged)])
+        metric("records_total", "counter", "Records that passed validation", [({}, self.records)])
+        metric("bytes_total", "counter", "Input bytes processed", [({}, self.bytes)])
+        metric("pages_total", "counter", "PDF pages processed", [({}, self.counts.get("pages", 0))])
+        metric("stage_busy_seconds_total", "counter", "Time spent inside each pipeline stage",
+               [({"stage": name}, stage["busy_seconds"]) for name, stage in self.stages.items()])
+        metric("stage_processed_total", "counter", "Items processed by each pipeline stage",
+               [({"stage": name}, stage["processed"]) for name, stage in self.stages.items()])
+        metric("operation_seconds_total", "counter", "Time spent in each instrumented operation",
+               [({"operation": name}, seconds) for name, (_, seconds, _) in self.timings.items()])
+        metric("operation_calls_total", "counter", "Calls of each instrumented operation",
+               [({"operation": name}, calls) for name, (calls, _, _) in self.timings.items()])
+        metric("field_hit_ratio", "gauge", "Share of records in which each field was found",
+               [({"field": column}, rate) for column, rate in self.field_hit_rates().items()])
+        metric("slowest_file_seconds", "gauge", "Processing time of the slowest files",
+               [({"path": path}, seconds) for seconds, path in self.slowest_files])
+        return "\n".join(lines) + "\n"
+
+    def export(self, path: str):
+        """按扩展名导出：.prom为Prometheus文本格式，其他为JSON"""
+        content = self.to_prometheus() if path.endswith('.prom') else self.to_json()
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        print(f"性能指标已导出：{path}")
+
+    def summary(self, top: int = 5):
+        """打印简要报告"""
+        print(f"总耗时{self.elapsed:.2f}s，处理{self.items}个文件（{self.bytes / 1e6:.1f}MB，"
+              f"{self.counts.get('pages', 0)}页），失败{self.failed}个，未变化{self.unchanged}个")
+        for name, stage in self.stages.items():
+            print(f"  阶段{name}（{stage['mode']}×{stage['workers']}）：处理{stage['processed']}条，"
+                  f"累计{stage['busy_seconds']:.2f}s")
+        for name, (calls, seconds, longest) in sorted(self.timings.items(), key=lambda kv: -kv[1][1]):
+            print(f"  {name}：{calls}次，累计{seconds:.3f}s，最长{longest * 1000:.1f}ms")
+        print("  最慢的文件：")
+        for seconds, path in self.slowest_files[:top]:
+            print(f"    {seconds:.3f}s  {path}")
+        missing = [column for column, rate in self.field_hit_rates().items() if rate == 0]
+        if self.records and missing:
+            print(f"  从未提取到的字段：{', '.join(missing)}")
+
+
+@contextlib.contextmanager
+def profiling(mode: str = None, output: str = None, top: int = 20):
+    """
+    可选的性能分析：mode为"cprofile"时打印累计耗时最多的函数（output不为空时另存.prof文件，
+    可用snakeviz等工具查看），为"tracemalloc"时打印内存分配最多的代码行和峰值；为None时不做任何事
+    """
+    if not mode:
+        yield
+        return
+    if mode == "cprofile":
+        import cProfile
+        import pstats
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            if output:
+                profiler.dump_stats(output)
+            pstats.Stats(profiler).sort_stats("cumulative").print_stats(top)
+    elif mode == "tracemalloc":
+        import tracemalloc
+        tracemalloc.start(10)
+        try:
+            yield
+        finally:
+            snapshot = tracemalloc.take_snapshot()
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"内存峰值：{peak / 1e6:.1f}MB，分配最多的代码行：")
+            for stat in snapshot.statistics("lineno")[:top]:
+                print(f"  {stat}")
+    else:
+        raise ValueError(f"未知的性能分析模式：{mode}")
+
+
+# ----------------------
+# 模块十一：命令行
+# ----------------------
+# config.ini中的(节, 键) -> 基础配置区中被覆盖的设置，值按默认值的类型转换
+CONFIG_KEYS = {
+    ("database", "path"): "DATABASE_NAME",
+    ("database", "synchronous"): "DB_SYNCHRONOUS",
+    ("crawler", "seed_url"): "CRAWL_SEED_URL",
+    ("crawler", "max_pages"): "CRAWL_MAX_PAGES",
+    ("crawler", "max_depth"): "CRAWL_MAX_DEPTH",
+    ("crawler", "concurrency"): "CRAWL_CONCURRENCY",
+    ("crawler", "rate_per_host"): "CRAWL_RATE_PER_HOST",
+    ("ingest", "workers"): "INGEST_WORKERS",
+    ("ingest", "split_records"): "SPLIT_RECORDS",
+}
+# 退出码
+EXIT_OK = 0
+EXIT_PARTIAL = 1  # 任务完成，但有文件/页面处理失败（或基准检查未通过）
+EXIT_USAGE = 2  # 参数或配置错误（与argparse一致）
+EXIT_ERROR = 3  # 运行中出错，任务未完成（可直接重跑续做）
+EXIT_INTERRUPTED = 130
+
+
+def load_config(path: str = CONFIG_PATH) -> Dict[str, object]:
+    """读取配置文件，覆盖基础配置区的同名设置，返回实际生效的设置；文件不存在时保持默认"""
+    import configparser
+    parser = configparser.ConfigParser()
+    if not parser.read(path, encoding='utf-8'):
+        return {}
+    applied = {}
+    for (section, key), name in CONFIG_KEYS.items():
+        if not parser.has_option(section, key):
+            continue
+        raw = parser.get(section, key).strip()
+        try:
+            if isinstance(globals()[name], bool):
+                value = parser.getboolean(section, key)  # bool("false")为True，需按yes/no/true/false解析
+            else:
+                value = type(globals()[name])(raw)
+        except ValueError:
+            raise ValueError(f"配置项[{section}] {key}的值无效：{raw}")
+        globals()[name] = value
+        applied[name] = value
+    return applied
+
+
+class JobState:
+    """
+    批处理任务状态文件（JSON，每次写入先写临时文件再替换，崩溃时不会留下半个文件）
+    已完成的工作由入库清单（ingest_manifest）和待爬队列检查点保证不重做，
+    状态文件记录进度与失败项，并让重跑的同一任务知道自己是在续做
+    """
+
+    def __init__(self, path: str, command: str, args: Dict[str, object], save_interval: float = 2.0):
+        self.path = path
+        self.save_interval = save_interval
+        self._saved_at = 0.0
+        previous = {}
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    previous = json.load(f)
+            except (OSError, ValueError):
+                previous = {}
+        self.resumed = (previous.get("status") == "running" and previous.get("command") == command
+                        and previous.get("args") == args)
+        now = time.strftime('%Y-%m-%d %H:%M:%S')
+        self.state = {
+            "command": command, "args": args, "status": "running",
+            "started_at": previous["started_at"] if self.resumed else now, "updated_at": now,
+            "attempts": previous.get("attempts", 0) + 1 if self.resumed else 1,
+            "done": 0, "total": None, "failed_files": [],
+        }
+        self.save()
+
+    def update(self, **fields):
+        """更新进度（按save_interval节流写盘）"""
+        self.state.update(fields)
+        if time.monotonic() - self._saved_at >= self.save_interval:
+            self.save()
+
+    def finish(self, status: str, **fields):
+        """结束任务：status为done/partial/failed/interrupted"""
+        self.state.update(fields, status=status)
+        self.save()
+
+    def save(self):
+        self.state["updated_at"] = time.strftime('%Y-%m-%d %H:%M:%S')
+        temp = self.path + ".tmp"
+        with open(temp, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, ensure_ascii=False, indent=2)
+        os.replace(temp, self.path)
+        self._saved_at = time.monotonic()
+
+
+def _job_outcome(failed: int, write_failed: int, succeeded: int = None):
+    """
+    任务结束时的(状态, 退出码)：有数据写入数据库失败、或有失败且没有一个成功（succeeded为0）时为failed，
+    只有部分文件/页面处理失败时为partial
+    """
+    if write_failed or (failed and succeeded == 0):
+        return "failed", EXIT_ERROR
+    if failed:
+        return "partial", EXIT_PARTIAL
+    return "done", EXIT_OK
+
+
+def _run_job(job: JobState, func):
+    """运行任务函数，异常或中断时把状态文件标记为失败/中断后继续抛出"""
+    try:
+        return func()
+    except KeyboardInterrupt:
+        job.finish("interrupted")
+        raise
+    except BaseException:
+        job.finish("failed")
+        raise
+
+
+def _cmd_ingest(args, emit) -> int:
+    if not os.path.isdir(args.folder):
+        print(f"文件夹路径不存在：{args.folder}", file=sys.stderr)
+        return EXIT_USAGE
+    folder = os.path.abspath(args.folder)
+    job = JobState(args.job_state or ".ingest_job.json", "ingest", {"folder": folder})
+    if job.resumed:
+        print("检测到上次未完成的任务，已入库的文件将自动跳过")
+    emit("start", folder=folder, resumed=job.resumed, attempt=job.state["attempts"])
+    failed = []
+
+    def progress(item: PipelineItem, done: int, total: int):
+        status = "failed" if item.error else (item.status or "ok")
+        if item.error:
+            failed.append(item.key)
+        job.update(done=done, total=total, failed_files=failed)
+        emit("progress", done=done, total=total, path=item.key, status=status,
+             records=len(item.records) if not item.error else 0, error=item.error)
+
+    processor = MaterialDataProcessor(nlp_mode=args.nlp)
+    try:
+        metrics = _run_job(job, lambda: processor.process_folder(
+            folder, workers=args.workers, ordered=args.ordered, profile=args.profile,
+            metrics_path=args.metrics, progress=progress, show_progress=not args.json))
+    finally:
+        processor.close()
+    summary = {key: value for key, value in metrics.to_dict().items()
+               if key in ("items", "failed", "unchanged", "records", "write_failed", "bytes", "pages",
+                          "elapsed_seconds")}
+    status, code = _job_outcome(metrics.failed, metrics.write_failed)
+    job.finish(status, **summary)
+    emit("done", status=status, failed_files=failed, **summary)
+    return code
+
+
+def _cmd_crawl(args, emit) -> int:
+    global CRAWL_SEED_URL
+    if args.seed:
+        CRAWL_SEED_URL = args.seed
+    job = JobState(args.job_state or ".crawl_job.json", "crawl", {"seed_url": CRAWL_SEED_URL})
+    emit("start", seed_url=CRAWL_SEED_URL, resumed=job.resumed, attempt=job.state["attempts"])
+
+    def progress(item: PipelineItem, done: int):
+        job.update(done=done)
+        emit("progress", done=done, title=item.key, status="failed" if item.error else "ok",
+             records=len(item.records) if not item.error else 0, error=item.error)
+
+    processor = MaterialDataProcessor(nlp_mode=args.nlp)
+    try:
+        counts = _run_job(job, lambda: processor.run_crawler(
+            max_pages=args.max_pages, max_depth=args.max_depth, progress=progress))
+    finally:
+        processor.close()
+    # 页面请求失败（如种子地址无法连接）同样计入失败，无人值守的任务能从状态和退出码看出来
+    status, code = _job_outcome(counts["failed"] + counts["failed_pages"], counts["write_failed"],
+                                succeeded=counts["fetched_pages"])
+    job.finish(status, **counts)
+    emit("done", status=status, **counts)
+    return code
+
+
+def _cmd_stats(args, emit) -> int:
+    with MaterialStore() as store, store.reader() as conn:
+        summary = StrengthAnalyzer(conn).render_all(args.output_dir)
+    emit("done", output_dir=args.output_dir, **summary)
+    return EXIT_OK
+
+
+def _cmd_report(args, emit) -> int:
+    emit("done", path=generate_report(args.output))
+    return EXIT_OK
+
+
+def _cmd_export(args, emit) -> int:
+    result = export_materials(args.output, fmt=args.format, incremental=args.incremental,
+                              chunk_rows=args.chunk_rows)
+    emit("done", **result)
+    return EXIT_OK
+
+
+def _cmd_import(args, emit) -> int:
+    result = import_materials(args.input, fmt=args.format, chunk_rows=args.chunk_rows)
+    status, code = _job_outcome(0, result["failed"])
+    emit("done", status=status, **result)
+    return code
+
+
+def _cmd_bench(args, emit) -> int:
+    if args.name == "startup":
+        code = check_startup_budget()
+        emit("done", name=args.name, passed=code == 0)
+        return EXIT_PARTIAL if code else EXIT_OK
+    benchmarks = {
+        "extraction": benchmark_extraction,
+        "docx": benchmark_docx,
+        "query": lambda: benchmark_query(args.rows) if args.rows else benchmark_query(),
+        "report": lambda: benchmark_report(args.rows) if args.rows else benchmark_report(),
+        "segmentation": lambda: (_bench_corpus().benchmark_segmentation(args.docs) if args.docs
+                                 else _bench_corpus().benchmark_segmentation()),
+        "export": lambda: benchmark_export(args.rows) if args.rows else benchmark_export(),
+    }
+    if args.name == "accuracy":
+        results = _bench_corpus().benchmark_accuracy(args.corpus, count=args.docs or 60)
+        emit("done", name=args.name, results=results)
+        return EXIT_PARTIAL if results["regressions"] else EXIT_OK
+    emit("done", name=args.name, results=benchmarks[args.name]())
+    return EXIT_OK
+
+
+def main(argv: List[str] = None) -> int:
+    """命令行入口，返回退出码"""
+    import argparse
+    argv = sys.argv[1:] if argv is None else argv
+
+    parser = argparse.ArgumentParser(prog="mytest2.py",
+                                     description="高硅铁尾矿数据采集系统（不带参数运行时进入交互菜单）")
+    parser.add_argument("--config", default=CONFIG_PATH, help="配置文件路径（默认config.ini）")
+    parser.add_argument("--json", action="store_true",
+                        help="在标准输出逐行输出JSON格式的进度和结果，其他提示信息改到标准错误")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ingest = commands.add_parser("ingest", help="批量处理文件夹")
+    ingest.add_argument("folder")
+    ingest.add_argument("--workers", type=int, default=None, help="提取阶段的进程数（默认取配置）")
+    ingest.add_argument("--ordered", action="store_true", help="按文件顺序入库")
+    ingest.add_argument("--nlp", choices=["auto", "off"], default="auto")
+    ingest.add_argument("--profile", choices=["cprofile", "tracemalloc"], default=None)
+    ingest.add_argument("--metrics", default=None, help="性能指标导出路径（.prom为Prometheus格式）")
+    ingest.add_argument("--job-state", default=None, help="任务状态文件（默认.ingest_job.json）")
+    ingest.set_defaults(func=_cmd_ingest)
+
+    crawl = commands.add_parser("crawl", help="启动网络爬虫")
+    crawl.add_argument("--seed", default=None, help="种子URL（默认取配置）")
+    crawl.add_argument("--max-pages", type=int, default=None)
+    crawl.add_argument("--max-depth", type=int, default=None)
+    crawl.add_argument("--nlp", choices=["auto", "off"], default="auto")
+    crawl.add_argument("--job-state", default=None, help="任务状态文件（默认.crawl_job.json）")
+    crawl.set_defaults(func=_cmd_crawl)
+
+    stats = commands.add_parser("stats", help="统计分析（图表和summary.json写入输出目录）")
+    stats.add_argument("--output-dir", default="analysis")
+    stats.set_defaults(func=_cmd_stats)
+
+    report = commands.add_parser("report", help="生成PDF实验报告")
+    report.add_argument("--output", default="report.pdf")
+    report.set_defaults(func=_cmd_report)
+
+    export = commands.add_parser("export", help="导出materials表（parquet/arrow/csv）")
+    export.add_argument("output", help="导出文件路径（格式按后缀判断）；--incremental时为目录")
+    export.add_argument("--format", choices=["parquet", "arrow", "csv"], default=None)
+    export.add_argument("--incremental", action="store_true", help="只导出上次导出之后新增的行")
+    export.add_argument("--chunk-rows", type=int, default=EXPORT_CHUNK_ROWS)
+    export.set_defaults(func=_cmd_export)
+
+    load = commands.add_parser("import", help="把导出的文件或增量导出目录批量导入materials表")
+    load.add_argument("input")
+    load.add_argument("--format", choices=["parquet", "arrow", "csv"], default=None)
+    load.add_argument("--chunk-rows", type=int, default=EXPORT_CHUNK_ROWS)
+    load.set_defaults(func=_cmd_import)
+
+    bench = commands.add_parser("bench", help="性能基准与启动耗时检查")
+    bench.add_argument("name", choices=["startup", "extraction", "docx", "query", "report", "accuracy",
+                                        "segmentation", "export"])
+    bench.add_argument("--rows", type=int, default=None, help="query/report/export基准的记录数")
+    bench.add_argument("--docs", type=int, default=None, help="accuracy/segmentation基准生成的合成文档数")
+    bench.add_argument("--corpus", default=None, help="accuracy基准使用的语料目录（含ground_truth.jsonl）")
+    bench.set_defaults(func=_cmd_bench)
+
+    args = parser.parse_args(argv)
+    try:
+        load_config(args.config)
+    except Exception as e:
+        print(f"配置错误：{str(e)}", file=sys.stderr)
+        return EXIT_USAGE
+
+    out = sys.stdout
+
+    def emit(event: str, **fields):
+        if args.json:
+            out.write(json.dumps({"event": event, "command": args.command, **fields},
+                                 ensure_ascii=False, default=str) + "\n")
+            out.flush()
+
+    try:
+        with contextlib.redirect_stdout(sys.stderr) if args.json else contextlib.nullcontext():
+            return args.func(args, emit)
+    except KeyboardInterrupt:
+        emit("interrupted")
+        return EXIT_INTERRUPTED
+    except Exception as e:
+        print(f"运行错误：{str(e)}", file=sys.stderr)
+        emit("error", message=str(e))
+        return EXIT_ERROR
+
+
+# ----------------------
+# 模块十二：合成语料与提取准确率基准（实现见bench_corpus.py）
+# ----------------------
+def _bench_corpus():
+    """按需导入bench_corpus；以脚本方式运行时先把当前模块登记为mytest2，避免bench_corpus再导入一份副本"""
+    sys.modules.setdefault("mytest2", sys.modules[__name__])
+    import bench_corpus
+    return bench_corpus
+
+
+# ----------------------
+# 模块十三：列式导出与导入
+# ----------------------
+# 下游建模、分析直接读导出文件，不必连接正在写入的material_data.db：
+# arrow为Arrow IPC文件格式（不压缩，可内存映射零拷贝读取），parquet为压缩列式格式，csv为通用文本格式
+EXPORT_FORMATS = {".parquet": "parquet", ".arrow": "arrow", ".feather": "arrow", ".csv": "csv"}
+_EXPORT_SUFFIX = {"parquet": ".parquet", "arrow": ".arrow", "csv": ".csv"}
+CSV_NULL = "\\N"  # csv中NULL的写法，与空字符串区分
+
+
+def _export_format(path: str, fmt: str = None) -> str:
+    fmt = fmt or EXPORT_FORMATS.get(os.path.splitext(path)[1].lower())
+    if fmt not in _EXPORT_SUFFIX:
+        raise ValueError(f"无法确定导出格式：{path}（可用格式：{', '.join(_EXPORT_SUFFIX)}）")
+    return fmt
+
+
+def _table_columns(conn: sqlite3.Connection) -> List[tuple]:
+    """materials表的(列名, 声明类型)"""
+    return [(row[1], row[2].upper()) for row in conn.execute("PRAGMA table_info(materials)")]
+
+
+def _arrow_type(declared: str):
+    import pyarrow as pa
+    if "INT" in declared:
+        return pa.int64()
+    if "REAL" in declared or "FLOA" in declared or "DOUB" in declared:
+        return pa.float64()
+    return pa.string()
+
+
+class ColumnarWriter:
+    """
+    按块写出行数据：parquet中每块为一个行组，arrow中每块为一个记录批次，csv逐块追加
+    先写入临时文件，close()时再替换目标文件，中途失败不会留下不完整的文件
+    """
+
+    def __init__(self, path: str, fmt: str, columns: List[tuple]):
+        self.path = path
+        self.fmt = fmt
+        self.rows = 0
+        self._tmp = path + ".tmp"
+        names = [name for name, _ in columns]
+        if fmt == "csv":
+            import csv
+            self._file = open(self._tmp, "w", newline="", encoding="utf-8")
+            self._csv = csv.writer(self._file)
+            self._csv.writerow(names)
+            return
+        import pyarrow as pa
+        self._pa = pa
+        self.schema = pa.schema([(name, _arrow_type(declared)) for name, declared in columns])
+        if fmt == "parquet":
+            import pyarrow.parquet as pq
+            self._writer = pq.ParquetWriter(self._tmp, self.schema, compression="zstd")
+        else:
+            self._file = pa.OSFile(self._tmp, "wb")
+            self._writer = pa.ipc.new_file(self._file, self.schema)
+
+    def write(self, rows: List[tuple]):
+        if not rows:
+            return
+        if self.fmt == "csv":
+            self._csv.writerows([CSV_NULL if value is None else value for value in row] for row in rows)
+        else:
+            pa = self._pa
+            arrays = [pa.array(values, type=field.type) for values, field in zip(zip(*rows), self.schema)]
+            self._writer.write_batch(pa.record_batch(arrays, schema=self.schema))
+        self.rows += len(rows)
+
+    def close(self, commit: bool = True):
+        """commit=False时丢弃临时文件"""
+        if self.fmt != "csv":
+            self._writer.close()
+        if self.fmt != "parquet":
+            self._file.close()
+        if commit:
+            os.replace(self._tmp, self.path)
+        elif os.path.exists(self._tmp):
+            os.remove(self._tmp)
+
+
+def export_materials(path: str, fmt: str = None, incremental: bool = False,
+                     chunk_rows: int = EXPORT_CHUNK_ROWS, store: "MaterialStore" = None) -> Dict[str, object]:
+    """
+    流式导出materials表（按id顺序分块读取，内存中只保留chunk_rows行）
+    fmt：parquet/arrow/csv，默认按path的后缀判断
+    incremental=True时path为目录（fmt必填），只导出该目录上次导出之后新增的行，写成分片文件
+    part-<起始id>.<后缀>；导出成功后才记录进度，中途失败重跑时会覆盖同名分片，不会重复
+    （被重新处理的文件会以新id入库，旧行仍留在之前的分片中，需要时做一次全量导出）
+    返回{"path": 写出的文件（增量导出无新数据时为None）, "rows": 导出行数, "last_id": 已导出的最大id}
+    """
+    fmt = _export_format(path, fmt)
+    owned = store is None
+    store = store or MaterialStore()
+    try:
+        target = os.path.abspath(path)
+        last_id = 0
+        if incremental:
+            os.makedirs(path, exist_ok=True)
+            with store.reader() as conn:
+                row = conn.execute("SELECT last_id FROM export_state WHERE target = ?", (target,)).fetchone()
+            last_id = row[0] if row else 0
+
+        with store.reader() as conn:
+            columns = _table_columns(conn)
+            names = [name for name, _ in columns]
+            id_index = names.index("id")
+            # 同一条SELECT语句读完所有块，WAL模式下看到的是开始时的快照，不受同时写入的影响
+            cursor = conn.execute(f"SELECT {', '.join(names)} FROM materials WHERE id > ? ORDER BY id",
+                                  (last_id,))
+            rows = cursor.fetchmany(chunk_rows)
+            if incremental and not rows:
+                print("没有新增数据需要导出")
+                return {"path": None, "rows": 0, "last_id": last_id}
+            output = os.path.join(path, f"part-{rows[0][id_index]:012d}{_EXPORT_SUFFIX[fmt]}") if incremental else path
+            writer = ColumnarWriter(output, fmt, columns)
+            try:
+                while rows:
+                    writer.write(rows)
+                    last_id = rows[-1][id_index]
+                    rows = cursor.fetchmany(chunk_rows)
+            except BaseException:
+                writer.close(commit=False)
+                raise
+            writer.close()
+
+        if incremental:
+            store.write(lambda conn: conn.execute(
+                "INSERT INTO export_state (target, format, last_id, rows, exported_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(target) DO UPDATE SET format = excluded.format, last_id = excluded.last_id, "
+                "rows = rows + excluded.rows, exported_at = excluded.exported_at",
+                (target, fmt, last_id, writer.rows, time.time())))
+        print(f"已导出{writer.rows}条数据到{output}")
+        return {"path": output, "rows": writer.rows, "last_id": last_id}
+    finally:
+        if owned:
+            store.close()
+
+
+def _export_files(path: str, fmt: str = None) -> List[tuple]:
+    """导出文件或增量导出目录中的分片，返回[(文件路径, 格式), ...]（分片按起始id排序）"""
+    if not os.path.isdir(path):
+        return [(path, _export_format(path, fmt))]
+    files = []
+    for name in sorted(os.listdir(path)):
+        suffix = os.path.splitext(name)[1].lower()
+        if name.startswith("part-") and suffix in EXPORT_FORMATS and (fmt is None or EXPORT_FORMATS[suffix] == fmt):
+            files.append((os.path.join(path, name), EXPORT_FORMATS[suffix]))
+    return files
+
+
+def _read_chunks(path: str, fmt: str, chunk_rows: int, types: Dict[str, str]):
+    """
+    按块读取导出文件，产出(列名列表, 行元组列表)，只保留types中有的列（id除外）；
+    csv按types中的声明类型转换，CSV_NULL以及数值列的空字符串视为NULL（文本列保留空字符串）
+    """
+    def wanted(name):
+        return name in types and name != "id"
+
+    if fmt == "csv":
+        import csv
+        with open(path, newline="", encoding="utf-8") as f:
+            reader = csv.reader(f)
+            header = next(reader, [])
+            keep = [i for i, name in enumerate(header) if wanted(name)]
+            names = [header[i] for i in keep]
+            converters = [(i, int if "INT" in types[header[i]] else
+                           float if any(t in types[header[i]] for t in ("REAL", "FLOA", "DOUB")) else str)
+                          for i in keep]
+            rows = []
+            for record in reader:
+                rows.append(tuple(None if record[i] == CSV_NULL or (record[i] == "" and convert is not str)
+                                  else convert(record[i]) for i, convert in converters))
+                if len(rows) >= chunk_rows:
+                    yield names, rows
+                    rows = []
+            if rows:
+                yield names, rows
+        return
+    import pyarrow as pa
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        batches = pq.ParquetFile(path).iter_batches(batch_size=chunk_rows)
+    else:
+        reader = pa.ipc.open_file(pa.memory_map(path))
+        batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+    for batch in batches:
+        names = [name for name in batch.schema.names if wanted(name)]
+        yield names, list(zip(*(batch.column(name).to_pylist() for name in names)))
+
+
+def import_materials(path: str, fmt: str = None, chunk_rows: int = EXPORT_CHUNK_ROWS,
+                     store: "MaterialStore" = None) -> Dict[str, int]:
+    """
+    把导出的文件（或增量导出目录中的全部分片）批量导入materials表，
+    返回{"rows": 导入行数, "failed": 写入失败行数, "skipped": 跳过的已导入文件数}
+    每chunk_rows行经BatchWriter在一个事务中executemany写入；id不导入（由数据库重新分配），
+    数据库中没有的列忽略。全部写入成功的文件按内容哈希记入import_state，再次导入时跳过，
+    因此对增量导出目录重复执行导入只会导入新增的分片
+    """
+    files = _export_files(path, fmt)
+    if not files:
+        print(f"没有可导入的文件：{path}")
+        return {"rows": 0, "failed": 0, "skipped": 0}
+    owned = store is None
+    store = store or MaterialStore()
+    written = failed = skipped = 0
+    try:
+        with store.reader() as conn:
+            types = dict(_table_columns(conn))
+            imported = {row[0] for row in conn.execute("SELECT content_hash FROM import_state")}
+        for file, file_fmt in files:
+            content_hash = FileProcessor.file_hash(file)
+            if content_hash in imported:
+                skipped += 1
+                continue
+            writer = None
+            for names, rows in _read_chunks(file, file_fmt, chunk_rows, types):
+                if writer is None:
+                    writer = BatchWriter(store, batch_size=chunk_rows, flush_interval=float("inf"), columns=names)
+                writer.add_rows(rows)
+            if writer:
+                writer.flush()
+                written += writer.written
+                failed += writer.failed
+            if writer is None or not writer.failed:
+                count = writer.written if writer else 0
+                store.write(lambda conn: conn.execute(
+                    "INSERT OR REPLACE INTO import_state (content_hash, path, rows, imported_at) VALUES (?, ?, ?, ?)",
+                    (content_hash, os.path.abspath(file), count, time.time())))
+                imported.add(content_hash)
+        if len(files) > skipped:
+            print(f"已从{len(files) - skipped}个文件导入{written}条数据")
+        if skipped:
+            print(f"跳过{skipped}个已导入过的文件")
+        if failed:
+            print(f"共有{failed}条数据写入数据库失败")
+        return {"rows": written, "failed": failed, "skipped": skipped}
+    finally:
+        if owned:
+            store.close()
+
+
+def load_export(path: str):
+    """
+    读取导出文件或增量导出目录为pyarrow.Table，供分析使用
+    arrow文件通过内存映射读取，数据不复制到进程内存
+    """
+    import pyarrow as pa
+    tables = []
+    for file, fmt in _export_files(path):
+        if fmt == "arrow":
+            tables.append(pa.ipc.open_file(pa.memory_map(file)).read_all())
+        elif fmt == "parquet":
+            import pyarrow.parquet as pq
+            tables.append(pq.read_table(file))
+        else:
+            import pyarrow.csv
+            options = pyarrow.csv.ConvertOptions(null_values=[CSV_NULL], strings_can_be_null=True)
+            tables.append(pyarrow.csv.read_csv(file, convert_options=options))
+    if not tables:
+        raise ValueError(f"没有可读取的导出文件：{path}")
+    return pa.concat_tables(tables, promote_options="default") if len(tables) > 1 else tables[0]
+
+
+def benchmark_export(rows: int = 200_000, chunk_rows: int = EXPORT_CHUNK_ROWS) -> Dict[str, Dict[str, float]]:
+    """
+    在临时数据库中生成rows条合成记录，测量各格式的导出速度、文件大小、读回速度和导入速度，
+    并与逐行查询数据库的读取方式对比
+    """
+    import tempfile
+    import shutil
+    directory = tempfile.mkdtemp()
+    try:
+        rng = random.Random(0)
+        synthetic_record = _bench_corpus().synthetic_record
+        with MaterialStore(os.path.join(directory, "bench.db")) as store:
+            with BatchWriter(store, batch_size=chunk_rows) as writer:
+                for _ in range(rows):
+                    writer.add(synthetic_record(rng))
+            start = time.perf_counter()
+            with store.reader() as conn:
+                ids = [row[0] for row in conn.execute("SELECT id FROM materials")]
+                for row_id in ids:
+                    conn.execute("SELECT * FROM materials WHERE id = ?", (row_id,)).fetchone()
+            row_by_row = time.perf_counter() - start
+
+            results = {}
+            for fmt, suffix in _EXPORT_SUFFIX.items():
+                path = os.path.join(directory, "materials" + suffix)
+                start = time.perf_counter()
+                export_materials(path, fmt, chunk_rows=chunk_rows, store=store)
+                exported = time.perf_counter() - start
+                start = time.perf_counter()
+                table = load_export(path)
+                loaded = time.perf_counter() - start
+                with MaterialStore(os.path.join(directory, f"import_{fmt}.db")) as target:
+                    start = time.perf_counter()
+                    imported = import_materials(path, fmt, chunk_rows=chunk_rows, store=target)["rows"]
+                    import_time = time.perf_counter() - start
+                assert table.num_rows == imported == rows
+                results[fmt] = {"export_rows_per_sec": rows / exported, "read_seconds": loaded,
+                                "import_rows_per_sec": rows / import_time,
+                                "size_mb": os.path.getsize(path) / 1e6}
+        print(f"记录数：{rows}，逐行查询数据库读取：{row_by_row:.2f}s")
+        for fmt, result in results.items():
+            print(f"{fmt:8s} 导出{result['export_rows_per_sec']:8.0f}条/s  文件{result['size_mb']:6.1f}MB  "
+                  f"读取{result['read_seconds']:.3f}s  导入{result['import_rows_per_sec']:8.0f}条/s")
+        results["row_by_row_seconds"] = row_by_row
+        return results
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
 # ----------------------
 # 交互菜单系统
 # ----------------------
@@ -520,10 +4123,15 @@ def show_menu():
     print("高硅铁尾矿数据采集系统")
     print("1. 批量处理文件夹")
     print("2. 启动网络爬虫")
-    print("3. 退出系统")
-    return input("请选择操作（1-3）：")
+    print("3. 批量处理文件夹（性能分析）")
+    print("4. 退出系统")
+    return input("请选择操作（1-4）：")
     
 if __name__ == "__main__":
+    if sys.argv[1:]:
+        sys.exit(main())
+
+    load_config()
     processor = MaterialDataProcessor()
     
     while True:
@@ -536,9 +4144,18 @@ if __name__ == "__main__":
             print("开始爬取数据...")
             processor.run_crawler()
         elif choice == '3':
+            folder = input("请输入文件夹路径：")
+            mode = input("性能分析方式（cprofile/tracemalloc，直接回车只统计指标）：").strip() or None
+            if mode not in (None, "cprofile", "tracemalloc"):
+                print("无效的性能分析方式！")
+                continue
+            metrics = processor.process_folder(folder, profile=mode, metrics_path=METRICS_PATH)
+            if metrics:
+                metrics.summary()
+        elif choice == '4':
             print("感谢使用，再见！")
             break
         else:
             print("无效输入，请重新选择！")
     
-    processor.conn.close()
\ No newline at end of file
+    processor.close()
\ No newline at end of file
@@ -0,0 +1,70 @@
+"""
+本地HTTP替身服务器，供爬虫测试使用
+"""
+import hashlib
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, List
+
+
+def serve_fixture_pages(pages: Dict[str, str], port: int = 0, delay: float = 0.0,
+                        failures: Dict[str, List[int]] = None):
+    """
+    pages为{"/路径?查询": HTML}，未登记的路径返回404；响应带ETag，请求的If-None-Match一致时返回304
+    delay：每个请求的处理时间（秒），用于观察并发数；failures：{"/路径": [503, 429, ...]}，
+    该路径的前几次请求依次返回这些状态码
+    server.log按顺序记录(路径, 状态码)，server.max_in_flight为同时处理的最大请求数
+    返回(server, 基础URL)，用完后调用server.shutdown()
+    """
+    failures = {path: list(codes) for path, codes in (failures or {}).items()}
+    lock = threading.Lock()
+    in_flight = [0]
+
+    class FixtureHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            with lock:
+                in_flight[0] += 1
+                server.max_in_flight = max(server.max_in_flight, in_flight[0])
+            try:
+                if delay:
+                    time.sleep(delay)
+                self._respond()
+            finally:
+                with lock:
+                    in_flight[0] -= 1
+
+        def _respond(self):
+            with lock:
+                pending = failures.get(self.path)
+                status = pending.pop(0) if pending else None
+            body = pages.get(self.path)
+            if status is None and body is None:
+                status = 404
+            if status is not None:
+                server.log.append((self.path, status))
+                self.send_error(status)
+                return
+            data = body.encode('utf-8')
+            etag = '"' + hashlib.sha1(data).hexdigest() + '"'
+            if self.headers.get('If-None-Match') == etag:
+                server.log.append((self.path, 304))
+                self.send_response(304)
+                self.end_headers()
+                return
+            server.log.append((self.path, 200))
+            self.send_response(200)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', port), FixtureHandler)
+    server.log = []
+    server.max_in_flight = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
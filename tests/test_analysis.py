@@ -0,0 +1,48 @@
+import random
+import sqlite3
+
+import numpy as np
+
+import mytest2
+
+
+def _conn(tmp_path, records):
+    store = mytest2.MaterialStore(str(tmp_path / "materials.db"))
+    with mytest2.BatchWriter(store) as writer:
+        for record in records:
+            writer.add(record)
+    store.close()
+    return sqlite3.connect(str(tmp_path / "materials.db"))
+
+
+def test_grouped_summary_matches_numpy(tmp_path):
+    rng = random.Random(0)
+    groups = ["氢氧化钠", "水玻璃", None]
+    # 数值很大而组内差异很小时，E[x²]−均值²会因相消损失全部精度
+    records = [{"alkali_activator": rng.choice(groups), "compressive_strength_28d": 1e9 + rng.uniform(0, 1)}
+               for _ in range(3000)]
+    records.append({"alkali_activator": "水玻璃", "compressive_strength_28d": None})
+    conn = _conn(tmp_path, records)
+    try:
+        stats = mytest2.StrengthAnalyzer(conn).grouped_summary("alkali_activator")
+    finally:
+        conn.close()
+    for index, label in enumerate(stats["alkali_activator"]):
+        values = np.array([record["compressive_strength_28d"] for record in records
+                           if (record["alkali_activator"] or "未知") == label
+                           and record["compressive_strength_28d"] is not None])
+        assert stats["count"][index] == len(values)
+        assert np.isclose(stats["mean"][index], values.mean(), rtol=1e-12)
+        assert np.isclose(stats["std"][index], values.std(), rtol=1e-6)
+        assert (stats["min"][index], stats["max"][index]) == (values.min(), values.max())
+    assert sorted(stats["alkali_activator"]) == sorted(["氢氧化钠", "水玻璃", "未知"])
+
+
+def test_aggregate_variance_without_groups(tmp_path):
+    conn = _conn(tmp_path, [{"SiO2_content": value} for value in (64.0, 66.0, 70.0)])
+    try:
+        stats = mytest2.MaterialQuery(conn).aggregate("SiO2_content", funcs=("count", "var"),
+                                                      where={"SiO2_content": (65, None)}, as_numpy=False)
+    finally:
+        conn.close()
+    assert stats == {"count_SiO2_content": [2], "var_SiO2_content": [4.0]}
@@ -0,0 +1,137 @@
+import sqlite3
+
+import pytest
+
+import mytest2
+from fixture_server import serve_fixture_pages
+
+
+def _item(title: str) -> str:
+    return f'<div class="material-item"><h3>{title}</h3><div class="content">SiO2：70%</div></div>'
+
+
+@pytest.fixture
+def site():
+    servers = []
+
+    def start(pages, **kwargs):
+        server, base = serve_fixture_pages(pages, **kwargs)
+        servers.append(server)
+        return server, base
+
+    yield start
+    for server in servers:
+        server.shutdown()
+
+
+def test_concurrency_limit(site):
+    pages = {f"/list?page={page}": _item(f"T{page}") for page in range(1, 13)}
+    server, base = site(pages, delay=0.1)
+    crawler = mytest2.MaterialCrawler(base + "/list", concurrency=3, rate_per_host=0)
+    titles = [item["title"] for item in crawler.crawl(max_pages=12)]
+    assert sorted(titles) == sorted(f"T{page}" for page in range(1, 13))
+    assert 1 < server.max_in_flight <= 3
+
+
+def test_retry_on_503_and_429(site):
+    pages = {"/list?page=1": _item("T1")}
+    server, base = site(pages, failures={"/list?page=1": [503, 429]})
+    crawler = mytest2.MaterialCrawler(base + "/list", rate_per_host=0, backoff=0.01)
+    assert [item["title"] for item in crawler.crawl(max_pages=1)] == ["T1"]
+    assert [status for path, status in server.log] == [503, 429, 200]
+
+
+def test_gives_up_after_retries(site):
+    server, base = site({}, failures={"/list?page=1": [503] * 10})
+    crawler = mytest2.MaterialCrawler(base + "/list", rate_per_host=0, retries=2, backoff=0.01)
+    assert list(crawler.crawl(max_pages=1)) == []
+    assert len(server.log) == 3
+    assert (crawler.fetched_pages, crawler.failed_pages) == (0, 1)
+    assert mytest2._job_outcome(crawler.failed_pages, 0, succeeded=crawler.fetched_pages)[0] == "failed"
+
+
+def test_unchanged_pages_use_cache(site, tmp_path):
+    pages = {f"/list?page={page}": _item(f"T{page}") for page in range(1, 4)}
+    server, base = site(pages)
+    for run in range(2):
+        cache = mytest2.ResponseCache(str(tmp_path / "cache"))
+        try:
+            crawler = mytest2.MaterialCrawler(base + "/list", rate_per_host=0, cache=cache)
+            items = list(crawler.crawl(max_pages=3))
+        finally:
+            cache.close()
+        if run == 0:
+            assert len(items) == 3
+            assert crawler.unchanged_pages == 0
+        else:
+            assert items == []  # 未变化的页面不重复解析入库
+            assert crawler.unchanged_pages == 3
+    assert [status for path, status in server.log[3:]] == [304, 304, 304]
+
+
+def test_follow_links_respects_robots(site, tmp_path):
+    pages = {
+        "/robots.txt": "User-agent: *\nDisallow: /private\n",
+        "/": '<a href="/a">a</a><a href="/private/x">x</a><a href="http://elsewhere.invalid/">y</a>' + _item("root"),
+        "/a": '<a href="/b#top">b</a>' + _item("a"),
+        "/b": _item("b"),
+        "/private/x": _item("secret"),
+    }
+    server, base = site(pages)
+    cache = mytest2.ResponseCache(str(tmp_path / "cache"))
+    try:
+        crawler = mytest2.MaterialCrawler(base + "/", rate_per_host=0, cache=cache)
+        titles = [item["title"] for item in crawler.crawl_links(
+            max_depth=3, checkpoint_path=str(tmp_path / "frontier.db"))]
+    finally:
+        cache.close()
+    assert sorted(titles) == ["a", "b", "root"]
+    requested = {path for path, status in server.log}
+    assert "/private/x" not in requested
+    assert requested == {"/robots.txt", "/", "/a", "/b"}
+
+
+def _states(path):
+    conn = sqlite3.connect(path)
+    try:
+        return dict(conn.execute("SELECT url, state FROM frontier"))
+    finally:
+        conn.close()
+
+
+def test_unacknowledged_pages_are_reparsed_on_resume(site, tmp_path):
+    pages = {"/": '<a href="/a">a</a>' + _item("root"), "/a": _item("a")}
+    server, base = site(pages)
+    checkpoint = str(tmp_path / "frontier.db")
+
+    def run(ack):
+        cache = mytest2.ResponseCache(str(tmp_path / "cache"))
+        try:
+            crawler = mytest2.MaterialCrawler(base + "/", rate_per_host=0, cache=cache)
+            items = list(crawler.crawl_links(checkpoint_path=checkpoint, acknowledge=True))
+            if ack:
+                for item in items:
+                    crawler.ack(item["url"])
+                crawler.flush_acks()
+            return sorted(item["title"] for item in items)
+        finally:
+            cache.close()
+
+    assert run(ack=False) == ["a", "root"]
+    assert set(_states(checkpoint).values()) == {3}  # 已请求，数据未确认存储
+    # 页面返回304，但上次的数据没有存储成功，仍然重新解析
+    assert run(ack=True) == ["a", "root"]
+    assert [status for path, status in server.log[-2:]] == [304, 304]
+    assert set(_states(checkpoint).values()) == {2}
+
+
+def test_failed_pages_are_retried_next_run(site, tmp_path):
+    pages = {"/": '<a href="/a">a</a>' + _item("root"), "/a": _item("a")}
+    server, base = site(pages, failures={"/a": [503]})
+    checkpoint = str(tmp_path / "frontier.db")
+    crawler = mytest2.MaterialCrawler(base + "/", rate_per_host=0, retries=0)
+    assert [item["title"] for item in crawler.crawl_links(checkpoint_path=checkpoint)] == ["root"]
+    assert _states(checkpoint)[base + "/a"] == 0  # 重新排队，而不是标记为已完成
+    crawler = mytest2.MaterialCrawler(base + "/", rate_per_host=0, retries=0)
+    assert [item["title"] for item in crawler.crawl_links(checkpoint_path=checkpoint)] == ["a"]
+    assert set(_states(checkpoint).values()) == {2}
@@ -0,0 +1,67 @@
+import pytest
+
+import mytest2
+
+TEXT = next(spec.column for spec in mytest2.FIELD_SPECS if spec.type is str)
+REAL = next(spec.column for spec in mytest2.FIELD_SPECS if spec.type is float)
+
+RECORDS = [
+    {TEXT: "普通硅酸盐水泥", REAL: 42.5, "source_path": "a.txt"},
+    {TEXT: None, REAL: None, "source_path": None},  # NULL
+    {TEXT: "", REAL: 0.0, "source_path": ""},       # 空字符串和0不是NULL
+    {TEXT: "含,逗号\n和换行", REAL: -1.25, "source_path": "b.txt"},
+]
+
+
+def _rows(store):
+    with store.reader() as conn:
+        names = [name for name, _ in mytest2._table_columns(conn) if name != "id"]
+        return [tuple(row) for row in conn.execute(f"SELECT {', '.join(names)} FROM materials ORDER BY id")]
+
+
+@pytest.fixture
+def source(tmp_path):
+    store = mytest2.MaterialStore(str(tmp_path / "source.db"))
+    with mytest2.BatchWriter(store) as writer:
+        for record in RECORDS:
+            writer.add(record)
+    yield store
+    store.close()
+
+
+@pytest.mark.parametrize("fmt", ["csv", "parquet", "arrow"])
+def test_round_trip(source, tmp_path, fmt):
+    if fmt != "csv":
+        pytest.importorskip("pyarrow")
+    path = str(tmp_path / ("materials" + mytest2._EXPORT_SUFFIX[fmt]))
+    assert mytest2.export_materials(path, store=source, chunk_rows=3)["rows"] == len(RECORDS)
+    with mytest2.MaterialStore(str(tmp_path / "target.db")) as target:
+        result = mytest2.import_materials(path, store=target, chunk_rows=3)
+        assert result == {"rows": len(RECORDS), "failed": 0, "skipped": 0}
+        assert _rows(target) == _rows(source)
+        with target.reader() as conn:
+            assert conn.execute(f"SELECT COUNT(*) FROM materials WHERE {TEXT} IS NULL").fetchone()[0] == 1
+        # 同一个文件再次导入时跳过，不会重复入库
+        assert mytest2.import_materials(path, store=target)["skipped"] == 1
+        assert len(_rows(target)) == len(RECORDS)
+
+
+def test_csv_load_export_keeps_nulls(source, tmp_path):
+    pytest.importorskip("pyarrow")
+    path = str(tmp_path / "materials.csv")
+    mytest2.export_materials(path, store=source)
+    table = mytest2.load_export(path)
+    assert table.column(TEXT).to_pylist() == [record[TEXT] for record in RECORDS]
+
+
+def test_incremental_export_imports_new_parts_only(source, tmp_path):
+    pytest.importorskip("pyarrow")
+    directory = str(tmp_path / "parts")
+    mytest2.export_materials(directory, "parquet", incremental=True, store=source)
+    with mytest2.BatchWriter(source) as writer:
+        writer.add({TEXT: "新增", REAL: 1.0})
+    with mytest2.MaterialStore(str(tmp_path / "target.db")) as target:
+        assert mytest2.import_materials(directory, store=target)["rows"] == len(RECORDS)
+        mytest2.export_materials(directory, "parquet", incremental=True, store=source)
+        assert mytest2.import_materials(directory, store=target) == {"rows": 1, "failed": 0, "skipped": 1}
+        assert _rows(target) == _rows(source)
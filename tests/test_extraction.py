@@ -0,0 +1,67 @@
+import os
+
+import mytest2
+from bench_corpus import benchmark_accuracy
+
+SAMPLE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "sample.txt")
+
+
+def _sample_text() -> str:
+    with open(SAMPLE, encoding="utf-8") as f:
+        return f.read()
+
+
+def test_single_pass_matches_per_field():
+    text = _sample_text()
+    extractor = mytest2.FIELD_EXTRACTOR
+    result = extractor.extract(text)
+    assert result == extractor.extract_per_field(text)
+    assert sum(value is not None for value in result.values()) > len(result) // 2
+
+
+def test_streaming_matches_full_text():
+    text = _sample_text()
+    chunks = [text[i:i + 100] for i in range(0, len(text), 100)]
+    assert mytest2.FIELD_EXTRACTOR.extract_stream(chunks) == mytest2.FIELD_EXTRACTOR.extract(text)
+
+
+def test_summary_line_does_not_split_single_experiment():
+    text = "28天抗压强度：45.0MPa，SiO2：64.9%\n" + _sample_text()
+    records = list(mytest2.extract_segmented([text], "off"))
+    assert records == [mytest2.FIELD_EXTRACTOR.extract(text)]
+
+
+def _segmented(text: str):
+    return [{column: value for column, value in record.items() if value is not None}
+            for record in mytest2.extract_segmented([text], "off")]
+
+
+def test_headings_split_records_and_share_context():
+    text = "SiO2：66%\n实验1\n28天抗压强度：40MPa\n实验2\n28天抗压强度：50MPa\nSiO2：70%\n"
+    assert _segmented(text) == [{"SiO2_content": 66.0, "compressive_strength_28d": 40.0},
+                                {"SiO2_content": 70.0, "compressive_strength_28d": 50.0}]
+
+
+def test_prose_mentioning_a_sample_is_not_a_heading():
+    text = "28天抗压强度：40MPa\nSiO2：66%\n试样1的28天抗压强度：42MPa，明显高于对照组\n"
+    assert _segmented(text) == [{"SiO2_content": 66.0, "compressive_strength_28d": 40.0}]
+    for line in ("试样1的强度最高", "实验2中加入了激发剂", "Sample 3's strength"):
+        assert not mytest2.SEGMENT_HEADING.match(line)
+    for line in ("实验1", "第3组：", "配比编号：M3", "Sample 2", "试样1 28天抗压强度：42MPa"):
+        assert mytest2.SEGMENT_HEADING.match(line)
+
+
+def test_repeated_field_after_heading_starts_new_record():
+    text = "第1组\n28天抗压强度：40MPa\n28天抗压强度：45MPa\n"
+    assert [record["compressive_strength_28d"] for record in _segmented(text)] == [40.0, 45.0]
+
+
+def test_table_rows_are_records():
+    text = "SiO2：66%\n28天抗压强度\tSiO2\n40\t65\n50\t67\n"
+    assert _segmented(text) == [{"SiO2_content": 65.0, "compressive_strength_28d": 40.0},
+                                {"SiO2_content": 67.0, "compressive_strength_28d": 50.0}]
+
+
+def test_accuracy_has_no_regressions():
+    result = benchmark_accuracy(count=9, drift="basic")
+    assert result["regressions"] == []
@@ -0,0 +1,121 @@
+import os
+
+import pytest
+
+import mytest2
+
+
+class CountingSource(mytest2.PipelineSource):
+    def __init__(self, count):
+        self.count = count
+        self.pulled = 0
+        self.closed = False
+
+    def items(self):
+        try:
+            for index in range(self.count):
+                self.pulled += 1
+                yield mytest2.PipelineItem(key=str(index), text=str(index))
+        finally:
+            self.closed = True
+
+
+def _upper(item):
+    item.records = [{"text": item.text}]
+    return item
+
+
+def _fail_odd(item):
+    if int(item.text) % 2:
+        raise ValueError("odd")
+    return item
+
+
+def _pipeline(*funcs):
+    return mytest2.Pipeline([mytest2.Stage(f"s{i}", func, workers=2) for i, func in enumerate(funcs)])
+
+
+@pytest.mark.parametrize("inline", [False, True])
+def test_ordered_delivery_and_stage_errors(inline):
+    source = CountingSource(200)
+    delivered = []
+    count = _pipeline(_fail_odd, _upper).run(source, delivered.append, ordered=True, inline=inline)
+    assert count == 200
+    assert [item.seq for item in delivered] == list(range(200))
+    assert all((item.error == "odd") == (item.seq % 2 == 1) for item in delivered)
+    assert all(item.records for item in delivered if not item.error)  # 出错的数据跳过后续阶段
+    assert not any(item.records for item in delivered if item.error)
+    assert source.closed
+
+
+@pytest.mark.parametrize("error", [RuntimeError, KeyboardInterrupt])
+@pytest.mark.parametrize("inline", [False, True])
+def test_sink_failure_stops_source(error, inline):
+    source = CountingSource(100_000)
+
+    def sink(item):
+        raise error("sink")
+
+    with pytest.raises(error):
+        _pipeline(_upper).run(source, sink, inline=inline)
+    assert source.closed
+    assert source.pulled < 1000
+
+
+def test_source_error_is_raised():
+    class BrokenSource(mytest2.PipelineSource):
+        def items(self):
+            yield mytest2.PipelineItem(text="0")
+            raise OSError("source")
+
+    delivered = []
+    with pytest.raises(OSError):
+        _pipeline(_upper).run(BrokenSource(), delivered.append)
+    assert len(delivered) == 1
+
+
+def test_batch_stage_receives_queued_items():
+    sizes = []
+
+    def batch(items):
+        sizes.append(len(items))
+        return items
+
+    pipeline = mytest2.Pipeline([mytest2.Stage("batch", batch, batch_size=8)])
+    delivered = []
+    pipeline.run(CountingSource(50), delivered.append)
+    assert len(delivered) == 50
+    assert sum(sizes) == 50 and max(sizes) <= 8
+
+
+def test_ingest_settings_reach_worker_processes(tmp_path, monkeypatch):
+    monkeypatch.setattr(mytest2, "DATABASE_NAME", str(tmp_path / "materials.db"))
+    monkeypatch.setattr(mytest2, "SPLIT_RECORDS", True)  # 相当于load_config()覆盖的设置
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    for name, strength in (("a.txt", 40), ("b.txt", 41)):
+        (docs / name).write_text(f"实验1\n28天抗压强度：{strength}MPa\n实验2\n28天抗压强度：50MPa\n",
+                                 encoding="utf-8")
+    processor = mytest2.MaterialDataProcessor(nlp_mode="off")
+    try:
+        processor.process_folder(str(docs), workers=2, show_progress=False)
+        with processor.store.reader() as conn:
+            rows = conn.execute("SELECT compressive_strength_28d FROM materials ORDER BY 1").fetchall()
+    finally:
+        processor.close()
+    assert [row[0] for row in rows] == [40.0, 41.0, 50.0, 50.0]
+
+
+def _crash_on_seven(item):
+    if item.text == "7":
+        os._exit(1)  # 模拟解析库段错误
+    return _upper(item)
+
+
+def test_worker_crash_fails_only_that_item():
+    stage = mytest2.Stage("crash", _crash_on_seven, workers=2, mode="process")
+    delivered = []
+    mytest2.Pipeline([stage]).run(CountingSource(12), delivered.append)
+    assert len(delivered) == 12
+    assert [item.text for item in delivered if item.error] == ["7"]
+    assert all(item.records for item in delivered if not item.error)
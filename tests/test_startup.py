@@ -0,0 +1,6 @@
+import mytest2
+
+
+def test_startup_within_budget(capsys):
+    code = mytest2.check_startup_budget()
+    assert code == 0, capsys.readouterr().out
@@ -0,0 +1,125 @@
+import multiprocessing
+import os
+import sqlite3
+
+import pytest
+
+import mytest2
+
+
+def _columns(path, table="materials"):
+    conn = sqlite3.connect(path)
+    try:
+        return [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+    finally:
+        conn.close()
+
+
+def test_migrates_legacy_database(tmp_path):
+    path = str(tmp_path / "legacy.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE materials (id INTEGER PRIMARY KEY AUTOINCREMENT, SiO2_content REAL)")
+    conn.execute("INSERT INTO materials (SiO2_content) VALUES (66.0)")
+    conn.commit()
+    conn.close()
+
+    for _ in range(2):  # 再次打开时不重复迁移
+        with mytest2.MaterialStore(path) as store:
+            with store.reader() as reader:
+                assert reader.execute("PRAGMA user_version").fetchone()[0] == len(mytest2.SCHEMA_MIGRATIONS)
+                assert reader.execute("SELECT SiO2_content FROM materials").fetchall() == [(66.0,)]
+                tables = {row[0] for row in reader.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    columns = _columns(path)
+    assert {spec.column for spec in mytest2.FIELD_SPECS} <= set(columns)
+    assert {"author", "title", "year", "source_path"} <= set(columns)
+    assert {"ingest_manifest", "export_state", "import_state"} <= tables
+
+
+def test_synchronous_setting(tmp_path, monkeypatch):
+    monkeypatch.setattr(mytest2, "DB_SYNCHRONOUS", "FULL")
+    with mytest2.MaterialStore(str(tmp_path / "a.db")) as store:
+        assert store.write(lambda conn: conn.execute("PRAGMA synchronous").fetchone()[0]) == 2
+    with mytest2.MaterialStore(str(tmp_path / "a.db"), synchronous="off") as store:
+        assert store.write(lambda conn: conn.execute("PRAGMA synchronous").fetchone()[0]) == 0
+    with pytest.raises(ValueError):
+        mytest2.MaterialStore(str(tmp_path / "a.db"), synchronous="FAST")
+
+
+def _write_rows(path, worker, rows):
+    with mytest2.MaterialStore(path) as store:
+        with mytest2.BatchWriter(store, batch_size=7) as writer:
+            for index in range(rows):
+                writer.add({"SiO2_content": float(index)}, source=f"worker{worker}")
+                writer.mark_ingested(f"worker{worker}-{index}", 0, 0, "", 1)
+        assert writer.failed == 0
+
+
+def test_concurrent_writers_in_several_processes(tmp_path):
+    path = str(tmp_path / "shared.db")
+    mytest2.MaterialStore(path).close()
+    context = multiprocessing.get_context("spawn")
+    processes = [context.Process(target=_write_rows, args=(path, worker, 200)) for worker in range(4)]
+    for process in processes:
+        process.start()
+    with mytest2.MaterialStore(path) as store:  # 同时在本进程中读取
+        for _ in range(20):
+            with store.reader() as reader:
+                reader.execute("SELECT COUNT(*) FROM materials").fetchone()
+    for process in processes:
+        process.join(60)
+    assert [process.exitcode for process in processes] == [0] * 4
+    conn = sqlite3.connect(path)
+    try:
+        assert conn.execute("SELECT source_path, COUNT(*) FROM materials GROUP BY 1 ORDER BY 1").fetchall() == [
+            (f"worker{worker}", 200) for worker in range(4)]
+        assert conn.execute("SELECT COUNT(*) FROM ingest_manifest").fetchone()[0] == 800
+    finally:
+        conn.close()
+
+
+@pytest.fixture
+def processor(tmp_path, monkeypatch):
+    monkeypatch.setattr(mytest2, "DATABASE_NAME", str(tmp_path / "materials.db"))
+    processor = mytest2.MaterialDataProcessor(nlp_mode="off")
+    yield processor
+    processor.close()
+
+
+def _ingest(processor, folder, capsys):
+    processor.process_folder(str(folder), workers=1, show_progress=False)
+    with processor.store.reader() as conn:
+        rows = conn.execute("SELECT source_path, compressive_strength_28d FROM materials ORDER BY 1").fetchall()
+        manifest = dict(conn.execute("SELECT path, record_count FROM ingest_manifest"))
+    return capsys.readouterr().out, rows, manifest
+
+
+def test_manifest_skip_update_and_replace(processor, tmp_path, capsys):
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    a, b = docs / "a.txt", docs / "b.txt"
+    a.write_text("28天抗压强度：40MPa\n", encoding="utf-8")
+    b.write_text("28天抗压强度：50MPa\n", encoding="utf-8")
+
+    out, rows, manifest = _ingest(processor, docs, capsys)
+    assert "新增2个文件，更新0个文件，跳过0个未变化文件" in out
+    assert rows == [(str(a), 40.0), (str(b), 50.0)]
+    assert manifest == {str(a): 1, str(b): 1}
+
+    # 大小和修改时间都未变化：直接跳过
+    out, rows_again, _ = _ingest(processor, docs, capsys)
+    assert "新增0个文件，更新0个文件，跳过2个未变化文件" in out
+    assert rows_again == rows
+
+    # 只有修改时间变化、内容相同：哈希一致，只更新清单
+    stat = os.stat(a)
+    os.utime(a, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10_000_000_000))
+    out, rows_again, _ = _ingest(processor, docs, capsys)
+    assert "新增0个文件，更新0个文件，跳过2个未变化文件" in out
+    assert rows_again == rows
+
+    # 内容变化：替换该文件之前的记录，而不是追加
+    a.write_text("28天抗压强度：42.5MPa\n", encoding="utf-8")
+    os.utime(a, ns=(stat.st_atime_ns, stat.st_mtime_ns + 20_000_000_000))
+    out, rows, manifest = _ingest(processor, docs, capsys)
+    assert "新增0个文件，更新1个文件，跳过1个未变化文件" in out
+    assert rows == [(str(a), 42.5), (str(b), 50.0)]